@@ -0,0 +1,58 @@
+"""
+Compare sequence normalization + validation: the original str-based passes
+(split/join, upper, replace, regex) against the table-driven bytes path.
+
+Usage: python benchmarks/bench_normalize.py [--size-mb 6] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import timeit
+
+from rmlst_cli import fasta
+
+LEGACY_VALID_RE = re.compile(r"^[ACGTRYSWKMBDHVN]*$")
+
+
+def legacy(raw: bytes) -> str:
+    seq = raw.decode("utf-8")
+    seq = "".join(seq.split())
+    seq = seq.upper()
+    seq = seq.replace("U", "T")
+    if not LEGACY_VALID_RE.match(seq):
+        raise ValueError("invalid")
+    return seq
+
+
+def table(raw: bytes) -> str:
+    return fasta.normalize_raw_sequence(raw)
+
+
+def make_sequence(size: int, line_width: int = 80, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    seq = "".join(rng.choice("ACGTacgtN") for _ in range(size))
+    lines = [seq[i : i + line_width] for i in range(0, size, line_width)]
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=6.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = make_sequence(int(args.size_mb * 1_000_000))
+    assert legacy(raw) == table(raw)
+
+    print(f"sequence: {len(raw) / 1e6:.1f} MB, best of {args.repeat}")
+    results = {}
+    for name, func in [("legacy", legacy), ("table", table)]:
+        best = min(timeit.repeat(lambda: func(raw), number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:8s} {best * 1000:8.1f} ms  {len(raw) / best / 1e6:8.0f} MB/s")
+    print(f"  speedup  {results['legacy'] / results['table']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare two benchmarks/run.py JSON results (baseline first).
+
+Prints the time ratio per stage and profile, and exits with status 1 if any
+stage got slower than --threshold (default 10%).
+
+Usage: python benchmarks/compare.py baseline.json current.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+
+def key(result):
+    return (result["stage"], result["profile"], result.get("jobs"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    before = {key(r): r for r in baseline["results"]}
+    print(f"baseline {baseline['rmlst_cli']} -> current {current['rmlst_cli']}")
+    print(f"{'stage':18s} {'profile':18s} {'jobs':>4s} {'time':>7s} {'peak mem':>9s}")
+
+    regressions = 0
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        time_ratio = r["best_s"] / old["best_s"]
+        mem_ratio = r["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flag = ""
+        if time_ratio > 1 + args.threshold:
+            flag = "  SLOWER"
+            regressions += 1
+        jobs = "" if r.get("jobs") is None else str(r["jobs"])
+        print(
+            f"{r['stage']:18s} {r['profile']:18s} {jobs:>4s} "
+            f"{time_ratio:6.2f}x {mem_ratio:8.2f}x{flag}"
+        )
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
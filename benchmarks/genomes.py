@@ -0,0 +1,70 @@
+"""
+Synthetic genome generators for the benchmarks.
+
+Each profile describes an assembly shape, from a few large contigs to 100k tiny
+ones; write_genome renders it as a FASTA file (optionally gzip-compressed).
+Output is deterministic for a given seed.
+"""
+
+import gzip
+import os
+import random
+from typing import Dict, NamedTuple
+
+
+class Profile(NamedTuple):
+    contigs: int
+    length: int  # bases per contig
+    line_width: int = 80
+
+
+PROFILES: Dict[str, Profile] = {
+    # Closed genome plus plasmids
+    "few-large": Profile(contigs=3, length=1_600_000),
+    # Typical short-read draft assembly
+    "draft": Profile(contigs=200, length=25_000),
+    # Just under the API limit
+    "fragmented": Profile(contigs=4_900, length=1_000),
+    # Far over the limit; only usable with trim_to_5000
+    "tiny-100k": Profile(contigs=100_000, length=100, line_width=60),
+}
+
+# Quarter-size variants for a quick run
+QUICK_PROFILES: Dict[str, Profile] = {
+    name: p._replace(contigs=max(1, p.contigs // 4)) for name, p in PROFILES.items()
+}
+
+
+def genome_bytes(profile: Profile, seed: int = 0) -> bytes:
+    """
+    Renders a profile as FASTA bytes: mixed-case ACGT with occasional N runs,
+    wrapped at profile.line_width.
+    """
+    rng = random.Random(seed)
+    # Sample sequence from one random pool so large profiles stay fast to build
+    pool = "".join(rng.choice("ACGTACGTACGTacgtN") for _ in range(1 << 16))
+    width = profile.line_width
+    out = []
+    for i in range(profile.contigs):
+        start = rng.randrange(len(pool))
+        seq = (pool[start:] + pool * (profile.length // len(pool) + 1))[
+            : profile.length
+        ]
+        out.append(f">contig_{i + 1} len={profile.length}\n")
+        out.extend(seq[j : j + width] + "\n" for j in range(0, len(seq), width))
+    return "".join(out).encode("ascii")
+
+
+def write_genome(
+    path: str, profile: Profile, seed: int = 0, compress: bool = False
+) -> str:
+    """
+    Writes a synthetic genome to path (gzip level 1 if compress) and returns path.
+    """
+    data = genome_bytes(profile, seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if compress:
+        data = gzip.compress(data, compresslevel=1)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
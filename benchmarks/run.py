@@ -0,0 +1,227 @@
+"""
+Benchmark the FASTA, encoding, output and network stages on synthetic genomes.
+
+Every stage is timed (best and median of --repeat runs) and memory-profiled
+(tracemalloc peak of one extra run). Results are printed as a table and, with
+--output, written as JSON for comparison between versions (see compare.py).
+
+Usage: python benchmarks/run.py [--quick] [--repeat 5] [--only parse,e2e] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from click.testing import CliRunner
+
+import bench_normalize
+import genomes
+from rmlst_cli import __version__, fasta, formats, http
+from rmlst_cli.cli import main as cli_main
+from rmlst_cli.testing.mock_server import MockRmlstServer, synthetic_response
+
+STAGES = ("parse", "render", "encode", "normalize", "extract", "e2e")
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_bytes": peak,
+    }
+
+
+def bench_fasta(
+    workdir: str, profiles: Dict[str, genomes.Profile], stages, repeat
+) -> List[Dict]:
+    results = []
+    for name, profile in profiles.items():
+        trim = profile.contigs > fasta.MAX_CONTIGS
+        plain = genomes.write_genome(os.path.join(workdir, f"{name}.fa"), profile)
+        packed = genomes.write_genome(
+            os.path.join(workdir, f"{name}.fa.gz"), profile, compress=True
+        )
+        size = os.path.getsize(plain)
+        contigs = fasta.read_and_process_fasta(plain, trim_to_5000=trim)
+
+        cases = []
+        if "parse" in stages:
+            cases += [
+                (
+                    "parse",
+                    lambda: fasta.read_and_process_fasta(plain, trim_to_5000=trim),
+                ),
+                (
+                    "parse-gz",
+                    lambda: fasta.read_and_process_fasta(packed, trim_to_5000=trim),
+                ),
+            ]
+        if "render" in stages:
+            cases.append(("render", lambda: fasta.to_fasta_string(contigs)))
+        if "encode" in stages:
+            cases.append(
+                ("encode", lambda: sum(map(len, http.SequencePayload(contigs))))
+            )
+
+        for stage, func in cases:
+            r = measure(func, repeat)
+            r.update(stage=stage, profile=name, input_bytes=size)
+            r["mb_per_s"] = size / r["best_s"] / 1e6
+            results.append(r)
+    return results
+
+
+def bench_normalization(repeat: int, size: int) -> List[Dict]:
+    raw = bench_normalize.make_sequence(size)
+    results = []
+    for name, func in [
+        ("normalize-legacy", bench_normalize.legacy),
+        ("normalize-table", bench_normalize.table),
+    ]:
+        r = measure(lambda: func(raw), repeat)
+        r.update(stage=name, profile=f"{size // 1_000_000}MB", input_bytes=len(raw))
+        r["mb_per_s"] = len(raw) / r["best_s"] / 1e6
+        results.append(r)
+    return results
+
+
+def bench_extract(repeat: int, calls: int = 10_000) -> List[Dict]:
+    response = synthetic_response(b">c\nACGT")
+    # A contaminated sample: many predictions, duplicates and string supports
+    response["taxon_prediction"] = [
+        {"taxon": f"Species {i % 20}", "support": str(i % 100)} for i in range(60)
+    ]
+
+    def run():
+        for _ in range(calls):
+            formats.extract_species_data(response)
+
+    r = measure(run, repeat)
+    r.update(stage="extract", profile="60-predictions", calls=calls)
+    r["us_per_call"] = r["best_s"] / calls * 1e6
+    return [r]
+
+
+def bench_e2e(workdir: str, repeat: int, files: int, latency: float) -> List[Dict]:
+    """
+    rmlst -d against the local mock server, with increasing --jobs.
+    """
+    in_dir = os.path.join(workdir, "e2e")
+    profile = genomes.Profile(contigs=50, length=10_000)
+    for i in range(files):
+        genomes.write_genome(os.path.join(in_dir, f"s{i:04d}.fa"), profile, seed=i)
+
+    results = []
+    runner = CliRunner()
+    with MockRmlstServer(latency=latency) as server:
+        for jobs in (1, 4, 16):
+            out_dir = os.path.join(workdir, f"out-{jobs}")
+            args = ["-d", in_dir, "-O", out_dir, "--species-only", "--force"]
+            args += ["-u", server.uri, "-j", str(jobs), "--rate", "0"]
+
+            def run():
+                result = runner.invoke(cli_main, args)
+                assert result.exit_code == 0, result.output
+
+            r = measure(run, repeat)
+            r.update(
+                stage="e2e",
+                profile=f"{files}x{profile.contigs}x{profile.length}",
+                jobs=jobs,
+                latency_s=latency,
+                files_per_s=files / r["best_s"],
+            )
+            results.append(r)
+    return results
+
+
+def print_table(results: List[Dict]):
+    print(
+        f"{'stage':18s} {'profile':18s} {'best ms':>10s} {'median ms':>10s} {'peak MB':>9s}  extra"
+    )
+    for r in results:
+        extra = ""
+        if "mb_per_s" in r:
+            extra = f"{r['mb_per_s']:.0f} MB/s"
+        elif "us_per_call" in r:
+            extra = f"{r['us_per_call']:.1f} us/call"
+        elif "files_per_s" in r:
+            extra = f"jobs={r['jobs']} {r['files_per_s']:.1f} files/s"
+        print(
+            f"{r['stage']:18s} {r['profile']:18s} {r['best_s'] * 1000:10.1f} "
+            f"{r['median_s'] * 1000:10.1f} {r['peak_bytes'] / 1e6:9.1f}  {extra}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--quick", action="store_true", help="Smaller genomes and batches."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help=f"Comma-separated stages: {','.join(STAGES)}.")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args()
+
+    stages = set(args.only.split(",")) if args.only else set(STAGES)
+    unknown = stages - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    profiles = genomes.QUICK_PROFILES if args.quick else genomes.PROFILES
+
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="rmlst-bench-") as workdir:
+        if stages & {"parse", "render", "encode"}:
+            results += bench_fasta(workdir, profiles, stages, args.repeat)
+        if "normalize" in stages:
+            results += bench_normalization(
+                args.repeat, 1_500_000 if args.quick else 6_000_000
+            )
+        if "extract" in stages:
+            results += bench_extract(args.repeat)
+        if "e2e" in stages:
+            results += bench_e2e(
+                workdir,
+                max(1, args.repeat // 2),
+                files=16 if args.quick else 64,
+                latency=0.05,
+            )
+
+    print_table(results)
+
+    if args.output:
+        report = {
+            "rmlst_cli": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "quick": args.quick,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,72 @@
-from typing import Dict, Iterator, Tuple
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+import itertools
 import os
+import time
 
-from . import fasta, http, io
-from .http import DEFAULT_URI
+from . import fasta, http, io, parallel
+from .http import DEFAULT_URI, RmlstClient
+from .metrics import Metrics
 
 # Re-export exceptions and functions
 from .fasta import InvalidFastaError, TooManyContigsError
 from .http import RmlstNetworkError, RmlstHttpError
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .cache import PayloadDeduplicator, ResultCache
+
+# Payload returned by prepare: the rendered FASTA and, if timed, its Metrics
+Prepared = Tuple[str, Optional[Metrics]]
+
+
+def _read(
+    fasta_path: str, trim_to_5000: bool, metrics: Optional[Metrics]
+) -> List[Tuple[str, str]]:
+    start = time.perf_counter()
+    contigs = fasta.read_and_process_fasta(
+        fasta_path, trim_to_5000=trim_to_5000, metrics=metrics
+    )
+    if metrics is not None:
+        # Reading/splitting only; normalize/validate is timed separately
+        elapsed = time.perf_counter() - start
+        metrics.add_time("parse", elapsed - metrics.timings.get("normalize", 0.0))
+        metrics.set("contigs", len(contigs))
+    return contigs
+
+
+def prepare(
+    fasta_path: str, trim_to_5000: bool = False, timed: bool = False
+) -> Prepared:
+    """
+    Reads, normalizes, validates, sorts and renders a FASTA file into the payload
+    identify(payload=...) sends, so the CPU-bound part of an identification can
+    run in a worker process (see parallel.process_pool).
+    """
+    metrics = Metrics() if timed else None
+    contigs = _read(fasta_path, trim_to_5000, metrics)
+    return fasta.to_fasta_string(contigs), metrics
+
+
+def _note_shared(
+    dedup: "PayloadDeduplicator", name: str, debug: bool, metrics: Optional[Metrics]
+):
+    if name in dedup.shared:
+        if debug:
+            print(f"DEBUG: {name} shares the request of {dedup.shared[name]}")
+        if metrics is not None:
+            metrics.set("shared_with", dedup.shared[name])
+
 
 def identify(
     fasta_path: str,
@@ -18,21 +77,73 @@ def identify(
     retries: int = 3,
     retry_delay: int = 60,
     debug: bool = False,
+    cache: Optional["ResultCache"] = None,
+    client: Optional[RmlstClient] = None,
+    metrics: Optional[Metrics] = None,
+    dedup: Optional["PayloadDeduplicator"] = None,
+    name: Optional[str] = None,
+    payload: Optional["Future[Prepared]"] = None,
 ) -> Dict:
     """
     Identify species from a single FASTA file.
+    If cache is given, a previous result for the same normalized FASTA and URI is
+    returned without calling the API, and new results are stored in it.
+    client is the HTTP client to use; defaults to a shared process-wide client.
+    metrics, if given, collects per-stage timings and request details (see metrics.py).
+    dedup shares one API call between files of a batch with the same normalized
+    payload; name (default fasta_path) identifies this file in dedup.shared.
+    payload is a pending prepare(fasta_path, ...) call (e.g. in a process pool)
+    whose result is sent instead of reading fasta_path here.
     """
     try:
-        # 1. Read and process FASTA
-        contigs = fasta.read_and_process_fasta(fasta_path, trim_to_5000=trim_to_5000)
+        # 1. Read and process FASTA (contigs, or rendered by prepare)
+        contigs: fasta.FastaInput
+        if payload is None:
+            contigs = _read(fasta_path, trim_to_5000, metrics)
+        else:
+            contigs, parse_metrics = payload.result()
+            if metrics is not None and parse_metrics is not None:
+                metrics.merge(parse_metrics)
+
+        # 2. Look up cache
+        cache_key: Optional[str] = None
+        if cache is not None or dedup is not None:
+            from .cache import make_key
 
-        # 2. Render to string
-        fasta_str = fasta.to_fasta_string(contigs)
+            cache_key = make_key(contigs, uri)
+        name = name or fasta_path
+        if cache is not None and cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if debug:
+                    print(f"DEBUG: Cache hit {cache_key}")
+                if metrics is not None:
+                    metrics.set("cache_hit", True)
+                if dedup is not None:
+                    dedup.record_reuse(cache_key, name)
+                    _note_shared(dedup, name, debug, metrics)
+                return cached
 
-        # 3. Call API
-        result = http.call_rmlst_api(
-            fasta_str, uri=uri, retries=retries, retry_delay=retry_delay, debug=debug
-        )
+        # 3. Call API (the FASTA payload is streamed from the contigs)
+        def call() -> Dict:
+            result = http.call_rmlst_api(
+                contigs,
+                uri=uri,
+                retries=retries,
+                retry_delay=retry_delay,
+                debug=debug,
+                client=client,
+                metrics=metrics,
+            )
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, result)
+            return result
+
+        if dedup is None or cache_key is None:
+            return call()
+
+        result = dedup.run(cache_key, name, call)
+        _note_shared(dedup, name, debug, metrics)
         return result
 
     except (
@@ -55,31 +166,143 @@ def identify_dir(
     retries: int = 3,
     retry_delay: int = 60,
     debug: bool = False,
+    max_workers: int = 1,
+    parse_workers: int = 0,
+    ordered: bool = True,
+    schedule: str = "input",
+    recursive: bool = False,
+    pattern: Optional[str] = None,
+    cache: Optional["ResultCache"] = None,
+    client: Optional[RmlstClient] = None,
 ) -> Iterator[Tuple[str, Dict]]:
     """
     Identify species for all FASTA files in a directory.
-    Yields (basename, result_dict).
+    Yields (name, result_dict) lazily, in name order, or with ordered=False
+    as soon as each file completes. name is the basename, or with recursive=True
+    the path relative to dir_path. pattern selects files by glob (see io.iter_directory).
+    max_workers > 1 keeps that many identifications in flight at once.
+    parse_workers > 0 reads upcoming files in that many worker processes while
+    max_workers threads send the ones already read.
+    schedule (see io.schedule) is the order files are started in, e.g.
+    "largest-first"; results are still yielded in name order (if ordered).
+    Without a client, one is created for the run with a pool sized to max_workers.
+    Files with identical normalized content share a single API call.
     """
-    files = io.scan_directory(dir_path)
-
-    if not files:
+    inputs = io.iter_directory(dir_path, recursive=recursive, pattern=pattern)
+    first = next(inputs, None)
+    if first is None:
         raise InvalidFastaError("No valid FASTA files found in directory.")
 
-    for file_path in files:
-        basename = os.path.basename(file_path)
-        try:
-            result = identify(
-                file_path,
-                uri=uri,
-                trim_to_5000=trim_to_5000,
-                graceful=graceful,
-                retries=retries,
-                retry_delay=retry_delay,
-                debug=debug,
+    yield from identify_files(
+        itertools.chain([first], inputs),
+        uri=uri,
+        trim_to_5000=trim_to_5000,
+        graceful=graceful,
+        retries=retries,
+        retry_delay=retry_delay,
+        debug=debug,
+        max_workers=max_workers,
+        parse_workers=parse_workers,
+        ordered=ordered,
+        schedule=schedule,
+        cache=cache,
+        client=client,
+    )
+
+
+def identify_files(
+    inputs: Iterable[Union[str, io.InputFile]],
+    *,
+    uri: str = DEFAULT_URI,
+    trim_to_5000: bool = False,
+    graceful: bool = False,
+    retries: int = 3,
+    retry_delay: int = 60,
+    debug: bool = False,
+    max_workers: int = 1,
+    parse_workers: int = 0,
+    ordered: bool = True,
+    schedule: str = "input",
+    cache: Optional["ResultCache"] = None,
+    client: Optional[RmlstClient] = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Identify species for FASTA paths or io.InputFile items (e.g. io.iter_manifest).
+    inputs is consumed lazily (all at once with a schedule other than "input",
+    where at most 4 * max_workers results wait for an earlier file if ordered);
+    yields (name, result_dict) as identify_dir does, where a plain path is named
+    by its basename.
+    """
+    items = (
+        io.InputFile(os.path.basename(i), i) if isinstance(i, str) else i
+        for i in inputs
+    )
+
+    from .cache import PayloadDeduplicator
+
+    own_client = client is None
+    if client is None:
+        client = RmlstClient(pool_maxsize=max_workers)
+
+    identify_one = partial(
+        identify,
+        uri=uri,
+        trim_to_5000=trim_to_5000,
+        graceful=graceful,
+        retries=retries,
+        retry_delay=retry_delay,
+        debug=debug,
+        cache=cache,
+        client=client,
+        dedup=PayloadDeduplicator(),
+    )
+
+    def worker(
+        task: Tuple[io.InputFile, Optional["Future[Prepared]"]],
+    ) -> Tuple[str, Dict]:
+        item, payload = task
+        return item.name, identify_one(item.path, name=item.name, payload=payload)
+
+    pool = parallel.process_pool(parse_workers) if parse_workers > 0 else None
+
+    # Keep every parse worker busy with the next files, but only a bounded
+    # number of read payloads waiting for the network threads.
+    def start(item: io.InputFile) -> Optional["Future[Prepared]"]:
+        return None if pool is None else pool.submit(prepare, item.path, trim_to_5000)
+
+    # If identify raised, it means graceful=False (or unexpected error).
+    # It propagates when that file's turn comes, so earlier results are still yielded.
+    try:
+        if schedule != "input" and ordered:
+            # Started in schedule order, put back in input order with a bounded
+            # number of results held back; each file is read when it is started
+            listed = list(items)
+            yield from parallel.imap_scheduled(
+                lambda item: worker((item, start(item))),
+                listed,
+                io.schedule(listed, schedule),
+                max_workers=max_workers,
             )
-            yield basename, result
+            return
+
+        if schedule != "input":
+            listed = list(items)
+            items = (listed[i] for i in io.schedule(listed, schedule))
+        tasks: Iterator[Tuple[io.InputFile, Optional["Future[Prepared]"]]]
+        if pool is None:
+            tasks = ((item, None) for item in items)
+        else:
+            tasks = parallel.lookahead(start, items, depth=2 * parse_workers)
 
-        except Exception as e:
-            # If identify raised, it means graceful=False (or unexpected error).
-            # We should let it propagate.
-            raise e
+        if ordered:
+            yield from parallel.imap_ordered(worker, tasks, max_workers=max_workers)
+        else:
+            for _, result in parallel.imap_unordered(
+                worker, tasks, max_workers=max_workers
+            ):
+                yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if own_client:
+            client.close()
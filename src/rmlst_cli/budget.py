@@ -0,0 +1,169 @@
+"""
+Request budget shared by every rmlst process that points at the same state file:
+all processes of a host (e.g. a file in /dev/shm), or of every host mounting a
+shared filesystem. Limits the combined request rate and the number of requests
+in flight, so many concurrent `rmlst -f` jobs behave like one polite client.
+
+The state (token bucket, throttle factor, in-flight requests per process) is a
+small JSON document guarded by flock.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+if sys.platform != "win32":
+    import fcntl
+
+# In-flight entries of processes on other hosts not heard from for this long are
+# dropped (a request cannot take longer than the connect + read timeouts).
+STALE_AFTER = 900.0
+
+
+class BudgetError(ValueError):
+    """Raised when a shared request budget cannot be used on this platform."""
+
+    pass
+
+
+class HostBudget:
+    """
+    Cross-process token bucket and in-flight limit, consulted by _make_request
+    before every attempt (acquire) and after it (release).
+
+    With adaptive=True a 429 seen by any process halves the shared rate (down to
+    1/16), and successes recover it additively, as with http.RateLimiter.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rate: float = 1.0,
+        max_in_flight: int = 4,
+        adaptive: bool = False,
+        burst: float = 1.0,
+        poll_interval: float = 0.1,
+    ):
+        """
+        rate: requests started per second by all processes together (<= 0: unlimited).
+        max_in_flight: requests awaiting an answer at once (0: unlimited).
+        poll_interval: seconds between checks while max_in_flight is reached.
+        """
+        if sys.platform == "win32":
+            raise BudgetError("a shared request budget needs fcntl (POSIX only)")
+        self.path = path
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self.burst = burst
+        self.poll_interval = poll_interval
+        self.hostname = socket.gethostname()
+        self.owner = f"{self.hostname}:{os.getpid()}"
+        # flock is held per open file, so threads of this process queue here first
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._closed = False
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                raw = b""
+                while True:
+                    chunk = os.read(self._fd, 65536)
+                    if not chunk:
+                        break
+                    raw += chunk
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}
+                state.setdefault("tokens", self.burst)
+                state.setdefault("last", time.time())
+                state.setdefault("scale", 1.0)
+                state.setdefault("in_flight", {})
+                yield state
+                data = json.dumps(state).encode("utf-8")
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.ftruncate(self._fd, 0)
+                os.write(self._fd, data)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _reap(self, state: Dict[str, Any], now: float):
+        # Slots of processes that died mid-request would otherwise leak
+        for owner, (count, seen) in list(state["in_flight"].items()):
+            host, _, pid = owner.rpartition(":")
+            if host == self.hostname:
+                try:
+                    os.kill(int(pid), 0)
+                    continue
+                except ProcessLookupError:
+                    pass
+                except (PermissionError, ValueError):
+                    continue
+            elif now - seen < STALE_AFTER:
+                continue
+            del state["in_flight"][owner]
+
+    def acquire(self):
+        """
+        Blocks until a request may be started, and counts it as in flight.
+        """
+        while True:
+            with self._state() as state:
+                now = time.time()
+                self._reap(state, now)
+                rate = self.rate * state["scale"]
+                tokens = state["tokens"]
+                if rate > 0:
+                    elapsed = max(0.0, now - state["last"])
+                    tokens = min(self.burst, tokens + elapsed * rate)
+                state["tokens"] = tokens
+                state["last"] = now
+
+                in_flight = sum(count for count, _ in state["in_flight"].values())
+                has_token = rate <= 0 or tokens >= 1
+                has_slot = not self.max_in_flight or in_flight < self.max_in_flight
+                if has_token and has_slot:
+                    if rate > 0:
+                        state["tokens"] = tokens - 1
+                    count = state["in_flight"].get(self.owner, [0, now])[0]
+                    state["in_flight"][self.owner] = [count + 1, now]
+                    return
+                wait = (1 - tokens) / rate if not has_token else self.poll_interval
+            time.sleep(wait)
+
+    def release(self):
+        """
+        Ends a request started with acquire().
+        """
+        with self._state() as state:
+            count = state["in_flight"].get(self.owner, [0, 0])[0] - 1
+            if count > 0:
+                state["in_flight"][self.owner] = [count, time.time()]
+            else:
+                state["in_flight"].pop(self.owner, None)
+
+    def on_success(self):
+        if self.adaptive:
+            with self._state() as state:
+                state["scale"] = min(1.0, state["scale"] + 0.1)
+
+    def on_throttle(self):
+        if self.adaptive:
+            with self._state() as state:
+                state["scale"] = max(1 / 16, state["scale"] / 2)
+
+    def close(self):
+        # Also closed by the RmlstClient it was given to
+        if not self._closed:
+            self._closed = True
+            os.close(self._fd)
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import fasta
+from .fasta import FastaInput
+
+# Bump when the cached value format changes so old entries are never reused.
+CACHE_VERSION = "v1"
+
+# Run an eviction sweep every N writes (and on the first write) per process.
+SWEEP_EVERY = 64
+
+# Temp files left behind by a crashed writer are removed after this many seconds.
+STALE_TEMP_AGE = 3600
+
+# Results of finished calls a PayloadDeduplicator keeps for later duplicates.
+DEDUP_MAX_ENTRIES = 1024
+
+
+def make_key(fasta_input: FastaInput, uri: str) -> str:
+    """
+    Cache key for a normalized FASTA payload (contigs or rendered string)
+    sent to a given URI. Contigs and their to_fasta_string give the same key.
+    """
+    h = hashlib.sha256()
+    h.update(f"rmlst-cli-cache-{CACHE_VERSION}\0{uri}\0".encode("utf-8"))
+    for piece in fasta.iter_fasta_bytes(fasta_input):
+        h.update(piece)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of API results.
+
+    Entries live at <directory>/<CACHE_VERSION>/<key[:2]>/<key>.json and are written
+    atomically (temp file + rename), so any number of processes may read and write
+    the same directory concurrently; a reader sees either a whole entry or none.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> None:
+        """
+        max_bytes: evict oldest entries once the cache grows beyond this size.
+        max_age: entries older than this many seconds are treated as misses and evicted.
+        """
+        self.directory = directory
+        self.root = os.path.join(directory, CACHE_VERSION)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # put() is called from every worker thread of a run
+        self._writes_lock = threading.Lock()
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached result for key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            if self.max_age is not None:
+                if time.time() - os.stat(path).st_mtime > self.max_age:
+                    self._remove(path)
+                    return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Unreadable or corrupt entry: drop it and treat as a miss
+            self._remove(path)
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """
+        Stores result under key.
+        The cache is best-effort: filesystem errors are ignored so a full or read-only
+        cache never fails an identification that already succeeded.
+        """
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", text=True)
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(temp_path, path)
+        except OSError:
+            self._remove(temp_path)
+            return
+
+        with self._writes_lock:
+            sweep = self._writes % SWEEP_EVERY == 0
+            self._writes += 1
+        if sweep:
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes expired entries, then the oldest entries until the cache fits max_bytes.
+        Safe to run while other processes use the cache.
+        """
+        if self.max_bytes is None and self.max_age is None:
+            return
+
+        now = time.time()
+        entries: List[Tuple[float, int, str]] = []
+        for sub in self._scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for entry in self._scandir(sub.path):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                age = now - st.st_mtime
+                if entry.name.startswith(".tmp-"):
+                    if age > STALE_TEMP_AGE:
+                        self._remove(entry.path)
+                    continue
+                if self.max_age is not None and age > self.max_age:
+                    self._remove(entry.path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+
+        if self.max_bytes is None:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _scandir(path: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(path) as it:
+                return list(it)
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed by another process
+            pass
+
+
+class _SharedCall:
+    def __init__(self, name: str):
+        self.name = name
+        self.done = threading.Event()
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+
+
+def _copy_error(error: BaseException) -> BaseException:
+    # A new exception of the same type, arguments and attributes, so threads
+    # waiting on a failed call do not all raise (and extend) one object
+    copy = BaseException.__new__(type(error))
+    copy.args = error.args
+    copy.__dict__.update(getattr(error, "__dict__", {}))
+    return copy
+
+
+class PayloadDeduplicator:
+    """
+    Collapses identical payloads within one batch into a single API call.
+
+    The first file to reach run() with a key makes the call; files with the same key
+    that arrive while it is in flight wait for it, and later ones reuse its kept
+    result. The results of the max_entries most recently used keys are kept. A
+    failed call is not remembered, so a later duplicate tries again.
+    """
+
+    def __init__(self, max_entries: int = DEDUP_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _SharedCall] = {}
+        # key -> (name of the file whose call succeeded, its result), oldest first
+        self._finished: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        # name of a file -> name of the file whose request it shared
+        self.shared: Dict[str, str] = {}
+
+    def _reuse(self, key: str, name: str) -> Optional[Dict[str, Any]]:
+        # Called with the lock held
+        finished = self._finished.get(key)
+        if finished is None:
+            return None
+        self._finished.move_to_end(key)
+        leader, result = finished
+        if leader != name:
+            self.shared[name] = leader
+        return result
+
+    def run(
+        self, key: str, name: str, func: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Returns func() for the first file with key, and that same result for every
+        later file with key. Files that arrive while a call fails raise a copy of
+        its error, chained to it.
+        """
+        with self._lock:
+            result = self._reuse(key, name)
+            if result is not None:
+                return result
+            call = self._calls.get(key)
+            if call is None:
+                leader = self._calls[key] = _SharedCall(name)
+
+        if call is None:
+            try:
+                leader.result = func()
+            except BaseException as e:
+                leader.error = e
+                raise
+            else:
+                with self._lock:
+                    self._finished[key] = (name, leader.result)
+                    while len(self._finished) > self.max_entries:
+                        self._finished.popitem(last=False)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                leader.done.set()
+            return leader.result
+
+        call.done.wait()
+        if call.error is not None:
+            raise _copy_error(call.error) from call.error
+        with self._lock:
+            self.shared[name] = call.name
+        return call.result
+
+    def record_reuse(self, key: str, name: str):
+        """
+        Records name as sharing the request of the earlier file of this batch with
+        key, if one is kept (e.g. when name's result came from the cache).
+        """
+        with self._lock:
+            self._reuse(key, name)
@@ -1,12 +1,25 @@
 import sys
-import time
 import click
+import itertools
 import os
+import signal
+import threading
+import time
 import traceback
+from functools import partial
 
-from . import api, io, formats, __version__
+from . import api, io, formats, parallel, __version__
 from .fasta import InvalidFastaError, TooManyContigsError
-from .http import RmlstNetworkError, RmlstHttpError, DEFAULT_URI
+from .metrics import Metrics, build_report
+from .http import (
+    Backoff,
+    CircuitBreaker,
+    RateLimiter,
+    RmlstNetworkError,
+    RmlstHttpError,
+    RmlstClient,
+    DEFAULT_URI,
+)
 
 # Exit codes
 EXIT_SUCCESS = 0
@@ -18,6 +31,9 @@ EXIT_HTTP_ERROR = 5
 EXIT_FS_ERROR = 7
 EXIT_SIGINT = 130
 
+# Failures that identifying the same file again cannot fix
+PERMANENT_FAILURES = (EXIT_INPUT_ERROR, EXIT_TOO_MANY_CONTIGS)
+
 
 def print_error(msg: str, exit_code: int, debug: bool = False):
     click.echo(msg, err=True)
@@ -27,6 +43,10 @@ def print_error(msg: str, exit_code: int, debug: bool = False):
 
 
 def handle_exception(e: Exception, debug: bool):
+    # Not imported at startup: they pull in hashlib and socket
+    from .budget import BudgetError
+    from .shard import ShardError
+
     if isinstance(e, InvalidFastaError):
         print_error("invalid FASTA or no sequences", EXIT_INPUT_ERROR, debug)
     elif isinstance(e, TooManyContigsError):
@@ -39,12 +59,31 @@ def handle_exception(e: Exception, debug: bool):
         print_error(
             f"HTTP error {e.status_code} or invalid JSON", EXIT_HTTP_ERROR, debug
         )
+    elif isinstance(e, BudgetError):
+        print_error(f"host budget: {e}", EXIT_INPUT_ERROR, debug)
+    elif isinstance(e, ShardError):
+        print_error(f"invalid shard: {e}", EXIT_INPUT_ERROR, debug)
+    elif isinstance(e, io.ManifestError):
+        print_error(f"invalid manifest: {e}", EXIT_INPUT_ERROR, debug)
     elif isinstance(e, OSError):
         print_error("filesystem error", EXIT_FS_ERROR, debug)
     else:
         print_error(f"unexpected error: {e}", EXIT_UNEXPECTED, debug)
 
 
+def describe_error(e: Exception) -> str:
+    """Short reason for a file's [ERR] line in batch modes."""
+    if isinstance(e, InvalidFastaError):
+        return "invalid FASTA or no sequences"
+    if isinstance(e, TooManyContigsError):
+        return "more than 5000 contigs; use --trim-to-5000"
+    if isinstance(e, RmlstNetworkError):
+        return "network error"
+    if isinstance(e, RmlstHttpError):
+        return f"HTTP {e.status_code}"
+    return str(e)
+
+
 def get_species_headers(header_str: str) -> tuple[str, str]:
     """
     Parse header string into two headers for species and support columns.
@@ -68,6 +107,17 @@ def get_species_headers(header_str: str) -> tuple[str, str]:
         return "species", "support"
 
 
+def _parse_shard_option(value):
+    if value is None:
+        return None
+    from .shard import ShardError, parse_shard
+
+    try:
+        return parse_shard(value)
+    except ShardError as e:
+        raise click.BadParameter(str(e))
+
+
 def get_exit_code(e: Exception) -> int:
     if isinstance(e, InvalidFastaError):
         return EXIT_INPUT_ERROR
@@ -82,7 +132,204 @@ def get_exit_code(e: Exception) -> int:
     return EXIT_UNEXPECTED
 
 
-@click.command()
+# Options that configure the shared HTTP client, used by the CLI and `rmlst serve`
+CLIENT_OPTIONS = [
+    click.option(
+        "--backoff",
+        type=click.Choice(["fixed", "exponential"]),
+        default="fixed",
+        help="Retry delay strategy: fixed --retry-delay, or doubling it per attempt (with jitter).",
+    ),
+    click.option(
+        "--max-retry-delay",
+        default=600.0,
+        type=click.FloatRange(min=0),
+        help="Upper bound for a single retry delay, including Retry-After, in seconds.",
+    ),
+    click.option(
+        "--ignore-retry-after",
+        is_flag=True,
+        help="Do not honor the server's Retry-After header.",
+    ),
+    click.option(
+        "--rate",
+        default=1.0,
+        type=click.FloatRange(min=0),
+        help="Maximum requests started per second (0 = unlimited).",
+    ),
+    click.option(
+        "--adaptive-rate",
+        is_flag=True,
+        help="Halve the request rate on HTTP 429 and recover it gradually on success.",
+    ),
+    click.option(
+        "--breaker-threshold",
+        default=3,
+        type=click.IntRange(min=0),
+        help="Consecutive kiosk failures after which requests go straight to the fallback endpoint (0 = never).",
+    ),
+    click.option(
+        "--breaker-cooldown",
+        default=300.0,
+        type=click.FloatRange(min=0),
+        help="Seconds before the kiosk endpoint is probed again after the breaker opened.",
+    ),
+    click.option(
+        "--hedge-after",
+        type=click.FloatRange(min=0),
+        help="Also send a request to the fallback endpoint if the kiosk has not answered after this many seconds.",
+    ),
+    click.option(
+        "--host-budget",
+        type=click.Path(dir_okay=False),
+        envvar="RMLST_HOST_BUDGET",
+        help="State file of a request budget shared by all rmlst processes using it (e.g. /dev/shm/rmlst-budget).",
+    ),
+    click.option(
+        "--host-rate",
+        default=1.0,
+        type=click.FloatRange(min=0),
+        help="With --host-budget: requests started per second by all processes together (0 = unlimited).",
+    ),
+    click.option(
+        "--host-max-in-flight",
+        default=4,
+        type=click.IntRange(min=0),
+        help="With --host-budget: requests awaiting an answer at once, across all processes (0 = unlimited).",
+    ),
+]
+
+CACHE_OPTIONS = [
+    click.option(
+        "--cache-dir",
+        type=click.Path(file_okay=False),
+        help="Reuse results for identical inputs from this directory.",
+    ),
+    click.option(
+        "--cache-max-size",
+        type=click.IntRange(min=1),
+        help="Maximum cache size in MB (oldest entries are evicted).",
+    ),
+    click.option(
+        "--cache-max-age",
+        type=click.FloatRange(min=0),
+        help="Maximum age of cache entries in days.",
+    ),
+]
+
+
+def client_options(f):
+    for option in reversed(CLIENT_OPTIONS):
+        f = option(f)
+    return f
+
+
+def cache_options(f):
+    for option in reversed(CACHE_OPTIONS):
+        f = option(f)
+    return f
+
+
+def make_client(
+    jobs,
+    rate,
+    adaptive_rate,
+    backoff,
+    max_retry_delay,
+    ignore_retry_after,
+    breaker_threshold,
+    breaker_cooldown,
+    hedge_after,
+    host_budget=None,
+    host_rate=1.0,
+    host_max_in_flight=4,
+):
+    """
+    One connection pool, rate limiter, retry policy and endpoint health tracker
+    shared by all requests of a run (or of a server), plus the budget shared with
+    other processes, if any.
+    """
+    budget = None
+    if host_budget:
+        from .budget import HostBudget
+
+        budget = HostBudget(
+            host_budget,
+            rate=host_rate,
+            max_in_flight=host_max_in_flight,
+            adaptive=adaptive_rate,
+        )
+    return RmlstClient(
+        pool_maxsize=jobs,
+        rate_limiter=RateLimiter(rate, adaptive=adaptive_rate) if rate else None,
+        backoff=Backoff(
+            strategy=backoff,
+            max_delay=max_retry_delay,
+            jitter=backoff == "exponential",
+            respect_retry_after=not ignore_retry_after,
+        ),
+        breaker=(
+            CircuitBreaker(breaker_threshold, breaker_cooldown)
+            if breaker_threshold
+            else None
+        ),
+        hedge_after=hedge_after,
+        host_budget=budget,
+    )
+
+
+def make_cache(cache_dir, cache_max_size, cache_max_age):
+    if not cache_dir:
+        return None
+    from .cache import ResultCache
+
+    return ResultCache(
+        cache_dir,
+        max_bytes=cache_max_size * 1024 * 1024 if cache_max_size else None,
+        max_age=cache_max_age * 86400 if cache_max_age is not None else None,
+    )
+
+
+# Parameters that configure this process's own client and cache; a job forwarded
+# to `rmlst serve` runs with the server's instead (and prints debug output there)
+LOCAL_ONLY_PARAMS = (
+    "backoff",
+    "max_retry_delay",
+    "ignore_retry_after",
+    "rate",
+    "adaptive_rate",
+    "breaker_threshold",
+    "breaker_cooldown",
+    "hedge_after",
+    "host_budget",
+    "host_rate",
+    "host_max_in_flight",
+    "cache_dir",
+    "cache_max_size",
+    "cache_max_age",
+    "debug",
+)
+
+
+def warn_ignored_options(ctx, address):
+    """Warns about given options that a job forwarded to address does not use."""
+    from click.core import ParameterSource
+
+    ignored = [
+        "--" + name.replace("_", "-")
+        for name in LOCAL_ONLY_PARAMS
+        if ctx.get_parameter_source(name)
+        not in (None, ParameterSource.DEFAULT, ParameterSource.DEFAULT_MAP)
+    ]
+    if ignored:
+        click.echo(
+            f"Warning: {', '.join(ignored)} not used: forwarding to rmlst serve at "
+            f"{address} (--no-server identifies in this process).",
+            err=True,
+        )
+
+
+@click.group(invoke_without_command=True)
 @click.option(
     "-f",
     "--fasta",
@@ -96,6 +343,22 @@ def get_exit_code(e: Exception) -> int:
     type=click.Path(exists=True, file_okay=False),
     help="Directory input.",
 )
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False, allow_dash=True),
+    help="File listing FASTA paths, one per line with an optional TAB and sample ID ('-' for stdin).",
+)
+@click.option(
+    "-r",
+    "--recursive",
+    is_flag=True,
+    help="Also scan subdirectories of --dir.",
+)
+@click.option(
+    "--glob",
+    "pattern",
+    help="Select --dir files by glob (e.g. '*.fa.gz') instead of FASTA extensions.",
+)
 @click.option("-o", "--output", type=click.Path(), help="Output file or directory.")
 @click.option("-O", "--outdir", type=click.Path(), help="Output directory.")
 @click.option(
@@ -107,39 +370,192 @@ def get_exit_code(e: Exception) -> int:
 @click.option("-u", "--uri", default=DEFAULT_URI, help="rMLST API URI.")
 @click.option("--retries", default=3, help="Number of retries.")
 @click.option("--retry-delay", default=60, help="Delay between retries in seconds.")
+@client_options
+@click.option(
+    "--ndjson",
+    is_flag=True,
+    help="Directory mode on stdout: print one JSON line per file as soon as it completes.",
+)
 @click.option("--trim-to-5000", is_flag=True, help="Trim to 5000 contigs.")
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of files identified concurrently in directory mode.",
+)
+@click.option(
+    "--parse-workers",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Processes that read and validate upcoming files while --jobs threads upload (directory mode; 0 = read in the upload threads).",
+)
+@cache_options
+@click.option(
+    "--shard",
+    callback=lambda ctx, param, value: _parse_shard_option(value),
+    help="Only identify shard INDEX/COUNT (1-based) of a --dir/--manifest run, e.g. 2/8.",
+)
+@click.option(
+    "--shard-by",
+    type=click.Choice(io.SHARD_STRATEGIES),
+    default="hash",
+    help="Assign files to shards by stable name hash, sorted position, or balanced file size.",
+)
+@click.option(
+    "--schedule",
+    type=click.Choice(io.SCHEDULES),
+    default="input",
+    help="Order in which --dir/--manifest files are started: as listed, or by file size (largest-first avoids a long tail with --jobs). Results keep the listed order.",
+)
+@click.option(
+    "--cooperative",
+    is_flag=True,
+    help="Share the files of a --dir/--manifest run with other processes using the same --outdir, through lease files.",
+)
+@click.option(
+    "--lease-ttl",
+    default=120.0,
+    type=click.FloatRange(min=1),
+    show_default=True,
+    help="Seconds after which the lease of a worker that stopped renewing it (crashed) is taken over.",
+)
+@click.option(
+    "--stats-json",
+    "stats_path",
+    type=click.Path(dir_okay=False),
+    help="Write per-file stage timings and a percentile report of a --dir/--manifest run to this file.",
+)
 @click.option("--graceful", is_flag=True, help="Graceful failure mode.")
 @click.option("--force", is_flag=True, help="Force overwrite of existing output files.")
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip files completed by a previous run into the same --outdir (directory mode).",
+)
+@click.option(
+    "--server",
+    envvar="RMLST_SERVER",
+    help="Forward --fasta jobs to `rmlst serve` at this socket path or http://host:port (default: its default socket, if running).",
+)
+@click.option(
+    "--no-server",
+    is_flag=True,
+    help="Always identify in this process, even if `rmlst serve` is running.",
+)
+@click.option(
+    "--server-token",
+    envvar="RMLST_SERVER_TOKEN",
+    help="Token of a server started with `rmlst serve --port` (see --server).",
+)
 @click.option("--debug", is_flag=True, help="Enable debug output.")
 @click.version_option(__version__, prog_name="rmlst", message="%(prog)s %(version)s")
+@click.pass_context
 def main(
+    ctx,
     fasta,
     directory,
+    manifest,
+    recursive,
+    pattern,
     output,
     outdir,
     species_only,
     uri,
     retries,
     retry_delay,
+    backoff,
+    max_retry_delay,
+    ignore_retry_after,
+    rate,
+    adaptive_rate,
+    breaker_threshold,
+    breaker_cooldown,
+    hedge_after,
+    host_budget,
+    host_rate,
+    host_max_in_flight,
+    ndjson,
     trim_to_5000,
+    jobs,
+    parse_workers,
+    cache_dir,
+    cache_max_size,
+    cache_max_age,
+    shard,
+    shard_by,
+    cooperative,
+    lease_ttl,
+    schedule,
+    stats_path,
     graceful,
     force,
+    resume,
+    server,
+    no_server,
+    server_token,
     debug,
 ):
     """rmlst-cli: rMLST API client."""
+    if ctx.invoked_subcommand is not None:
+        return
 
     # Input validation
     if fasta and directory:
         click.echo("Error: --fasta and --dir are mutually exclusive.", err=True)
         sys.exit(EXIT_INPUT_ERROR)
-    if not fasta and not directory:
-        click.echo("Error: One of --fasta or --dir must be provided.", err=True)
+    if manifest and (fasta or directory):
+        click.echo(
+            "Error: --manifest cannot be combined with --fasta or --dir.", err=True
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+    if not fasta and not directory and not manifest:
+        click.echo(
+            "Error: One of --fasta, --dir or --manifest must be provided.", err=True
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+    if (recursive or pattern) and not directory:
+        click.echo("Error: --recursive and --glob require --dir.", err=True)
         sys.exit(EXIT_INPUT_ERROR)
 
     if output and outdir:
         click.echo("Error: --output and --outdir are mutually exclusive.", err=True)
         sys.exit(EXIT_INPUT_ERROR)
 
+    batch = directory or manifest
+    if resume and not (batch and (output or outdir)):
+        click.echo(
+            "Error: --resume requires --dir or --manifest, and --outdir.", err=True
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+
+    if ndjson and not (batch and not (output or outdir)):
+        click.echo(
+            "Error: --ndjson requires --dir or --manifest, without --outdir.", err=True
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+
+    if stats_path and not batch:
+        click.echo("Error: --stats-json requires --dir or --manifest.", err=True)
+        sys.exit(EXIT_INPUT_ERROR)
+
+    if shard and not batch:
+        click.echo("Error: --shard requires --dir or --manifest.", err=True)
+        sys.exit(EXIT_INPUT_ERROR)
+
+    if cooperative and not (batch and (output or outdir)):
+        click.echo(
+            "Error: --cooperative requires --dir or --manifest, and --outdir.",
+            err=True,
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+    if cooperative and (shard or resume):
+        click.echo(
+            "Error: --cooperative cannot be combined with --shard or --resume.",
+            err=True,
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+
     # Determine output mode
     mode = "json"
     header = None
@@ -151,7 +567,44 @@ def main(
     # Unify output/outdir
     out_path = output or outdir
 
+    # A running `rmlst serve` identifies single files with its shared connection
+    # pool, rate limiter and cache; this process only formats and writes the result.
+    remote = None
+    if fasta and not no_server:
+        from .remote import RemoteError, connect
+
+        try:
+            remote = connect(server, server_token)
+        except RemoteError as e:
+            print_error(f"{e} (see --server-token)", EXIT_INPUT_ERROR, debug)
+        if remote is not None:
+            warn_ignored_options(ctx, remote.address)
+        if remote is not None and debug:
+            click.echo(
+                f"DEBUG: Forwarding to rmlst serve at {remote.address}", err=True
+            )
+
+    cache = None
+    client = None
     try:
+        if remote is None:
+            # Inside the try: --host-budget opens its state file here
+            cache = make_cache(cache_dir, cache_max_size, cache_max_age)
+            client = make_client(
+                jobs,
+                rate,
+                adaptive_rate,
+                backoff,
+                max_retry_delay,
+                ignore_retry_after,
+                breaker_threshold,
+                breaker_cooldown,
+                hedge_after,
+                host_budget,
+                host_rate,
+                host_max_in_flight,
+            )
+
         if fasta:
             handle_single_file(
                 fasta,
@@ -165,10 +618,17 @@ def main(
                 graceful,
                 force,
                 debug,
+                cache=cache,
+                client=client,
+                remote=remote,
             )
         else:
+            if manifest:
+                inputs = io.iter_manifest(manifest)
+            else:
+                inputs = io.iter_directory(directory, recursive, pattern)
             handle_directory(
-                directory,
+                inputs,
                 out_path,
                 mode,
                 header,
@@ -179,12 +639,27 @@ def main(
                 graceful,
                 force,
                 debug,
+                jobs=jobs,
+                cache=cache,
+                client=client,
+                resume=resume,
+                ndjson=ndjson,
+                stats_path=stats_path,
+                parse_workers=parse_workers,
+                shard=shard,
+                shard_by=shard_by,
+                cooperative=cooperative,
+                lease_ttl=lease_ttl,
+                schedule=schedule,
             )
 
     except KeyboardInterrupt:
         sys.exit(EXIT_SIGINT)
     except Exception as e:
         handle_exception(e, debug)
+    finally:
+        if client is not None:
+            client.close()
 
 
 def handle_single_file(
@@ -199,7 +674,14 @@ def handle_single_file(
     graceful,
     force,
     debug,
+    cache=None,
+    client=None,
+    remote=None,
 ):
+    """
+    Single-file mode; with remote (a remote.RemoteClient), the file is identified
+    by `rmlst serve` instead of in this process.
+    """
     final_out_path = out_path
     if out_path and os.path.isdir(out_path):
         suffix = ".json"
@@ -212,8 +694,13 @@ def handle_single_file(
         click.echo(f"[SKIP] {os.path.basename(final_out_path)} (exists)", err=True)
         sys.exit(EXIT_SUCCESS)
 
+    if remote is not None:
+        identify = remote.identify
+    else:
+        identify = partial(api.identify, cache=cache, client=client)
+
     try:
-        result = api.identify(
+        result = identify(
             fasta_path,
             uri=uri,
             trim_to_5000=trim_to_5000,
@@ -244,8 +731,100 @@ def handle_single_file(
         click.echo(content)
 
 
+def finished_outcome(item, out_path, mode, force, completed=None, leases=None):
+    """
+    Outcome of an item that needs no identification: "done" if a previous run
+    (or another cooperative worker, see lease.LeaseQueue) completed it, "skipped"
+    if its JSON output exists. None otherwise.
+    """
+    basename = item.name
+
+    if completed and basename in completed:
+        return {"basename": basename, "done": completed[basename]}
+    if leases is not None:
+        entry = leases.finished(basename)
+        if entry is not None:
+            return {"basename": basename, "done": entry}
+
+    if out_path and mode == "json":
+        derived = io.output_path_for(basename, out_path, ".json")
+        if os.path.exists(derived) and not force:
+            return {"basename": basename, "skipped": derived}
+    return None
+
+
+def identify_file(
+    item,
+    out_path,
+    mode,
+    uri,
+    retries,
+    retry_delay,
+    trim_to_5000,
+    force,
+    debug,
+    cache=None,
+    client=None,
+    completed=None,
+    stats=False,
+    dedup=None,
+    payload=None,
+    leases=None,
+):
+    """
+    Identify one io.InputFile of a batch run.
+    Returns a dict with either "done", "skipped", "leased", "result" or "exception"
+    set; never raises.
+    completed maps basenames finished by a previous run to their journal entries.
+    With leases (a lease.LeaseQueue), the file is only identified if its lease can
+    be taken; "leased" carries the item back if another worker holds it.
+    With stats, identified files also carry their Metrics under "metrics".
+    A result shared with an identical file through dedup names it in "shared_with".
+    payload is the item's pending api.prepare call, if it is read in a parse worker.
+    """
+    basename = item.name
+
+    finished = finished_outcome(item, out_path, mode, force, completed, leases)
+    if finished:
+        return finished
+    if leases is not None:
+        if not leases.claim(basename):
+            return {"basename": basename, "leased": item}
+        # The previous holder may have finished it just before we claimed it
+        finished = finished_outcome(item, out_path, mode, force, completed, leases)
+        if finished:
+            leases.release(basename)
+            return finished
+
+    file_metrics = Metrics() if stats else None
+    try:
+        res = api.identify(
+            item.path,
+            uri=uri,
+            trim_to_5000=trim_to_5000,
+            graceful=False,
+            retries=retries,
+            retry_delay=retry_delay,
+            debug=debug,
+            cache=cache,
+            client=client,
+            metrics=file_metrics,
+            dedup=dedup,
+            name=basename,
+            payload=payload,
+        )
+        return {
+            "basename": basename,
+            "result": res,
+            "metrics": file_metrics,
+            "shared_with": dedup.shared.get(basename) if dedup else None,
+        }
+    except Exception as e:
+        return {"basename": basename, "exception": e, "metrics": file_metrics}
+
+
 def handle_directory(
-    dir_path,
+    inputs,
     out_path,
     mode,
     header,
@@ -256,7 +835,35 @@ def handle_directory(
     graceful,
     force,
     debug,
+    jobs=1,
+    cache=None,
+    client=None,
+    resume=False,
+    ndjson=False,
+    stats_path=None,
+    parse_workers=0,
+    shard=None,
+    shard_by="hash",
+    cooperative=False,
+    lease_ttl=120.0,
+    schedule="input",
 ):
+    """
+    Batch mode: identify every io.InputFile of inputs (consumed lazily, so work
+    starts while a large directory tree or manifest is still being read).
+    With stats_path, a metrics report of the run is written there at the end.
+    With parse_workers, files are read in that many processes ahead of the
+    `jobs` network threads.
+    With shard (a shard.Shard), only that shard's files are identified and the
+    summary and journal get per-shard names (see shard.merge_shards).
+    With cooperative, files are claimed through lease files in out_path, so any
+    number of processes can work through the same inputs (see lease.LeaseQueue);
+    files held by other workers are waited for, and every worker writes the
+    complete summary.
+    schedule (see io.schedule) is the order files are started in; with anything
+    but "input" the whole input is listed and stat'ed first.
+    """
+    started = time.perf_counter()
     if out_path:
         if os.path.exists(out_path) and not os.path.isdir(out_path):
             click.echo(
@@ -266,167 +873,749 @@ def handle_directory(
         if not os.path.exists(out_path):
             os.makedirs(out_path, exist_ok=True)
 
-    files = io.scan_directory(dir_path)
-    if not files:
+    inputs = iter(inputs)
+    first = next(inputs, None)
+    if first is None:
         click.echo("invalid FASTA or no sequences", err=True)
         sys.exit(EXIT_INPUT_ERROR)
+    inputs = itertools.chain([first], inputs)
+    if shard:
+        from .shard import select_shard
+
+        # A shard may be empty; it still writes its (empty) summary for the merge
+        inputs = select_shard(inputs, shard, by=shard_by)
+
+    summary_name = io.SUMMARY_NAME
+    journal_name = io.JOURNAL_NAME
+    if shard:
+        summary_name = shard.file_name(summary_name)
+        journal_name = shard.file_name(journal_name)
 
     ok_count = 0
     failed_count = 0
     skipped_count = 0
+    shared_count = 0
     highest_exit_code = 0
 
-    results = []
-
     summary_path = None
     if out_path and mode == "species":
-        summary_path = os.path.join(out_path, "rmlst_summary.tsv")
+        summary_path = os.path.join(out_path, summary_name)
+
+    # Every outcome is journaled in the output directory so an interrupted run
+    # can be continued with --resume. Cooperative workers journal into the shared
+    # done markers instead.
+    journal = None
+    leases = None
+    completed = {}
+    if cooperative:
+        from .lease import LeaseQueue
+
+        leases = journal = LeaseQueue(out_path, ttl=lease_ttl)
+    elif out_path:
+        journal = io.Journal(os.path.join(out_path, journal_name), resume=resume)
+        for name, entry in journal.entries.items():
+            if entry.get("status") != "ok":
+                continue
+            if mode == "json" and not (
+                entry.get("output")
+                and os.path.exists(os.path.join(out_path, entry["output"]))
+            ):
+                continue
+            completed[name] = entry
 
-    for i, file_path in enumerate(files):
-        if i > 0:
-            time.sleep(1)
+    from .cache import PayloadDeduplicator
 
-        basename = os.path.basename(file_path)
+    worker = partial(
+        identify_file,
+        out_path=out_path,
+        mode=mode,
+        uri=uri,
+        retries=retries,
+        retry_delay=retry_delay,
+        trim_to_5000=trim_to_5000,
+        force=force,
+        debug=debug,
+        cache=cache,
+        client=client,
+        completed=completed,
+        stats=bool(stats_path),
+        # Identical assemblies under different names are uploaded only once
+        dedup=PayloadDeduplicator(),
+        leases=leases,
+    )
 
-        if out_path and mode == "json":
-            derived = io.derive_output_path(file_path, out_path, ".json")
-            if os.path.exists(derived) and not force:
-                click.echo(f"[SKIP] {os.path.basename(derived)} (exists)", err=True)
+    species_header, support_header = get_species_headers(header)
+    if not out_path and mode == "species" and not ndjson:
+        click.echo(f"file\t{species_header}\t{support_header}")
+
+    # Files are identified concurrently (up to `jobs` at once). Outcomes are
+    # consumed here in input order, or with --ndjson or a schedule as soon as each
+    # file completes; printed output is identical to a serial run either way.
+    # Request spacing is left to the client's rate limiter (--rate).
+    pool = parallel.process_pool(parse_workers) if parse_workers else None
+
+    def start(item):
+        # Read, validate and render the next files while earlier ones are sent;
+        # at most 2 * parse_workers read payloads wait ahead of the network threads.
+        if finished_outcome(item, out_path, mode, force, completed, leases):
+            return None
+        return pool.submit(api.prepare, item.path, trim_to_5000, timed=bool(stats_path))
+
+    def run(task):
+        (position, item), payload = task
+        return position, worker(item, payload=payload)
+
+    def identify_all(indexed):
+        # Takes and yields pairs tagged with the file's input position
+        if schedule != "input":
+            # Started in schedule order (e.g. largest files first) and handled as
+            # they complete; only what is printed is put back in input order below
+            indexed = list(indexed)
+            order = io.schedule([item for _, item in indexed], schedule)
+            indexed = [indexed[i] for i in order]
+        if pool is None:
+            tasks = ((pair, None) for pair in indexed)
+        else:
+            tasks = parallel.lookahead(
+                lambda pair: start(pair[1]), indexed, depth=2 * parse_workers
+            )
+        if ndjson or schedule != "input":
+            return (
+                result
+                for _, result in parallel.imap_unordered(run, tasks, max_workers=jobs)
+            )
+        return parallel.imap_ordered(run, tasks, max_workers=jobs)
+
+    # Cooperative runs come back to files other workers held, until they are done
+    # or their lease expires and can be taken over.
+    def cooperative_outcomes():
+        pending = []
+        for position, outcome in identify_all(enumerate(inputs)):
+            if "leased" in outcome:
+                pending.append((position, outcome["leased"]))
+            else:
+                yield position, outcome
+        waiting = None
+        while pending:
+            if len(pending) != waiting:
+                waiting = len(pending)
+                click.echo(
+                    f"[WAIT] {waiting} files in progress on other workers", err=True
+                )
+            time.sleep(min(lease_ttl / 4, 5.0))
+            items, pending = pending, []
+            for position, outcome in identify_all(items):
+                if "leased" in outcome:
+                    pending.append((position, outcome["leased"]))
+                else:
+                    yield position, outcome
+
+    outcomes = cooperative_outcomes() if leases else identify_all(enumerate(inputs))
+
+    # Per-file outputs and the journal are written as each outcome arrives. With a
+    # schedule, the progress and stdout lines of files that finish early wait for
+    # the earlier files (cooperative runs print them at once); the summary and the
+    # stdout JSON array are sorted by input position at the end.
+    reorder = None
+    if schedule != "input" and not ndjson and not leases:
+        reorder = parallel.Reorder()
+
+    def emit_lines(position, lines):
+        for batch in [lines] if reorder is None else reorder.add(position, lines):
+            for text, err in batch:
+                click.echo(text, err=err)
+
+    # Only the stdout JSON array needs every result at the end; all other outputs
+    # are written as outcomes arrive.
+    results = []
+    summary_rows = []
+    stats = []
+    try:
+        for position, outcome in outcomes:
+            basename = outcome["basename"]
+            lines = []
+
+            if "done" in outcome:
+                entry = outcome["done"]
+                lines.append((f"[SKIP] {basename} (done)", True))
+                skipped_count += 1
+                stats.append({"file": basename, "status": "done"})
+                row = (basename, entry.get("species", ""), entry.get("support", ""))
+                summary_rows.append((position, row))
+                emit_lines(position, lines)
+                continue
+
+            if "skipped" in outcome:
+                skipped_name = os.path.relpath(outcome["skipped"], out_path)
+                lines.append((f"[SKIP] {skipped_name} (exists)", True))
                 skipped_count += 1
+                stats.append({"file": basename, "status": "skipped"})
+                journal.record(basename, "skipped", output=skipped_name)
+                emit_lines(position, lines)
                 continue
 
-        file_result = None
-        file_error = None
-        is_graceful_failure = False
+            file_result = None
+            file_error = None
+            is_graceful_failure = False
 
-        try:
-            res = api.identify(
-                file_path,
-                uri=uri,
-                trim_to_5000=trim_to_5000,
-                graceful=False,
-                retries=retries,
-                retry_delay=retry_delay,
-                debug=debug,
-            )
-            file_result = res
-            ok_count += 1
-            if out_path:
-                click.echo(f"[OK] {basename}", err=True)
+            shared_with = outcome.get("shared_with")
+            if "exception" not in outcome:
+                file_result = outcome["result"]
+                ok_count += 1
+                if shared_with:
+                    shared_count += 1
+                if out_path:
+                    note = f" (same payload as {shared_with})" if shared_with else ""
+                    lines.append((f"[OK] {basename}{note}", True))
 
-        except Exception as e:
-            failed_count += 1
-            code = get_exit_code(e)
-            highest_exit_code = max(highest_exit_code, code)
+            else:
+                e = outcome["exception"]
+                failed_count += 1
+                code = get_exit_code(e)
+                highest_exit_code = max(highest_exit_code, code)
+
+                if out_path:
+                    msg = describe_error(e)
+                    lines.append((f"[ERR code={code}] {basename}: {msg}", True))
+                    journal.record(basename, "failed", code=code, error=str(e))
 
+                if graceful:
+                    is_graceful_failure = True
+                    file_result = {}
+                else:
+                    file_error = {"code": code, "message": str(e)}
+
+            write_started = time.perf_counter()
             if out_path:
-                msg = str(e)
-                if isinstance(e, InvalidFastaError):
-                    msg = "invalid FASTA or no sequences"
-                elif isinstance(e, TooManyContigsError):
-                    msg = "more than 5000 contigs; use --trim-to-5000"
-                elif isinstance(e, RmlstNetworkError):
-                    msg = "network error"
-                elif isinstance(e, RmlstHttpError):
-                    msg = f"HTTP {e.status_code}"
-
-                click.echo(f"[ERR code={code}] {basename}: {msg}", err=True)
-
-            if graceful:
-                is_graceful_failure = True
-                file_result = {}
+                if "result" in outcome:
+                    # Write per-file JSON before journaling it as done
+                    output = None
+                    if mode == "json":
+                        derived = io.output_path_for(basename, out_path, ".json")
+                        io.atomic_write(derived, formats.format_json(file_result))
+                        output = os.path.relpath(derived, out_path)
+                    species, support = formats.extract_species_and_support(file_result)
+                    fields = {"shared_with": shared_with} if shared_with else {}
+                    journal.record(
+                        basename,
+                        "ok",
+                        output=output,
+                        species=species,
+                        support=support,
+                        **fields,
+                    )
+                    summary_rows.append((position, (basename, species, support)))
+                elif is_graceful_failure:
+                    if mode == "json":
+                        derived = io.output_path_for(basename, out_path, ".json")
+                        io.atomic_write(derived, formats.format_json(file_result))
+                    summary_rows.append((position, (basename, "", "")))
+
+            elif ndjson:
+                record = {"file": basename}
+                if file_error:
+                    record["error"] = file_error
+                elif mode == "species":
+                    species, support = formats.extract_species_and_support(file_result)
+                    record.update(species=species, support=support)
+                else:
+                    record["result"] = None if is_graceful_failure else file_result
+                if shared_with:
+                    record["shared_with"] = shared_with
+                click.echo(formats.format_json_line(record))
+
+            elif mode == "species":
+                if not file_error:
+                    species, support = formats.extract_species_and_support(file_result)
+                    lines.append((f"{basename}\t{species}\t{support}", False))
+
             else:
-                file_error = {"code": code, "message": str(e)}
-
-        # Collect results
-        results.append(
-            {
-                "basename": basename,
-                "result": file_result,
-                "error": file_error,
-                "is_graceful_failure": is_graceful_failure,
-            }
-        )
+                results.append(
+                    {
+                        "position": position,
+                        "basename": basename,
+                        "result": file_result,
+                        "error": file_error,
+                        "is_graceful_failure": is_graceful_failure,
+                    }
+                )
 
-        # Write per-file JSON
-        if out_path and mode == "json" and file_result is not None:
-            derived = io.derive_output_path(file_path, out_path, ".json")
-            io.atomic_write(derived, formats.format_json(file_result))
+            file_metrics = outcome.get("metrics")
+            if file_metrics is not None:
+                file_metrics.add_time("write", time.perf_counter() - write_started)
+                record = {"file": basename, **file_metrics.to_dict()}
+                if "exception" in outcome:
+                    record.update(status="failed", code=code)
+                else:
+                    record["status"] = "ok"
+                stats.append(record)
+            emit_lines(position, lines)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if journal:
+            journal.close()
 
     # Final Output / Summary
     if out_path:
+        shared_note = f", {shared_count} shared" if shared_count else ""
         click.echo(
-            f"Done: {ok_count} ok, {failed_count} failed, {skipped_count} skipped.",
+            f"Done: {ok_count} ok, {failed_count} failed, "
+            f"{skipped_count} skipped{shared_note}.",
             err=True,
         )
 
         if mode != "json":
             # mode == "species"
-            species_header, support_header = get_species_headers(header)
+            summary_rows.sort(key=lambda row: row[0])
             lines = [f"file\t{species_header}\t{support_header}"]
-            for item in results:
-                if item["error"] and not graceful:
-                    continue
-                species, support = "", ""
-                if item["result"]:
-                    species, support = formats.extract_species_and_support(
-                        item["result"]
-                    )
-                lines.append(f"{item['basename']}\t{species}\t{support}")
+            for _, (basename, species, support) in summary_rows:
+                lines.append(f"{basename}\t{species}\t{support}")
 
             content = "\n".join(lines)
             io.atomic_write(summary_path, content)
 
-    else:
-        # Stdout
-        if mode == "json":
-            use_wrapped = graceful
-            if not use_wrapped:
-                for item in results:
-                    if item["result"] is not None:
-                        if not formats.extract_species(item["result"]):
-                            use_wrapped = True
-                            break
-
-            json_out = []
+    elif mode == "json" and not ndjson:
+        # Stdout JSON array (species rows and NDJSON lines were already printed)
+        results.sort(key=lambda item: item["position"])
+        use_wrapped = graceful
+        if not use_wrapped:
             for item in results:
-                if use_wrapped:
-                    if item["is_graceful_failure"]:
-                        json_out.append({"file": item["basename"], "result": None})
-                    elif item["error"]:
-                        json_out.append(
-                            {"file": item["basename"], "error": item["error"]}
-                        )
-                    else:
-                        json_out.append(
-                            {"file": item["basename"], "result": item["result"]}
-                        )
+                if item["result"] is not None:
+                    if not formats.extract_species(item["result"]):
+                        use_wrapped = True
+                        break
+
+        json_out = []
+        for item in results:
+            if use_wrapped:
+                if item["is_graceful_failure"]:
+                    json_out.append({"file": item["basename"], "result": None})
+                elif item["error"]:
+                    json_out.append({"file": item["basename"], "error": item["error"]})
                 else:
-                    if item["error"]:
-                        json_out.append(
-                            {"file": item["basename"], "error": item["error"]}
-                        )
-                    elif item["result"] is not None:
-                        json_out.append(item["result"])
+                    json_out.append(
+                        {"file": item["basename"], "result": item["result"]}
+                    )
+            else:
+                if item["error"]:
+                    json_out.append({"file": item["basename"], "error": item["error"]})
+                elif item["result"] is not None:
+                    json_out.append(item["result"])
 
-            click.echo(formats.format_json(json_out))
+        click.echo(formats.format_json(json_out))
 
-        else:
-            if mode == "species":
-                # Two columns: species and support
-                species_header, support_header = get_species_headers(header)
-                click.echo(f"file\t{species_header}\t{support_header}")
-                for item in results:
-                    if item["error"] and not graceful:
-                        continue
-                    species, support = "", ""
-                    if item["result"]:
-                        species, support = formats.extract_species_and_support(
-                            item["result"]
-                        )
-                    click.echo(f"{item['basename']}\t{species}\t{support}")
-            else:
-                # JSON mode already handled above
-                pass
+    if stats_path:
+        report = build_report(stats, time.perf_counter() - started, jobs=jobs)
+        io.atomic_write(stats_path, formats.format_json(report))
 
     sys.exit(highest_exit_code if not graceful else 0)
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Unix socket to listen on (default: rmlst-<uid>.sock in $XDG_RUNTIME_DIR or the temp directory).",
+)
+@click.option(
+    "--port",
+    type=click.IntRange(0, 65535),
+    help="Listen on this TCP port instead of a Unix socket (needs --token).",
+)
+@click.option("--host", default="127.0.0.1", help="Address to bind with --port.")
+@click.option(
+    "--token",
+    envvar="RMLST_SERVER_TOKEN",
+    help="Secret that clients of --port must send (their --server-token).",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of files identified concurrently.",
+)
+@client_options
+@cache_options
+@click.option("--debug", is_flag=True, help="Enable debug output.")
+def serve(
+    socket_path,
+    port,
+    host,
+    token,
+    jobs,
+    backoff,
+    max_retry_delay,
+    ignore_retry_after,
+    rate,
+    adaptive_rate,
+    breaker_threshold,
+    breaker_cooldown,
+    hedge_after,
+    host_budget,
+    host_rate,
+    host_max_in_flight,
+    cache_dir,
+    cache_max_size,
+    cache_max_age,
+    debug,
+):
+    """Serve identify jobs of `rmlst -f` with one shared client, rate limit and cache."""
+    from .remote import default_socket_path
+    from .server import IdentifyService, RmlstServer, ServerError
+
+    if port is not None and not token:
+        # Anyone who can connect could make the server read files as this user
+        click.echo(
+            "Error: --port needs --token (or RMLST_SERVER_TOKEN); clients pass it "
+            "as --server-token.",
+            err=True,
+        )
+        sys.exit(EXIT_INPUT_ERROR)
+
+    try:
+        client = make_client(
+            jobs,
+            rate,
+            adaptive_rate,
+            backoff,
+            max_retry_delay,
+            ignore_retry_after,
+            breaker_threshold,
+            breaker_cooldown,
+            hedge_after,
+            host_budget,
+            host_rate,
+            host_max_in_flight,
+        )
+    except Exception as e:
+        handle_exception(e, debug)
+    service = IdentifyService(
+        client,
+        cache=make_cache(cache_dir, cache_max_size, cache_max_age),
+        max_jobs=jobs,
+        debug=debug,
+    )
+    try:
+        server = RmlstServer(
+            service,
+            socket_path=socket_path or default_socket_path(),
+            host=host,
+            port=port,
+            token=token,
+        )
+    except (ServerError, OSError) as e:
+        client.close()
+        print_error(f"cannot start server: {e}", EXIT_INPUT_ERROR, debug)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    click.echo(f"rmlst serve listening on {server.address}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        client.close()
+
+
+@main.command()
+@click.argument(
+    "sources", nargs=-1, required=True, type=click.Path(exists=True, file_okay=False)
+)
+@click.option(
+    "-O", "--outdir", required=True, type=click.Path(), help="Merged output directory."
+)
+@click.option("--debug", is_flag=True, help="Enable debug output.")
+def merge(sources, outdir, debug):
+    """Merge the -O directories of a --shard run into one run's outputs."""
+    from .shard import merge_shards
+
+    try:
+        result = merge_shards(sources, outdir)
+    except Exception as e:
+        handle_exception(e, debug)
+    shards = f" from {len(result.shards)} shards" if result.shards else ""
+    click.echo(
+        f"Merged {result.files} files{shards} ({result.copied} outputs copied).",
+        err=True,
+    )
+
+
+@main.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "-O", "--outdir", required=True, type=click.Path(), help="Output directory."
+)
+@click.option(
+    "-r", "--recursive", is_flag=True, help="Also watch subdirectories of DIRECTORY."
+)
+@click.option(
+    "--glob",
+    "pattern",
+    help="Select files by glob (e.g. '*.fa.gz') instead of FASTA extensions.",
+)
+@click.option("-u", "--uri", default=DEFAULT_URI, help="rMLST API URI.")
+@click.option("--retries", default=3, help="Number of retries.")
+@click.option("--retry-delay", default=60, help="Delay between retries in seconds.")
+@click.option("--trim-to-5000", is_flag=True, help="Trim to 5000 contigs.")
+@click.option(
+    "-j",
+    "--jobs",
+    default=2,
+    type=click.IntRange(min=1),
+    help="Number of files identified concurrently.",
+)
+@click.option(
+    "--settle",
+    default=10.0,
+    type=click.FloatRange(min=0),
+    help="Seconds a file's size and modification time must stay unchanged before it is identified.",
+)
+@click.option(
+    "--poll",
+    is_flag=True,
+    help="Rescan every --poll-interval seconds instead of using inotify (e.g. on network filesystems).",
+)
+@click.option(
+    "--poll-interval",
+    default=5.0,
+    type=click.FloatRange(min=0.1),
+    help="Seconds between rescans when polling.",
+)
+@client_options
+@cache_options
+@click.option("--debug", is_flag=True, help="Enable debug output.")
+def watch(
+    directory,
+    outdir,
+    recursive,
+    pattern,
+    uri,
+    retries,
+    retry_delay,
+    trim_to_5000,
+    jobs,
+    settle,
+    poll,
+    poll_interval,
+    backoff,
+    max_retry_delay,
+    ignore_retry_after,
+    rate,
+    adaptive_rate,
+    breaker_threshold,
+    breaker_cooldown,
+    hedge_after,
+    host_budget,
+    host_rate,
+    host_max_in_flight,
+    cache_dir,
+    cache_max_size,
+    cache_max_age,
+    debug,
+):
+    """Identify FASTA files as they arrive in DIRECTORY, until interrupted."""
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    client = None
+    try:
+        client = make_client(
+            jobs,
+            rate,
+            adaptive_rate,
+            backoff,
+            max_retry_delay,
+            ignore_retry_after,
+            breaker_threshold,
+            breaker_cooldown,
+            hedge_after,
+            host_budget,
+            host_rate,
+            host_max_in_flight,
+        )
+        handle_watch(
+            directory,
+            outdir,
+            recursive,
+            pattern,
+            uri,
+            retries,
+            retry_delay,
+            trim_to_5000,
+            debug,
+            jobs=jobs,
+            cache=make_cache(cache_dir, cache_max_size, cache_max_age),
+            client=client,
+            settle=settle,
+            poll_interval=poll_interval,
+            use_inotify=not poll,
+        )
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        handle_exception(e, debug)
+    finally:
+        if client is not None:
+            client.close()
+
+
+def handle_watch(
+    directory,
+    out_path,
+    recursive,
+    pattern,
+    uri,
+    retries,
+    retry_delay,
+    trim_to_5000,
+    debug,
+    jobs=2,
+    cache=None,
+    client=None,
+    settle=10.0,
+    poll_interval=5.0,
+    use_inotify=True,
+    stop=None,
+):
+    """
+    Watch mode: identifies the FASTA files of directory that are new or changed,
+    once they have stayed unchanged for settle seconds, up to `jobs` at once.
+    Each file gets its JSON output in out_path, its row in the summary and a
+    journal entry with its size and mtime, so a restarted watch only picks up what
+    arrived or changed since. Files that failed with a network or HTTP error are
+    retried with exponential backoff (and again after a restart). Runs until stop
+    (a threading.Event) is set or KeyboardInterrupt.
+    """
+    from .watch import MAX_RETRY_DELAY, DirectoryWatcher, FileSignature, SettleTracker
+
+    if os.path.exists(out_path) and not os.path.isdir(out_path):
+        click.echo("Error: Output path must be a directory in watch mode.", err=True)
+        sys.exit(EXIT_INPUT_ERROR)
+    os.makedirs(out_path, exist_ok=True)
+
+    journal = io.Journal(os.path.join(out_path, io.JOURNAL_NAME), resume=True)
+    known = {
+        name: FileSignature(entry["size"], entry["mtime_ns"])
+        for name, entry in journal.entries.items()
+        if "size" in entry
+        and "mtime_ns" in entry
+        and (entry.get("status") == "ok" or entry.get("code") in PERMANENT_FAILURES)
+    }
+    tracker = SettleTracker(settle, known)
+
+    summary_path = os.path.join(out_path, io.SUMMARY_NAME)
+    species_header, support_header = get_species_headers(None)
+    lock = threading.Lock()
+    counts = {"ok": 0, "failed": 0}
+    # name -> consecutive network or HTTP failures, for the retry backoff
+    failures = {}
+    backoff = Backoff("exponential", max_delay=MAX_RETRY_DELAY, jitter=True)
+
+    def write_summary():
+        # One row per file, in the order files were first journaled; a changed
+        # file's row is replaced
+        lines = [f"file\t{species_header}\t{support_header}"]
+        for name, entry in journal.entries.items():
+            if entry.get("status") == "ok":
+                species, support = entry.get("species", ""), entry.get("support", "")
+                lines.append(f"{name}\t{species}\t{support}")
+        io.atomic_write(summary_path, "\n".join(lines))
+
+    def handle(item, sig):
+        outcome = identify_file(
+            item,
+            out_path,
+            "json",
+            uri,
+            retries,
+            retry_delay,
+            trim_to_5000,
+            force=True,
+            debug=debug,
+            cache=cache,
+            client=client,
+        )
+        basename = item.name
+        fields = {"size": sig.size, "mtime_ns": sig.mtime_ns}
+        with lock:
+            if "exception" in outcome:
+                e = outcome["exception"]
+                code = get_exit_code(e)
+                click.echo(
+                    f"[ERR code={code}] {basename}: {describe_error(e)}", err=True
+                )
+                journal.record(basename, "failed", code=code, error=str(e), **fields)
+                counts["failed"] += 1
+                # Invalid files are not retried until they change; network and
+                # HTTP errors (e.g. the API is down) are, changed or not
+                retry = code not in PERMANENT_FAILURES
+            else:
+                result = outcome["result"]
+                derived = io.output_path_for(basename, out_path, ".json")
+                io.atomic_write(derived, formats.format_json(result))
+                species, support = formats.extract_species_and_support(result)
+                journal.record(
+                    basename,
+                    "ok",
+                    output=os.path.relpath(derived, out_path),
+                    species=species,
+                    support=support,
+                    **fields,
+                )
+                click.echo(f"[OK] {basename}", err=True)
+                counts["ok"] += 1
+                retry = False
+            write_summary()
+            journal.sync()
+            if retry:
+                failures[basename] = failures.get(basename, 0) + 1
+                delay = backoff.delay(failures[basename], max(retry_delay, 1))
+            else:
+                failures.pop(basename, None)
+        if retry:
+            tracker.retry(basename, delay)
+        else:
+            tracker.done(basename, sig)
+
+    watcher = DirectoryWatcher(directory, recursive, poll_interval, use_inotify)
+    mode = "inotify" if watcher.uses_inotify else f"polling every {poll_interval:g}s"
+    click.echo(f"Watching {directory} ({mode}); Ctrl-C to stop.", err=True)
+
+    pool = parallel.ThreadPool(jobs)
+    running = set()
+    try:
+        while stop is None or not stop.is_set():
+            watcher.add_directories()
+            ready, next_check = tracker.update(
+                io.iter_directory(directory, recursive, pattern)
+            )
+            for item, sig in ready:
+                future = pool.submit(handle, item, sig)
+                # Wake up to surface an unexpected error in handle at once
+                future.add_done_callback(lambda _: watcher.wake())
+                running.add(future)
+            for future in [f for f in running if f.done()]:
+                running.discard(future)
+                future.result()
+            # Idle until something changes, a file finishes, a waiting file may
+            # have settled, or (when polling or stoppable) the next poll is due
+            if stop is not None and next_check is None:
+                next_check = poll_interval
+            watcher.wait(next_check)
+    finally:
+        pool.shutdown(wait=stop is not None, cancel_futures=stop is None)
+        watcher.close()
+        journal.close()
+        click.echo(
+            f"Done: {counts['ok']} ok, {counts['failed']} failed.",
+            err=True,
+        )
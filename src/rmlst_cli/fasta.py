@@ -1,6 +1,25 @@
+import heapq
+import io
 import re
-from typing import List, Tuple
-from Bio import SeqIO
+import sys
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
 
 
 class InvalidFastaError(Exception):
@@ -15,15 +34,56 @@ class TooManyContigsError(Exception):
     pass
 
 
+# Read size for the streaming parser
+CHUNK_SIZE = 1 << 20
+
+# Maximum number of contigs accepted by the API
+MAX_CONTIGS = 5000
+
+# A rendered FASTA string, or contigs to be rendered as by to_fasta_string
+FastaInput = Union[str, Sequence[Tuple[str, str]]]
+
 # Pre-compile regex for validation
 # Allowed: A, C, G, T, N, R, Y, S, W, K, M, B, D, H, V
 VALID_CHARS_RE = re.compile(r"^[ACGTRYSWKMBDHVN]*$")
 
+VALID_CHARS = b"ACGTRYSWKMBDHVN"
+
+# ASCII characters removed by str.split() (what normalize_sequence strips)
+WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# Byte that never occurs in a normalized sequence; marks invalid input
+_INVALID = 0
+
+
+def _build_tables() -> Tuple[bytes, bytes]:
+    # Uppercase, then U -> T
+    normalize = bytearray(range(256))
+    for c in range(ord("a"), ord("z") + 1):
+        normalize[c] = c - 32
+    normalize[ord("u")] = normalize[ord("U")] = ord("T")
+
+    # Same, but every byte that does not normalize to a valid character
+    # becomes _INVALID, so normalization and validation are one pass.
+    validate = bytearray([_INVALID] * 256)
+    for c in range(256):
+        if normalize[c] in VALID_CHARS:
+            validate[c] = normalize[c]
+    return bytes(normalize), bytes(validate)
+
+
+_NORMALIZE_TABLE, _NORMALIZE_VALIDATE_TABLE = _build_tables()
+
 
 def normalize_sequence(seq: str) -> str:
     """
     Remove whitespace, uppercase, and convert U -> T.
     """
+    if seq.isascii():
+        # Fast path: one table-driven pass over the bytes
+        raw = seq.encode("ascii")
+        return raw.translate(_NORMALIZE_TABLE, WHITESPACE).decode("ascii")
+
     # Remove whitespace (including newlines)
     seq = "".join(seq.split())
     # Uppercase
@@ -37,63 +97,364 @@ def validate_sequence(seq: str) -> bool:
     """
     Validate that sequence contains only IUPAC DNA characters (ACGTN + ambiguity).
     """
+    if seq.isascii():
+        return not seq.encode("ascii").translate(None, VALID_CHARS)
     return bool(VALID_CHARS_RE.match(seq))
 
 
-def read_and_process_fasta(
-    path: str, trim_to_5000: bool = False
-) -> List[Tuple[str, str]]:
+def normalize_raw_sequence(raw: bytes, header: str = "") -> str:
     """
-    Reads a FASTA file, normalizes, validates, sorts, and optionally trims it.
-    Returns a list of (header, sequence) tuples.
+    Normalizes and validates the raw sequence bytes of one record in a single
+    table-driven pass: strips whitespace, uppercases, converts U -> T.
+    Raises InvalidFastaError naming the first offending character and its
+    1-based position in the normalized sequence.
     """
-    contigs = []
+    norm = raw.translate(_NORMALIZE_VALIDATE_TABLE, WHITESPACE)
+
+    pos = norm.find(_INVALID)
+    if pos >= 0:
+        stripped = raw.translate(None, WHITESPACE)
+        if stripped[pos] >= 0x80:
+            # Only ASCII letters are valid, but report undecodable input as such
+            try:
+                stripped.decode("utf-8")
+            except UnicodeDecodeError:
+                raise InvalidFastaError("File is not valid UTF-8.")
+            char = stripped[pos : pos + 4].decode("utf-8", "ignore")[:1]
+        else:
+            char = chr(stripped[pos])
+        raise InvalidFastaError(
+            f"Invalid character {char!r} at position {pos + 1} in sequence: {header}"
+        )
+
+    return norm.decode("ascii")
+
+
+# Leading bytes of compressed FASTA, detected regardless of the file name
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bzip2",
+    b"\xfd7zXZ\x00": "xz",
+    b"(\xb5/\xfd": "zstd",
+}
+
+
+class _Stream(Protocol):
+    # What _DecompressingReader uses of a decompressor (GzipFile, ZstdFile, ...)
+    def readinto(self, b: Any) -> int: ...
+
+    def close(self) -> None: ...
+
+
+class _DecompressingReader(io.RawIOBase):
+    """
+    Raw binary reader over a decompression stream.
+    Corrupt or truncated data raises InvalidFastaError instead of the
+    decompressor's own error types; closing also closes the underlying file.
+    """
+
+    def __init__(
+        self,
+        stream: _Stream,
+        source: BinaryIO,
+        errors: Tuple[Type[BaseException], ...],
+    ):
+        self._stream = stream
+        self._source = source
+        self._errors = errors
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        try:
+            return self._stream.readinto(b)
+        except self._errors as e:
+            raise InvalidFastaError(f"Could not read FASTA file: {e}")
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._stream.close()
+            self._source.close()
+        finally:
+            super().close()
+
+
+# A decompressing stream and the errors it raises on bad data
+_Decompressed = Tuple[_Stream, Tuple[Type[BaseException], ...]]
+
+
+def _open_zstd(f: BinaryIO) -> _Decompressed:
+    if sys.version_info >= (3, 14):
+        try:
+            from compression import zstd
+
+            return zstd.ZstdFile(f), (zstd.ZstdError, EOFError, OSError)
+        except ImportError:
+            # Built without zstd support
+            pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstandard is not installed; install it with 'pip install rmlst-cli[zstd]'."
+        )
+    reader = zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+    return reader, (zstandard.ZstdError, OSError)
+
+
+def _open_decompressed(f: BinaryIO, kind: str) -> _Decompressed:
+    """
+    Returns a decompressing stream over f and the errors it raises on bad data.
+    Decompressors are imported only when a compressed file is seen.
+    """
+    if kind == "gzip":
+        import gzip
+        import zlib
+
+        return gzip.GzipFile(fileobj=f, mode="rb"), (OSError, EOFError, zlib.error)
+    if kind == "bzip2":
+        import bz2
+
+        return bz2.BZ2File(f, mode="rb"), (OSError, EOFError)
+    if kind == "xz":
+        import lzma
+
+        return lzma.LZMAFile(f, mode="rb"), (lzma.LZMAError, OSError, EOFError)
+    return _open_zstd(f)
+
+
+def open_fasta(path: str) -> BinaryIO:
+    """
+    Opens a FASTA file for binary reading, decompressing gzip, bzip2, xz and zstd
+    input on the fly (detected by magic bytes). Nothing is written to disk.
+    """
+    f = open(path, "rb")
+    try:
+        head = f.read(6)
+        f.seek(0)
+        for magic, kind in COMPRESSION_MAGIC.items():
+            if head.startswith(magic):
+                stream, errors = _open_decompressed(f, kind)
+                return io.BufferedReader(_DecompressingReader(stream, f, errors))
+    except BaseException:
+        f.close()
+        raise
+    return f
+
+
+def _read_chunk(f: BinaryIO, size: int) -> bytes:
+    """
+    Reads up to size bytes with universal newlines (\r\n and \r become \n).
+    A \r\n split across two chunks turns into two \n, i.e. an extra blank
+    line, which is harmless: blank lines never change a record.
+    """
+    chunk = f.read(size)
+    if b"\r" in chunk:
+        chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return chunk
+
+
+def _finish_record(header: bytes, parts: List[bytes]) -> Tuple[str, bytes]:
+    try:
+        title = header.decode("utf-8")
+    except UnicodeDecodeError:
+        raise InvalidFastaError("File is not valid UTF-8.")
+    return title.rstrip(), b"".join(parts)
+
+
+def iter_fasta_records(
+    path: str, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Streams (header, raw_sequence) records from a FASTA file in one pass.
+
+    Matches the Biopython "fasta" parser: the first line must be a '>' header,
+    the header is the rest of that line with trailing whitespace removed, and
+    every following line up to the next '>' line belongs to the sequence.
+    raw_sequence still contains line breaks; see normalize_raw_sequence.
+    The file is read in chunk_size blocks, and only header boundaries are
+    searched for, so sequence data is never split into lines.
+    Compressed files are decompressed while streaming (see open_fasta).
+    """
+    with open_fasta(path) as f:
+        buf = _read_chunk(f, chunk_size)
+        if not buf:
+            return
+        if buf[:1] != b">":
+            raise InvalidFastaError(
+                "Could not read FASTA file: first line is not a '>' header."
+            )
+
+        pos = 0  # buf[pos] is the '>' of the next header
+        while True:
+            # Make sure the whole header line is buffered
+            eol = buf.find(b"\n", pos)
+            while eol < 0:
+                more = _read_chunk(f, chunk_size)
+                if not more:
+                    # Last line of the file is a header without a newline
+                    yield _finish_record(buf[pos + 1 :], [])
+                    return
+                buf = buf[pos:] + more
+                pos = 0
+                eol = buf.find(b"\n")
+
+            header = buf[pos + 1 : eol]
+            parts: List[bytes] = []
+            start = eol
+
+            # Collect sequence data up to the next '>' at the start of a line
+            while True:
+                nxt = buf.find(b"\n>", start)
+                if nxt >= 0:
+                    parts.append(buf[start:nxt])
+                    pos = nxt + 1
+                    break
+
+                parts.append(buf[start:] if start else buf)
+                at_line_start = buf.endswith(b"\n")
+                buf = _read_chunk(f, chunk_size)
+                if not buf:
+                    yield _finish_record(header, parts)
+                    return
+                start = 0
+                if at_line_start and buf[:1] == b">":
+                    pos = 0
+                    break
+
+            yield _finish_record(header, parts)
+
+
+def _iter_records_biopython(path: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Reference parser based on Biopython (optional dependency).
+    """
+    try:
+        from Bio import SeqIO, BiopythonDeprecationWarning
+    except ImportError:
+        raise ImportError(
+            "Biopython is not installed; install it with 'pip install rmlst-cli[biopython]'."
+        )
+    import warnings
 
     try:
         # We open explicitly to enforce utf-8 and handle file errors
-        with open(path, "r", encoding="utf-8") as f:
+        with io.TextIOWrapper(open_fasta(path), encoding="utf-8") as f:
             # Suppress BiopythonDeprecationWarning about leading whitespace/comments
-            import warnings
-            from Bio import BiopythonDeprecationWarning
-
             with warnings.catch_warnings():
                 warnings.simplefilter("ignore", BiopythonDeprecationWarning)
                 records = list(SeqIO.parse(f, "fasta"))
     except UnicodeDecodeError:
         raise InvalidFastaError("File is not valid UTF-8.")
+    except InvalidFastaError:
+        raise
     except Exception as e:
         raise InvalidFastaError(f"Could not read FASTA file: {e}")
 
-    if not records:
-        raise InvalidFastaError("No sequences found in FASTA file.")
-
     for record in records:
-        # record.description includes the ID and description.
-        # The spec says "Each contig header (> line) preserved exactly".
-        # Biopython splits id and description.
-        # record.description is usually the full header line after '>'.
-        header = record.description
+        yield record.description, bytes(record.seq)
+
+
+def iter_contigs(
+    path: str, parser: str = "builtin", metrics: Optional["Metrics"] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yields normalized, validated (header, sequence) contigs in file order.
+    parser is "builtin" (streaming, default) or "biopython".
+    metrics: accumulates the normalize/validate time.
+    """
+    if parser == "biopython":
+        records = _iter_records_biopython(path)
+    elif parser == "builtin":
+        records = iter_fasta_records(path)
+    else:
+        raise ValueError(f"Unknown FASTA parser: {parser}")
 
-        # record.seq is a Seq object, convert to str
-        raw_seq = str(record.seq)
+    try:
+        if metrics is None:
+            for header, raw_seq in records:
+                yield header, normalize_raw_sequence(raw_seq, header)
+        else:
+            for header, raw_seq in records:
+                start = time.perf_counter()
+                seq = normalize_raw_sequence(raw_seq, header)
+                metrics.add_time("normalize", time.perf_counter() - start)
+                yield header, seq
+    except OSError as e:
+        raise InvalidFastaError(f"Could not read FASTA file: {e}")
 
-        norm_seq = normalize_sequence(raw_seq)
 
-        if not validate_sequence(norm_seq):
-            raise InvalidFastaError(f"Invalid characters in sequence: {header}")
+class _Descending:
+    """
+    Wraps a value so that it compares in reverse order (for use in heap keys).
+    """
 
-        contigs.append((header, norm_seq))
+    __slots__ = ("value",)
 
-    # Sort: Length desc, then Header asc
-    contigs.sort(key=lambda x: (-len(x[1]), x[0]))
+    def __init__(self, value: Any):
+        self.value = value
 
-    if len(contigs) > 5000:
-        if trim_to_5000:
-            contigs = contigs[:5000]
-        else:
-            raise TooManyContigsError("More than 5000 contigs; use --trim-to-5000")
+    def __lt__(self, other: "_Descending") -> bool:
+        return self.value > other.value
 
-    return contigs
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def select_top_contigs(
+    contigs: Iterable[Tuple[str, str]], limit: int = MAX_CONTIGS
+) -> List[Tuple[str, str]]:
+    """
+    Returns the best `limit` contigs, sorted by length desc, then header asc
+    (ties keep file order), holding at most `limit` contigs in memory.
+    """
+    # Min-heap whose top is the worst kept contig: shortest, then largest
+    # header, then latest in the file.
+    heap: List[Tuple[int, _Descending, int, str, str]] = []
+    for i, (header, seq) in enumerate(contigs):
+        item = (len(seq), _Descending(header), -i, header, seq)
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif heap[0] < item:
+            heapq.heapreplace(heap, item)
+
+    heap.sort(key=lambda x: (-x[0], x[3], -x[2]))
+    return [(header, seq) for _, _, _, header, seq in heap]
+
+
+def read_and_process_fasta(
+    path: str,
+    trim_to_5000: bool = False,
+    parser: str = "builtin",
+    metrics: Optional["Metrics"] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Reads a FASTA file, normalizes, validates, sorts, and optionally trims it.
+    Returns a list of (header, sequence) tuples.
+    """
+    contigs = iter_contigs(path, parser=parser, metrics=metrics)
+
+    if trim_to_5000:
+        # Keep only the best MAX_CONTIGS while streaming
+        selected = select_top_contigs(contigs, MAX_CONTIGS)
+    else:
+        selected = []
+        for contig in contigs:
+            if len(selected) == MAX_CONTIGS:
+                # Fail as soon as one contig too many is seen
+                raise TooManyContigsError("More than 5000 contigs; use --trim-to-5000")
+            selected.append(contig)
+
+        # Sort: Length desc, then Header asc
+        selected.sort(key=lambda x: (-len(x[1]), x[0]))
+
+    if not selected:
+        raise InvalidFastaError("No sequences found in FASTA file.")
+
+    return selected
 
 
 def to_fasta_string(contigs: List[Tuple[str, str]]) -> str:
@@ -105,3 +466,36 @@ def to_fasta_string(contigs: List[Tuple[str, str]]) -> str:
         output.append(f">{header}")
         output.append(seq)
     return "\n".join(output)
+
+
+def iter_fasta_bytes(
+    fasta: FastaInput, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yields the UTF-8 encoding of to_fasta_string(contigs) (or of a FASTA
+    string) in pieces of at most about chunk_size bytes, without building it.
+    """
+    if isinstance(fasta, str):
+        for i in range(0, len(fasta), chunk_size):
+            yield fasta[i : i + chunk_size].encode("utf-8")
+        return
+
+    for i, (header, seq) in enumerate(fasta):
+        separator = "\n" if i else ""
+        yield f"{separator}>{header}\n".encode("utf-8")
+        # Normalized sequences are ASCII
+        for j in range(0, len(seq), chunk_size):
+            yield seq[j : j + chunk_size].encode("ascii")
+
+
+def fasta_byte_size(fasta: FastaInput) -> int:
+    """
+    Length in bytes of the UTF-8 encoded FASTA yielded by iter_fasta_bytes.
+    """
+    if isinstance(fasta, str):
+        return len(fasta) if fasta.isascii() else len(fasta.encode("utf-8"))
+
+    size = max(len(fasta) - 1, 0)  # newlines between contigs
+    for header, seq in fasta:
+        size += len(header.encode("utf-8")) + 2 + len(seq)  # '>' and newline
+    return size
@@ -75,3 +75,10 @@ def format_json(data: Any) -> str:
     Format data as pretty JSON with 2-space indent.
     """
     return json.dumps(data, indent=2)
+
+
+def format_json_line(data: Any) -> str:
+    """
+    Format data as compact single-line JSON (for NDJSON output).
+    """
+    return json.dumps(data)
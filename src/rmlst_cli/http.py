@@ -1,8 +1,18 @@
-import base64
+import binascii
+import random
+import threading
 import time
-import requests
-from typing import Dict, Any
-from . import __version__
+from typing import TYPE_CHECKING, Dict, Any, Iterator, Optional, Tuple
+from . import __version__, fasta
+from .fasta import FastaInput
+
+# requests (and urllib3, certifi, ...) is imported on first use, so that the
+# CLI starts quickly for --help, --version and usage errors.
+if TYPE_CHECKING:
+    import requests
+
+    from .budget import HostBudget
+    from .metrics import Metrics
 
 DEFAULT_URI = (
     "https://rest.pubmlst.org/db/pubmlst_rmlst_seqdef_kiosk/schemes/1/sequence"
@@ -11,6 +21,15 @@ FALLBACK_URI = "https://rest.pubmlst.org/db/pubmlst_rmlst_seqdef/schemes/1/seque
 
 USER_AGENT = f"rmlst-cli/{__version__} (+https://github.com/ssi-dk/rmlst_cli; maintainer: pmat@ssi.dk)"
 
+DEFAULT_TIMEOUT = (30, 300)  # connect, read
+
+# FASTA bytes encoded per request body chunk
+BODY_CHUNK_SIZE = 1 << 16
+
+# Same bytes as json.dumps({"base64": True, "details": True, "sequence": ...})
+_BODY_PREFIX = b'{"base64": true, "details": true, "sequence": "'
+_BODY_SUFFIX = b'"}'
+
 
 class RmlstNetworkError(Exception):
     """Raised when network errors occur after retries."""
@@ -27,42 +46,545 @@ class RmlstHttpError(Exception):
         super().__init__(f"HTTP {status_code}: {message}")
 
 
+class _Cancelled(Exception):
+    """Raised by a request whose cancel event was set (a hedged loser)."""
+
+    pass
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how often requests are started (shared by all threads).
+
+    With adaptive=True the rate is AIMD-controlled: it is halved on every 429
+    (down to min_rate) and increased additively on each success, back up to the
+    configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        adaptive: bool = False,
+        min_rate: Optional[float] = None,
+    ):
+        """
+        rate: requests per second (<= 0 disables limiting).
+        burst: requests that may start back to back after an idle period.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.adaptive = adaptive
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be started.
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            # Reserve a token; a negative balance is the wait for this caller
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        if self.adaptive and self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_throttle(self):
+        if self.adaptive and self.rate > 0:
+            with self._lock:
+                self.rate = max(self.min_rate, self.rate / 2)
+
+
+class Backoff:
+    """
+    Delay before a retry.
+
+    strategy "fixed" waits the base retry_delay every time; "exponential" doubles
+    it per attempt. jitter spreads each delay uniformly over [delay/2, delay].
+    A Retry-After header (seconds or HTTP date) on 429/5xx replaces the computed
+    delay when respect_retry_after is set. Delays are capped at max_delay.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "fixed",
+        max_delay: float = 600,
+        jitter: bool = False,
+        respect_retry_after: bool = True,
+    ):
+        if strategy not in ("fixed", "exponential"):
+            raise ValueError(f"Unknown backoff strategy: {strategy}")
+        self.strategy = strategy
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+
+    def delay(
+        self, attempt: int, retry_delay: float, retry_after: Optional[str] = None
+    ) -> float:
+        """
+        Seconds to wait after failed attempt number `attempt` (1-based).
+        """
+        if self.respect_retry_after and retry_after:
+            server_delay = _parse_retry_after(retry_after)
+            if server_delay is not None:
+                return min(server_delay, self.max_delay)
+
+        delay = float(retry_delay)
+        if self.strategy == "exponential":
+            delay *= 2 ** (attempt - 1)
+        delay = min(delay, self.max_delay)
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Health of one endpoint, shared by all calls (and threads) of a batch.
+
+    After `threshold` consecutive failed attempts (network errors, 429 or 5xx)
+    the breaker opens and calls skip the endpoint. Once `cooldown` seconds have
+    passed, a single call is let through as a probe: success closes the breaker,
+    failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """
+        True if a call may use the endpoint (closed, or this call is the probe).
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._probing = True
+            return True
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def end_probe(self):
+        """
+        Called when a call that used the endpoint ends, however it ended: a probe
+        stopped before on_success or on_failure lets the next call probe again.
+        """
+        with self._lock:
+            self._probing = False
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    from email.utils import parsedate_to_datetime
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class SequencePayload:
+    """
+    JSON request body {"base64": true, "details": true, "sequence": "<base64 FASTA>"}
+    generated on the fly from contigs (or a FASTA string).
+
+    Iterating yields the body in chunks, so only about chunk_size bytes of FASTA
+    and base64 are alive at once, and len() is the exact Content-Length.
+    Every iteration starts over, so one payload can be sent on each retry.
+    metrics accumulates the time spent encoding (excluding the time the
+    consumer spends sending each chunk).
+    """
+
+    def __init__(
+        self,
+        fasta_input: FastaInput,
+        chunk_size: int = BODY_CHUNK_SIZE,
+        metrics: Optional["Metrics"] = None,
+    ):
+        self.fasta_input = fasta_input
+        self.chunk_size = chunk_size
+        self.metrics = metrics
+        self.fasta_size = fasta.fasta_byte_size(fasta_input)
+
+    def __len__(self) -> int:
+        encoded = 4 * ((self.fasta_size + 2) // 3)
+        return len(_BODY_PREFIX) + encoded + len(_BODY_SUFFIX)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.metrics is None:
+            return self._chunks()
+        return self._timed(self._chunks(), self.metrics)
+
+    @staticmethod
+    def _timed(chunks: Iterator[bytes], metrics: "Metrics") -> Iterator[bytes]:
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            metrics.add_time("encode", time.perf_counter() - start)
+            if chunk is None:
+                return
+            yield chunk
+
+    def _chunks(self) -> Iterator[bytes]:
+        yield _BODY_PREFIX
+        buf = bytearray()
+        for piece in fasta.iter_fasta_bytes(self.fasta_input, self.chunk_size):
+            buf += piece
+            if len(buf) >= self.chunk_size:
+                # Encode whole 3-byte groups; carry the remainder
+                cut = len(buf) - len(buf) % 3
+                yield binascii.b2a_base64(buf[:cut], newline=False)
+                del buf[:cut]
+        if buf:
+            yield binascii.b2a_base64(buf, newline=False)
+        yield _BODY_SUFFIX
+
+
+class RmlstClient:
+    """
+    Long-lived rMLST API client owning a keep-alive connection pool.
+
+    One client can be shared by many threads; connections to rest.pubmlst.org are
+    reused across calls instead of paying a new TCP/TLS handshake per genome.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        session: Optional["requests.Session"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        backoff: Optional[Backoff] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_after: Optional[float] = None,
+        host_budget: Optional["HostBudget"] = None,
+    ):
+        """
+        pool_maxsize: connections kept open per host; threads beyond this wait for a free one.
+        timeout: (connect, read) timeout in seconds per attempt.
+        session: use this session instead of creating one (its adapters are kept).
+        rate_limiter: limits how often attempts start (default: unlimited).
+        backoff: delay policy between retries (default: fixed retry_delay).
+        breaker: tracks the kiosk endpoint; while it is open, calls to DEFAULT_URI
+            go straight to the fallback (default: always try the kiosk first).
+        hedge_after: if the kiosk has not answered after this many seconds, also
+            send the request to the fallback and use whichever answers first.
+        host_budget: request rate and in-flight limit shared with other processes
+            (see budget.HostBudget), applied after rate_limiter; closed with the client.
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.backoff = backoff or Backoff()
+        self.breaker = breaker
+        self.hedge_after = hedge_after
+        self.host_budget = host_budget
+        self._owns_session = session is None
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=2,  # kiosk and fallback share one host
+                pool_maxsize=pool_maxsize,
+                pool_block=True,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+        if self.host_budget is not None:
+            self.host_budget.close()
+
+    def __enter__(self) -> "RmlstClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(
+        self,
+        fasta_input: FastaInput,
+        uri: str = DEFAULT_URI,
+        retries: int = 3,
+        retry_delay: int = 60,
+        debug: bool = False,
+        metrics: Optional["Metrics"] = None,
+    ) -> Dict[str, Any]:
+        """
+        Calls the rMLST API with the given contigs or FASTA string.
+        Handles retries and fallback to non-kiosk endpoint if using default URI.
+        metrics: records payload size, encode time, every attempt and fallback use.
+        """
+        # The body is streamed from the contigs on every attempt
+        payload = SequencePayload(fasta_input, metrics=metrics)
+        if metrics is not None:
+            metrics.set("payload_bytes", len(payload))
+        args = (payload, retries, retry_delay, debug, metrics)
+
+        if uri != DEFAULT_URI:
+            return _make_request(self, uri, *args)
+
+        if self.breaker is not None and not self.breaker.allow():
+            if debug:
+                print("DEBUG: Kiosk endpoint circuit open, using fallback")
+            if metrics is not None:
+                metrics.set("fallback", True)
+            return _make_request(self, FALLBACK_URI, *args)
+
+        if self.hedge_after is not None:
+            return self._call_hedged(*args)
+
+        try:
+            return _make_request(self, uri, *args, breaker=self.breaker)
+        except (RmlstNetworkError, RmlstHttpError):
+            if metrics is not None:
+                metrics.set("fallback", True)
+            # If fallback also fails, the error from the fallback attempt is raised
+            return _make_request(self, FALLBACK_URI, *args)
+
+    def _call_hedged(
+        self,
+        payload: "SequencePayload",
+        retries: int,
+        retry_delay: int,
+        debug: bool,
+        metrics: Optional["Metrics"],
+    ) -> Dict[str, Any]:
+        """
+        Kiosk request, plus a fallback request once the kiosk has failed or has
+        been silent for hedge_after seconds; the first success wins. The losing
+        request is cancelled: an attempt in flight is not interrupted, but it
+        starts no further attempt and takes no more rate limiter or budget tokens.
+        Each request sends its own copy of payload and records into its own
+        Metrics; only the winner's (or, if both fail, the fallback's) are merged
+        into metrics.
+        """
+        import queue
+
+        from .metrics import Metrics
+
+        outcomes: "queue.Queue[Tuple[str, bool, Any, Optional[Metrics]]]" = (
+            queue.Queue()
+        )
+        cancel = threading.Event()
+
+        def run(uri: str, breaker: Optional[CircuitBreaker]):
+            own = None if metrics is None else Metrics()
+            body = SequencePayload(payload.fasta_input, payload.chunk_size, own)
+            try:
+                result = _make_request(
+                    self, uri, body, retries, retry_delay, debug, own, breaker, cancel
+                )
+                outcomes.put((uri, True, result, own))
+            except Exception as e:
+                outcomes.put((uri, False, e, own))
+
+        def start(uri: str, breaker: Optional[CircuitBreaker] = None):
+            threading.Thread(
+                target=run, args=(uri, breaker), name="rmlst-hedge", daemon=True
+            ).start()
+
+        def keep(own: Optional[Metrics]):
+            if metrics is not None and own is not None:
+                metrics.merge(own)
+
+        start(DEFAULT_URI, self.breaker)
+        try:
+            try:
+                uri, ok, value, own = outcomes.get(timeout=self.hedge_after)
+                if ok:
+                    keep(own)
+                    return value
+                pending = 0
+            except queue.Empty:
+                pending = 1
+                if debug:
+                    print(
+                        f"DEBUG: No answer after {self.hedge_after}s, hedging to fallback"
+                    )
+            if metrics is not None:
+                metrics.set("fallback", True)
+            start(FALLBACK_URI)
+            pending += 1
+
+            # Both failing raises the fallback's error, as without hedging
+            errors: Dict[str, Tuple[Exception, Optional[Metrics]]] = {}
+            while pending:
+                uri, ok, value, own = outcomes.get()
+                pending -= 1
+                if ok:
+                    keep(own)
+                    return value
+                errors[uri] = (value, own)
+            error, own = errors[FALLBACK_URI]
+            keep(own)
+            raise error
+        finally:
+            # The losing request starts no further attempts
+            cancel.set()
+
+
+_default_client: Optional[RmlstClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> RmlstClient:
+    """
+    Returns the process-wide client used when no client is passed explicitly.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = RmlstClient()
+        return _default_client
+
+
 def _make_request(
-    session: requests.Session,
+    client: RmlstClient,
     uri: str,
-    payload: Dict[str, Any],
+    payload: SequencePayload,
     retries: int,
     retry_delay: int,
     debug: bool = False,
+    metrics: Optional["Metrics"] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    cancel: Optional[threading.Event] = None,
 ) -> Dict[str, Any]:
     """
     Helper to make request with retries.
+    metrics: records each attempt (endpoint, status, network time) and waits.
+    breaker: health of uri; fed with every attempt, and once it opens the
+    remaining retries are skipped.
+    cancel: once set, no further attempt is started (nor waited for); raises
+    _Cancelled instead.
     """
+    try:
+        return _request_with_retries(
+            client, uri, payload, retries, retry_delay, debug, metrics, breaker, cancel
+        )
+    finally:
+        if breaker is not None:
+            # A probe cut short without a verdict (an unexpected error, Ctrl-C)
+            # must not keep every later call from probing
+            breaker.end_probe()
+
+
+def _request_with_retries(
+    client: RmlstClient,
+    uri: str,
+    payload: SequencePayload,
+    retries: int,
+    retry_delay: int,
+    debug: bool,
+    metrics: Optional["Metrics"],
+    breaker: Optional[CircuitBreaker],
+    cancel: Optional[threading.Event],
+) -> Dict[str, Any]:
+    import requests
+
+    limiter = client.rate_limiter
+    budget = client.host_budget
     attempt = 0
     while True:
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled(uri)
         attempt += 1
+        retry_after = None
+        status: Any = None
         try:
+            start = time.perf_counter()
+            if limiter is not None:
+                limiter.acquire()
+            if budget is not None:
+                budget.acquire()
+            if metrics is not None and (limiter is not None or budget is not None):
+                metrics.add_time("wait", time.perf_counter() - start)
+
+            if metrics is not None:
+                # Network time excludes encoding the streamed body
+                sent_at = time.perf_counter()
+                encode_before = metrics.timings.get("encode", 0.0)
+
             if debug:
-                print(f"DEBUG: Attempt {attempt}, URI: {uri}, Timeout: (30, 300)")
+                print(
+                    f"DEBUG: Attempt {attempt}, URI: {uri}, Timeout: {client.timeout}"
+                )
                 start_time = time.time()
 
-            response = session.post(
-                uri,
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json",
-                    "User-Agent": USER_AGENT,
-                },
-                timeout=(30, 300),  # connect, read
-            )
+            try:
+                response = client.session.post(
+                    uri,
+                    data=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "Accept": "application/json",
+                        "User-Agent": USER_AGENT,
+                    },
+                    timeout=client.timeout,
+                )
+            finally:
+                if budget is not None:
+                    budget.release()
 
+            status = response.status_code
             if debug:
                 print(
                     f"DEBUG: Response {response.status_code} in {time.time() - start_time:.2f}s"
                 )
 
             if response.status_code == 200:
+                if limiter is not None:
+                    limiter.on_success()
+                if budget is not None:
+                    budget.on_success()
+                if breaker is not None:
+                    breaker.on_success()
                 try:
                     return response.json()
                 except ValueError:
@@ -70,55 +592,72 @@ def _make_request(
 
             # Check for retryable codes
             if response.status_code == 429 or 500 <= response.status_code < 600:
-                if attempt <= retries:
-                    time.sleep(retry_delay)
-                    continue
-                else:
+                if response.status_code == 429:
+                    if limiter is not None:
+                        limiter.on_throttle()
+                    if budget is not None:
+                        budget.on_throttle()
+                if breaker is not None:
+                    breaker.on_failure()
+                if attempt > retries or (breaker is not None and breaker.is_open):
                     # Exhausted retries on HTTP error
                     raise RmlstHttpError(
                         response.status_code, response.text[:1000]
                     )  # Truncate body
-
-            # Non-retryable 4xx
-            raise RmlstHttpError(response.status_code, response.text[:1000])
+                retry_after = response.headers.get("Retry-After")
+            else:
+                # Non-retryable 4xx: a problem with this request, not the endpoint
+                if breaker is not None:
+                    breaker.on_success()
+                raise RmlstHttpError(response.status_code, response.text[:1000])
 
         except requests.RequestException as e:
             # Network errors (DNS, timeout, connection reset, TLS error)
-            if attempt <= retries:
-                time.sleep(retry_delay)
-                continue
-            else:
+            status = type(e).__name__
+            if breaker is not None:
+                breaker.on_failure()
+            if attempt > retries or (breaker is not None and breaker.is_open):
                 raise RmlstNetworkError(f"Network error: {e}")
 
+        finally:
+            if metrics is not None and status is not None:
+                encoding = metrics.timings.get("encode", 0.0) - encode_before
+                seconds = time.perf_counter() - sent_at - encoding
+                metrics.add_attempt(uri, seconds, status)
+                metrics.add_time("network", seconds)
+
+        delay = client.backoff.delay(attempt, retry_delay, retry_after)
+        if debug:
+            print(f"DEBUG: Retrying in {delay:.1f}s")
+        if metrics is not None:
+            metrics.add_time("wait", delay)
+        if cancel is None:
+            time.sleep(delay)
+        elif cancel.wait(delay):
+            raise _Cancelled(uri)
+
 
 def call_rmlst_api(
-    fasta_str: str,
+    fasta_input: FastaInput,
     uri: str = DEFAULT_URI,
     retries: int = 3,
     retry_delay: int = 60,
     debug: bool = False,
+    client: Optional[RmlstClient] = None,
+    metrics: Optional["Metrics"] = None,
 ) -> Dict[str, Any]:
     """
-    Calls the rMLST API with the given FASTA string.
-    Handles retries and fallback to non-kiosk endpoint if using default URI.
+    Calls the rMLST API with the given contigs (as returned by
+    fasta.read_and_process_fasta) or FASTA string.
+    Uses the shared default client (and its connection pool) unless client is given.
     """
-    # Prepare payload
-    b64_seq = base64.b64encode(fasta_str.encode("utf-8")).decode("ascii")
-    payload = {"base64": True, "details": True, "sequence": b64_seq}
-
-    session = requests.Session()
-
-    try:
-        return _make_request(session, uri, payload, retries, retry_delay, debug)
-    except (RmlstNetworkError, RmlstHttpError):
-        # Check if we should fallback
-        if uri == DEFAULT_URI:
-            try:
-                return _make_request(
-                    session, FALLBACK_URI, payload, retries, retry_delay, debug
-                )
-            except (RmlstNetworkError, RmlstHttpError):
-                # If fallback also fails, raise the error from the fallback attempt
-                raise
-        else:
-            raise
+    if client is None:
+        client = get_default_client()
+    return client.call(
+        fasta_input,
+        uri=uri,
+        retries=retries,
+        retry_delay=retry_delay,
+        debug=debug,
+        metrics=metrics,
+    )
@@ -1,29 +1,174 @@
+import fnmatch
+import json
 import os
+import sys
 import tempfile
-from typing import List
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+FASTA_EXTENSIONS = (".fa", ".fasta", ".fna")
+
+# Compressed FASTA is read transparently (see fasta.open_fasta)
+COMPRESSION_EXTENSIONS = (".gz", ".bz2", ".xz", ".zst")
+
+
+def strip_compression_extension(name: str) -> str:
+    """
+    Returns name without a trailing compression extension (case-insensitive).
+    """
+    root, ext = os.path.splitext(name)
+    if ext.lower() in COMPRESSION_EXTENSIONS:
+        return root
+    return name
+
+
+def is_fasta_name(name: str) -> bool:
+    """
+    True for .fa/.fasta/.fna names, optionally compressed (e.g. sample.fa.gz).
+    """
+    return strip_compression_extension(name).lower().endswith(FASTA_EXTENSIONS)
+
+
+class InputFile(NamedTuple):
+    """
+    One input of a batch run.
+    name identifies it in outputs (summary rows, journal, derived file names):
+    the basename for a flat directory, the relative path for a recursive scan,
+    or the sample ID from a manifest.
+    """
+
+    name: str
+    path: str
+
+
+# Order in which the files of a batch are started (see schedule)
+SCHEDULES = ("input", "largest-first", "smallest-first")
+
+# How files are assigned to shards (see shard.select_shard)
+SHARD_STRATEGIES = ("hash", "position", "size")
+
+
+class ManifestError(ValueError):
+    """Raised when a manifest line cannot be used."""
+
+    pass
 
 
 def scan_directory(dir_path: str) -> List[str]:
     """
-    Scans directory for .fa/.fasta files (case-insensitive).
+    Scans directory for .fa/.fasta/.fna files (case-insensitive), optionally
+    compressed with gzip, bzip2, xz or zstd.
     Returns sorted list of absolute paths.
     """
+    return [item.path for item in iter_directory(dir_path)]
+
+
+def iter_directory(
+    dir_path: str, recursive: bool = False, pattern: Optional[str] = None
+) -> Iterator[InputFile]:
+    """
+    Lazily yields the FASTA files of a directory, sorted by name within each directory.
+    recursive: descend into subdirectories (depth-first; symlinked directories are
+    not followed). Names are then paths relative to dir_path, with '/' separators.
+    pattern: glob that selects files instead of the FASTA extensions. It is matched
+    against the relative name if it contains '/', else against the file name.
+    Hidden files and directories are skipped.
+    """
     if not os.path.isdir(dir_path):
-        return []
+        return
+    yield from _walk(os.path.abspath(dir_path), "", recursive, pattern)
 
-    files = []
-    for entry in os.scandir(dir_path):
+
+def _walk(
+    directory: str, prefix: str, recursive: bool, pattern: Optional[str]
+) -> Iterator[InputFile]:
+    # Only one directory listing is held at a time, so the first files are
+    # yielded long before a large tree has been enumerated.
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return
+
+    for entry in entries:
         if entry.name.startswith("."):
             continue
 
-        if entry.is_file() or entry.is_symlink():
-            lower_name = entry.name.lower()
-            if lower_name.endswith(".fa") or lower_name.endswith(".fasta"):
-                files.append(os.path.abspath(entry.path))
+        name = prefix + entry.name
+        if recursive and entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, name + "/", recursive, pattern)
+        elif entry.is_file() or entry.is_symlink():
+            if pattern is None:
+                matched = is_fasta_name(entry.name)
+            else:
+                matched = fnmatch.fnmatch(
+                    name if "/" in pattern else entry.name, pattern
+                )
+            if matched:
+                yield InputFile(name, entry.path)
+
 
-    # Sort by basename
-    files.sort(key=lambda p: os.path.basename(p))
-    return files
+def file_size(path: str) -> int:
+    """
+    Size of a file in bytes; 0 if it cannot be stat'ed (it then fails when read).
+    """
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def schedule(items: Sequence[InputFile], policy: str = "input") -> List[int]:
+    """
+    Indices of items in the order to start them.
+    "largest-first" starts the biggest (slowest to upload) files first, so a
+    concurrent run does not end waiting on one large file started last;
+    "smallest-first" yields early results quickly. Equal sizes keep input order.
+    """
+    if policy not in SCHEDULES:
+        raise ValueError(f"unknown schedule '{policy}'")
+    order = list(range(len(items)))
+    if policy == "input":
+        return order
+    sizes = [file_size(item.path) for item in items]
+    sign = -1 if policy == "largest-first" else 1
+    return sorted(order, key=lambda i: sign * sizes[i])
+
+
+def iter_manifest(path: str) -> Iterator[InputFile]:
+    """
+    Lazily reads a manifest ("-" for stdin): one FASTA path per line, optionally
+    followed by a tab and a sample ID. Blank lines and '#' comments are skipped.
+    Relative paths are relative to the current directory. Names are the sample ID,
+    or the file's basename, and must be unique.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        seen = set()
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+
+            file_path, _, sample_id = line.partition("\t")
+            file_path, sample_id = file_path.strip(), sample_id.strip()
+            if not file_path:
+                raise ManifestError(f"line {line_no}: missing path")
+
+            # A sample ID names an output file, so it must not contain a directory
+            name = sample_id.replace("/", "_").replace("\\", "_")
+            if not name:
+                name = os.path.basename(file_path)
+            if name in seen:
+                raise ManifestError(
+                    f"line {line_no}: duplicate name '{name}'; add a sample ID column"
+                )
+            seen.add(name)
+
+            yield InputFile(name, os.path.abspath(file_path))
+    finally:
+        if f is not sys.stdin:
+            f.close()
 
 
 def atomic_write(path: str, content: str):
@@ -48,12 +193,127 @@ def atomic_write(path: str, content: str):
         raise
 
 
+def output_path_for(name: str, output_dir: str, suffix: str) -> str:
+    """
+    Output file for an input name inside output_dir, keeping its relative directories
+    (run1/a.fa.gz -> output_dir/run1/a + suffix). FASTA and compression extensions are
+    dropped; other names, such as sample IDs, are used whole.
+    """
+    directory, base = os.path.split(name)
+    if is_fasta_name(base):
+        base = os.path.splitext(strip_compression_extension(base))[0]
+    return os.path.join(output_dir, directory, f"{base}{suffix}")
+
+
 def derive_output_path(
     input_path: str, output_dir: str, suffix: str = "_rmlst.json"
 ) -> str:
     """
     Derives output filename: output_dir / basename_no_ext(input_path) + suffix.
+    A compression extension is dropped too (sample.fa.gz -> sample + suffix).
     """
-    base = os.path.splitext(os.path.basename(input_path))[0]
+    name = strip_compression_extension(os.path.basename(input_path))
+    base = os.path.splitext(name)[0]
     filename = f"{base}{suffix}"
     return os.path.join(output_dir, filename)
+
+
+SUMMARY_NAME = "rmlst_summary.tsv"
+
+JOURNAL_NAME = "rmlst_journal.jsonl"
+
+
+class Journal:
+    """
+    Append-only JSON-lines log of per-file outcomes of a directory run.
+
+    Every entry is flushed to the OS as soon as it is recorded, so it survives the
+    process being killed; fsync is batched (every sync_every entries or sync_interval
+    seconds, and on close) so a crash of the whole machine loses at most one batch.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        resume: bool = False,
+        sync_every: int = 64,
+        sync_interval: float = 5.0,
+    ):
+        """
+        resume: keep and load the existing journal instead of starting a new one.
+        """
+        self.path = path
+        self.entries = self.load(path) if resume else {}
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._f = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._f.tell() > 0 and not self._ends_with_newline(path):
+            # Previous run died mid-line; start ours on a fresh one
+            self._f.write("\n")
+
+    @staticmethod
+    def load(path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Reads a journal and returns the last entry recorded for each file.
+        A missing journal is empty; truncated or corrupt lines are ignored.
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and "file" in entry:
+                        entries[entry["file"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record(self, file: str, status: str, **fields: Any):
+        """
+        Appends an entry for file ("ok", "failed" or "skipped") with extra fields.
+        """
+        entry = {"file": file, "status": status, **fields}
+        self.entries[file] = entry
+        self._f.write(json.dumps(entry) + "\n")
+        self._f.flush()
+        self._unsynced += 1
+        if (
+            self._unsynced >= self.sync_every
+            or time.monotonic() - self._last_sync >= self.sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        """
+        Forces recorded entries to disk.
+        """
+        if self._unsynced:
+            os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._f.closed:
+            return
+        try:
+            self.sync()
+        finally:
+            self._f.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,187 @@
+"""
+Work queue shared by several `rmlst -d ... --cooperative` processes writing to one
+output directory, possibly on different hosts of a shared filesystem.
+
+Every input name is claimed through a lease file created with O_EXCL in
+<outdir>/.rmlst_leases/. The owner renews its leases (mtime) from a heartbeat
+thread; a lease not renewed for ttl seconds belongs to a dead worker and may be
+taken over. A finished file gets a done marker holding its journal entry, written
+with io.atomic_write before the lease is dropped.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional, Set
+
+from . import io
+
+LEASE_DIR = ".rmlst_leases"
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseQueue:
+    """
+    Claims, renews and completes input names for one worker.
+    Used in place of io.Journal by cooperative runs: record() stores the outcome
+    as the file's done marker and releases its lease.
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        worker_id: Optional[str] = None,
+        ttl: float = 120.0,
+    ):
+        """
+        ttl: seconds after the last renewal at which a lease counts as abandoned.
+        """
+        self.directory = os.path.join(out_dir, LEASE_DIR)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._held: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._clock = os.path.join(self.directory, f"{self.worker_id}.alive")
+        self._heartbeat = threading.Thread(
+            target=self._renew_loop, name="rmlst-lease-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+
+    def _path(self, name: str, suffix: str) -> str:
+        # Names may contain '/' (recursive scans), so files are named by hash
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, digest + suffix)
+
+    def _now(self) -> float:
+        """
+        Current time as the shared filesystem sees it: the mtime of a file we just
+        touched, so lease ages are not skewed by differing host clocks.
+        """
+        with open(self._clock, "a"):
+            pass
+        os.utime(self._clock)
+        return os.stat(self._clock).st_mtime
+
+    def finished(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        The done marker entry of name, if any worker finished it. A failed outcome
+        does not count, so the next worker to come across name tries it again
+        (as --resume does with the journal).
+        """
+        try:
+            with open(self._path(name, ".done"), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("status") == "failed":
+            return None
+        return entry
+
+    def holder(self, name: str) -> Optional[str]:
+        try:
+            with open(self._path(name, ".lease"), "r", encoding="utf-8") as f:
+                return json.load(f).get("worker")
+        except (OSError, ValueError):
+            return None
+
+    def claim(self, name: str) -> bool:
+        """
+        Takes the lease of name. False if another worker holds a live lease.
+        """
+        path = self._path(name, ".lease")
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._expired(path):
+                    return False
+                self._break(path)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"file": name, "worker": self.worker_id}, f)
+            with self._lock:
+                self._held.add(name)
+            return True
+        return False
+
+    def _expired(self, path: str) -> bool:
+        try:
+            return self._now() - os.stat(path).st_mtime > self.ttl
+        except FileNotFoundError:
+            return True
+
+    def _break(self, path: str):
+        # Renaming is atomic, so of several workers finding the same stale lease
+        # only one removes it; the others retry O_EXCL and lose to whoever wins.
+        stale = f"{path}.{self.worker_id}.stale"
+        try:
+            os.rename(path, stale)
+            os.remove(stale)
+        except OSError:
+            pass
+
+    def release(self, name: str):
+        """
+        Drops the lease of name if this worker (still) holds it.
+        """
+        with self._lock:
+            self._held.discard(name)
+        path = self._path(name, ".lease")
+        if self.holder(name) == self.worker_id:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def record(self, file: str, status: str, **fields: Any):
+        """
+        Stores the outcome of file ("ok", "failed" or "skipped") as its done
+        marker, then releases its lease.
+        """
+        entry = {"file": file, "status": status, "worker": self.worker_id, **fields}
+        io.atomic_write(self._path(file, ".done"), json.dumps(entry))
+        self.release(file)
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.ttl / 4):
+            with self._lock:
+                held = list(self._held)
+            for name in held:
+                try:
+                    os.utime(self._path(name, ".lease"))
+                except FileNotFoundError:
+                    # Taken over after we missed renewals; the file may be done twice
+                    with self._lock:
+                        self._held.discard(name)
+                except OSError:
+                    pass
+
+    def close(self):
+        """
+        Stops renewing and releases unfinished leases (e.g. after Ctrl-C), so
+        other workers can take them over at once.
+        """
+        self._stop.set()
+        self._heartbeat.join()
+        with self._lock:
+            held = list(self._held)
+        for name in held:
+            self.release(name)
+        try:
+            os.remove(self._clock)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "LeaseQueue":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,111 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+# Per-file timings are disjoint, so they add up to roughly the file's total time
+# (wait = rate limiter and retry delays)
+STAGES = ("parse", "normalize", "encode", "network", "wait", "write")
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Metrics:
+    """
+    Timings and counters of one identification, filled in by api.identify,
+    fasta.iter_contigs, http.SequencePayload and http._make_request when passed
+    as metrics=. Use one instance per file; it is not shared between threads.
+    """
+
+    __slots__ = ("timings", "values", "attempts")
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.values: Dict[str, Any] = {}
+        self.attempts: List[Dict[str, Any]] = []
+
+    def add_time(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def set(self, key: str, value: Any):
+        self.values[key] = value
+
+    def merge(self, other: "Metrics"):
+        """
+        Adds the timings, values and attempts of other (e.g. from a parse worker).
+        """
+        for stage, seconds in other.timings.items():
+            self.add_time(stage, seconds)
+        self.values.update(other.values)
+        self.attempts.extend(other.attempts)
+
+    def add_attempt(self, uri: str, seconds: float, status: Any):
+        """
+        Records one HTTP attempt; status is the HTTP status code or an error name.
+        """
+        self.attempts.append({"uri": uri, "seconds": seconds, "status": status})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timings": dict(self.timings),
+            **self.values,
+            "attempts": list(self.attempts),
+            "retries": max(0, len(self.attempts) - 1),
+        }
+
+
+def percentiles(values: Iterable[float]) -> Dict[str, float]:
+    """
+    Count, total, mean, max and nearest-rank percentiles of values.
+    """
+    data = sorted(values)
+    if not data:
+        return {"count": 0}
+    summary = {
+        "count": len(data),
+        "total": sum(data),
+        "mean": sum(data) / len(data),
+        "max": data[-1],
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}"] = data[max(0, math.ceil(p / 100 * len(data)) - 1)]
+    return summary
+
+
+def build_report(
+    files: List[Dict[str, Any]], wall_seconds: float, jobs: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run report from per-file records (Metrics.to_dict plus "file" and "status").
+    """
+    attempts = [a for f in files for a in f.get("attempts", [])]
+    endpoints: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    for a in attempts:
+        endpoints.setdefault(a["uri"], []).append(a["seconds"])
+        statuses[str(a["status"])] = statuses.get(str(a["status"]), 0) + 1
+
+    outcomes: Dict[str, int] = {}
+    for f in files:
+        outcomes[f["status"]] = outcomes.get(f["status"], 0) + 1
+
+    return {
+        "wall_seconds": wall_seconds,
+        "jobs": jobs,
+        "files": len(files),
+        "outcomes": outcomes,
+        "cache_hits": sum(1 for f in files if f.get("cache_hit")),
+        "fallbacks": sum(1 for f in files if f.get("fallback")),
+        "shared": sum(1 for f in files if f.get("shared_with")),
+        "retries": sum(f.get("retries", 0) for f in files),
+        "attempt_statuses": statuses,
+        "stages": {
+            stage: percentiles(
+                f["timings"][stage] for f in files if stage in f.get("timings", {})
+            )
+            for stage in STAGES
+        },
+        "payload_bytes": percentiles(
+            f["payload_bytes"] for f in files if "payload_bytes" in f
+        ),
+        "endpoints": {uri: percentiles(times) for uri, times in endpoints.items()},
+        "per_file": files,
+    }
@@ -0,0 +1,282 @@
+import signal
+import threading
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    import queue
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ThreadPool:
+    """
+    Minimal thread pool executor (submit/shutdown) whose threads are daemons.
+    ThreadPoolExecutor threads are joined at interpreter exit, so Ctrl-C would
+    wait for requests in flight and their retry delays; these are abandoned, and
+    the process exits at once, as a serial run does.
+    """
+
+    def __init__(self, max_workers: int, name: str = "rmlst-worker"):
+        import queue
+
+        self.max_workers = max_workers
+        self.name = name
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable[..., R], *args: Any, **kwargs: Any) -> "Future[R]":
+        from concurrent.futures import Future
+
+        future: "Future[R]" = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.put((future, fn, args, kwargs))
+            # One thread per submission until max_workers; they then stay for the run
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"{self.name}-{len(self._threads)}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            future, fn, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            del task, future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        import queue
+
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        task = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if task is not None:
+                        task[0].cancel()
+            for _ in self._threads:
+                self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "ThreadPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def imap_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+) -> Iterator[R]:
+    """
+    Apply func to each item with up to max_workers calls in flight.
+    Results are yielded in input order; exceptions propagate when their result is reached.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    # Allow a few completed results to queue up behind a slow head-of-line call,
+    # but keep the window bounded so memory does not grow with the input size.
+    window = max_workers * 2
+    pending: Deque["Future[R]"] = deque()
+    executor = ThreadPool(max_workers)
+    try:
+        for item in items:
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item))
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # On error or early close, drop queued work instead of waiting for it.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def imap_unordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Apply func to each item with up to max_workers calls in flight.
+    Yields (item, result) pairs as soon as each call completes; exceptions propagate
+    when their call completes.
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield item, func(item)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    # Nothing waits on a slow call here, so only max_workers calls are ever queued.
+    pending: Dict["Future[R]", T] = {}
+    executor = ThreadPool(max_workers)
+    try:
+        for item in items:
+            while len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            pending[executor.submit(func, item)] = item
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Reorder(Generic[R]):
+    """
+    Puts values that arrive in any order, each with its position, back in
+    position order 0, 1, 2, ..., holding back those that arrive early.
+    """
+
+    def __init__(self) -> None:
+        self._waiting: Dict[int, R] = {}
+        self.next = 0
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    def add(self, position: int, value: R) -> List[R]:
+        """Returns the values that are now in turn (possibly none)."""
+        self._waiting[position] = value
+        released = []
+        while self.next in self._waiting:
+            released.append(self._waiting.pop(self.next))
+            self.next += 1
+        return released
+
+
+def imap_scheduled(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    order: Sequence[int],
+    max_workers: int = 1,
+    window: int = 0,
+) -> Iterator[R]:
+    """
+    Apply func to items[i] for the indices i of order, in that order, with up to
+    max_workers calls in flight. Results are yielded in items order; exceptions
+    propagate when their result is reached.
+    At most window results (default: 4 * max_workers) are held back behind an
+    unfinished earlier item: beyond that, the earliest item is started next if it
+    has not been, and otherwise nothing new until it finishes.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    window = window or 4 * max_workers
+    started = [False] * len(items)
+    queued = deque(order)
+    pending: Dict["Future[R]", int] = {}
+    reorder: Reorder["Future[R]"] = Reorder()
+
+    def next_index() -> Optional[int]:
+        if len(reorder) >= window:
+            return None if started[reorder.next] else reorder.next
+        while queued and started[queued[0]]:
+            queued.popleft()
+        return queued.popleft() if queued else None
+
+    executor = ThreadPool(max_workers)
+    try:
+        remaining = len(items)
+        while remaining or pending:
+            while remaining and len(pending) < max_workers:
+                i = next_index()
+                if i is None:
+                    break
+                started[i] = True
+                remaining -= 1
+                pending[executor.submit(func, items[i])] = i
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for ready in reorder.add(pending.pop(future), future):
+                    yield ready.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def lookahead(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    depth: int,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Yields (item, func(item)), calling func up to depth items before the consumer
+    asks for them. With func submitting work to an executor, this keeps a bounded
+    number of items being prepared ahead of a later stage.
+    """
+    pending: Deque[Tuple[T, R]] = deque()
+    for item in items:
+        pending.append((item, func(item)))
+        if len(pending) > depth:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def _ignore_sigint():
+    # Ctrl-C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def process_pool(max_workers: int) -> "ProcessPoolExecutor":
+    """
+    Pool of worker processes for CPU-bound work (e.g. api.prepare).
+    Workers are spawned rather than forked, since the parent runs network threads.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_ignore_sigint,
+    )
@@ -0,0 +1,181 @@
+"""
+Client side of `rmlst serve`: forwards identify jobs to a running server over a
+Unix socket or local HTTP port. Kept to the standard library so that a forwarded
+`rmlst -f` does not import requests.
+"""
+
+import http.client
+import json
+import os
+import socket
+import tempfile
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from .fasta import InvalidFastaError, TooManyContigsError
+from .http import DEFAULT_URI, RmlstHttpError, RmlstNetworkError
+
+IDENTIFY_PATH = "/identify"
+HEALTH_PATH = "/health"
+
+# Seconds to wait for a server to answer the health check
+PROBE_TIMEOUT = 2.0
+
+
+class RemoteError(Exception):
+    """Raised when the server cannot be reached or answers something unexpected."""
+
+    pass
+
+
+def default_socket_path() -> Optional[str]:
+    """
+    Socket `rmlst serve` listens on, and the CLI looks for, by default:
+    rmlst-<uid>.sock in $XDG_RUNTIME_DIR or the temp directory.
+    None where Unix sockets are not available.
+    """
+    if not hasattr(socket, "AF_UNIX") or not hasattr(os, "getuid"):
+        return None
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"rmlst-{os.getuid()}.sock")
+
+
+def encode_error(e: Exception) -> Dict[str, Any]:
+    error: Dict[str, Any] = {"type": type(e).__name__, "message": str(e)}
+    if isinstance(e, RmlstHttpError):
+        error.update(status_code=e.status_code, message=e.message)
+    return error
+
+
+def decode_error(error: Dict[str, Any]) -> Exception:
+    """
+    Rebuilds the exception raised on the server, so the CLI maps it to the same
+    message and exit code as a local run.
+    """
+    kind = error.get("type")
+    message = error.get("message", "")
+    if kind == "RmlstHttpError":
+        return RmlstHttpError(error.get("status_code", 0), message)
+    for cls in (InvalidFastaError, TooManyContigsError, RmlstNetworkError):
+        if kind == cls.__name__:
+            return cls(message)
+    if kind in ("OSError", "FileNotFoundError", "PermissionError"):
+        return OSError(message)
+    return RemoteError(f"{kind}: {message}")
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class RemoteClient:
+    """
+    Sends identify jobs to `rmlst serve` at address: a Unix socket path or
+    http://host:port (which needs the server's token). The server reads the FASTA
+    file itself, so paths must be valid on its host.
+    """
+
+    def __init__(self, address: str, token: Optional[str] = None):
+        self.address = address
+        self.token = token
+
+    def _connection(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        if self.address.startswith("http://"):
+            url = urlsplit(self.address)
+            return http.client.HTTPConnection(
+                url.hostname or "127.0.0.1", url.port or 80, timeout=timeout
+            )
+        return _UnixConnection(self.address, timeout=timeout)
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        conn = self._connection(timeout)
+        try:
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if data else {}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise RemoteError(f"rmlst serve at {self.address}: {e}") from e
+        finally:
+            conn.close()
+        if response.status != 200 and "error" not in payload:
+            raise RemoteError(f"rmlst serve answered HTTP {response.status}")
+        return payload
+
+    def is_running(self) -> bool:
+        """
+        Whether a server answers at address; RemoteError if it refuses the token.
+        """
+        try:
+            answer = self._request("GET", HEALTH_PATH, timeout=PROBE_TIMEOUT)
+        except RemoteError:
+            return False
+        if answer.get("error", {}).get("type") == "Unauthorized":
+            raise RemoteError(f"rmlst serve at {self.address}: wrong or missing token")
+        return True
+
+    def identify(
+        self,
+        fasta_path: str,
+        *,
+        uri: str = DEFAULT_URI,
+        trim_to_5000: bool = False,
+        graceful: bool = False,
+        retries: int = 3,
+        retry_delay: int = 60,
+        debug: bool = False,
+    ) -> Dict:
+        """
+        Same as api.identify, run by the server with its connection pool,
+        rate limiter and cache. debug output is printed by the server.
+        """
+        job = {
+            "path": os.path.abspath(fasta_path),
+            "uri": uri,
+            "trim_to_5000": trim_to_5000,
+            "graceful": graceful,
+            "retries": retries,
+            "retry_delay": retry_delay,
+        }
+        # No timeout: with retries an identification can take many minutes
+        answer = self._request("POST", IDENTIFY_PATH, job)
+        if "error" in answer:
+            raise decode_error(answer["error"])
+        return answer["result"]
+
+
+def connect(
+    address: Optional[str] = None, token: Optional[str] = None
+) -> Optional[RemoteClient]:
+    """
+    Returns a client for the server at address (default: default_socket_path())
+    if one is running there, else None. token is sent to a server on a TCP port.
+    """
+    address = address or default_socket_path()
+    if not address:
+        return None
+    if not address.startswith("http://") and not os.path.exists(address):
+        return None
+    client = RemoteClient(address, token)
+    return client if client.is_running() else None
@@ -0,0 +1,245 @@
+"""
+`rmlst serve`: a long-running local service that runs identify jobs for thin
+clients (see remote.py), sharing one connection pool, rate limiter, circuit
+breaker and result cache between all of them.
+
+Protocol (JSON over HTTP/1.0, on a Unix socket or a TCP port):
+    GET  /health    -> {"version": ..., "in_flight": n, "jobs": n}
+    POST /identify  {"path", "uri", "trim_to_5000", "graceful", "retries", "retry_delay"}
+                    -> {"result": {...}} or {"error": {"type", "message"[, "status_code"]}}
+
+A Unix socket is only accessible to its owner. On a TCP port any local user (or,
+bound beyond loopback, any host) can connect, so every request must carry
+"Authorization: Bearer <token>"; others are answered 401.
+"""
+
+import hmac
+import json
+import os
+import socketserver
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Union, cast
+
+from . import __version__, api
+from .cache import ResultCache
+from .http import DEFAULT_URI, RmlstClient
+from .remote import HEALTH_PATH, IDENTIFY_PATH, RemoteClient, encode_error
+
+
+class ServerError(Exception):
+    """Raised when the server cannot listen on the requested address."""
+
+    pass
+
+
+class IdentifyService:
+    """
+    Runs identify jobs with shared state; at most max_jobs at once, later jobs wait.
+    """
+
+    def __init__(
+        self,
+        client: RmlstClient,
+        cache: Optional[ResultCache] = None,
+        max_jobs: int = 4,
+        debug: bool = False,
+    ):
+        self.client = client
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.debug = debug
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.jobs = 0
+
+    def health(self) -> Dict[str, Any]:
+        return {"version": __version__, "in_flight": self.in_flight, "jobs": self.jobs}
+
+    def identify(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.in_flight += 1
+            self.jobs += 1
+        try:
+            with self._slots:
+                result = api.identify(
+                    job["path"],
+                    uri=job.get("uri") or DEFAULT_URI,
+                    trim_to_5000=bool(job.get("trim_to_5000")),
+                    graceful=bool(job.get("graceful")),
+                    retries=int(job.get("retries", 3)),
+                    retry_delay=int(job.get("retry_delay", 60)),
+                    debug=self.debug,
+                    cache=self.cache,
+                    client=self.client,
+                )
+            return {"result": result}
+        except Exception as e:
+            return {"error": encode_error(e)}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _ServerState:
+    # Set by RmlstServer on the socketserver instance, read by _Handler
+    service: IdentifyService
+    token: Optional[str] = None
+
+
+class _TCPHTTPServer(_ServerState, ThreadingHTTPServer):
+    pass
+
+
+if sys.platform != "win32":
+
+    class _UnixHTTPServer(_ServerState, socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = f"rmlst-serve/{__version__}"
+
+    @property
+    def state(self) -> _ServerState:
+        return cast(_ServerState, self.server)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port)
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "local"
+
+    def log_message(self, format: str, *args: Any):
+        if self.state.service.debug:
+            super().log_message(format, *args)
+
+    def _authorized(self) -> bool:
+        token = self.state.token
+        if token is None:
+            return True
+        given = self.headers.get("Authorization", "")
+        if hmac.compare_digest(
+            given.encode("utf-8"), f"Bearer {token}".encode("utf-8")
+        ):
+            return True
+        message = "missing or wrong token (see --server-token)"
+        self._send_json(401, {"error": {"type": "Unauthorized", "message": message}})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != HEALTH_PATH:
+            self._send_json(404, {"error": {"type": "NotFound", "message": self.path}})
+            return
+        self._send_json(200, self.state.service.health())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != IDENTIFY_PATH:
+            self._send_json(404, {"error": {"type": "NotFound", "message": self.path}})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length))
+            if not isinstance(job.get("path"), str) or not os.path.isabs(job["path"]):
+                raise ValueError("'path' must be an absolute path")
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": {"type": "ValueError", "message": str(e)}})
+            return
+        self._send_json(200, self.state.service.identify(job))
+
+    def _send_json(self, status: int, data: Any):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class RmlstServer:
+    """
+    Serves an IdentifyService on a Unix socket (socket_path) or on host:port,
+    where clients must send token (required; see the module docstring).
+    serve_forever() blocks; start() runs it in a background thread.
+    """
+
+    def __init__(
+        self,
+        service: IdentifyService,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        token: Optional[str] = None,
+    ):
+        self.service = service
+        self.socket_path = None
+        self._url = ""
+        self._httpd: Union[_TCPHTTPServer, "_UnixHTTPServer"]
+        if port is not None:
+            if not token:
+                raise ServerError("listening on a TCP port needs a token.")
+            self._httpd = _TCPHTTPServer((host, port), _Handler)
+            self._httpd.token = token
+            bound_host, bound_port = self._httpd.socket.getsockname()[:2]
+            self._url = f"http://{bound_host}:{bound_port}"
+        elif not socket_path or sys.platform == "win32":
+            raise ServerError("Unix sockets are not available; use a port.")
+        else:
+            self._claim_socket(socket_path)
+            # Only this user may submit jobs
+            umask = os.umask(0o177)
+            try:
+                self._httpd = _UnixHTTPServer(socket_path, _Handler)
+            finally:
+                os.umask(umask)
+            self.socket_path = socket_path
+        self._httpd.service = service
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _claim_socket(path: str):
+        if not os.path.exists(path):
+            return
+        if RemoteClient(path).is_running():
+            raise ServerError(f"rmlst serve is already running on {path}.")
+        # Left behind by a server that did not shut down cleanly
+        os.remove(path)
+
+    @property
+    def address(self) -> str:
+        """What clients pass as --server: the socket path or http://host:port."""
+        return self.socket_path or self._url
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self) -> "RmlstServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="rmlst-serve", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        if self.socket_path:
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "RmlstServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import shutil
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from . import io
+from .io import InputFile
+
+_SHARD_FILE_RE = re.compile(
+    r"^(?:rmlst_summary|rmlst_journal)\.shard-(\d+)-of-(\d+)\.(?:tsv|jsonl)$"
+)
+
+
+class ShardError(ValueError):
+    """Raised for an invalid --shard value or an incomplete set of shards to merge."""
+
+    pass
+
+
+class Shard(NamedTuple):
+    """Shard number (1-based) out of total."""
+
+    number: int
+    total: int
+
+    def file_name(self, name: str) -> str:
+        """
+        Per-shard name of a run artifact, so shards can share one output directory:
+        rmlst_summary.tsv -> rmlst_summary.shard-2-of-4.tsv.
+        """
+        root, ext = os.path.splitext(name)
+        return f"{root}.shard-{self.number}-of-{self.total}{ext}"
+
+
+def parse_shard(value: str) -> Shard:
+    """
+    Parses "INDEX/COUNT" with 1 <= INDEX <= COUNT.
+    """
+    index, sep, count = value.partition("/")
+    try:
+        shard = Shard(int(index), int(count))
+    except ValueError:
+        shard = None
+    if not sep or shard is None or not 1 <= shard.number <= shard.total:
+        raise ShardError(
+            f"expected INDEX/COUNT with 1 <= INDEX <= COUNT, got '{value}'"
+        )
+    return shard
+
+
+def stable_shard(name: str, count: int) -> int:
+    """
+    1-based shard of an input name; the same on every node and Python version,
+    and unaffected by other files being added or removed.
+    """
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(
+    items: Iterable[InputFile], shard: Shard, by: str = "hash"
+) -> Iterator[InputFile]:
+    """
+    Yields the items of a batch that belong to shard, in their original order.
+    by="hash": stable hash of the name (lazy).
+    by="position": every COUNT-th item of the (deterministically sorted) input (lazy).
+    by="size": greedy balancing of file bytes, largest files first; reads the whole
+    input and stats every file.
+    Every item of the input belongs to exactly one shard of the same COUNT.
+    """
+    if by == "hash":
+        for item in items:
+            if stable_shard(item.name, shard.total) == shard.number:
+                yield item
+    elif by == "position":
+        for i, item in enumerate(items):
+            if i % shard.total == shard.number - 1:
+                yield item
+    elif by == "size":
+        items = list(items)
+        assigned = _balance_by_size(items, shard.total)
+        for item, number in zip(items, assigned):
+            if number == shard.number:
+                yield item
+    else:
+        raise ShardError(f"unknown shard strategy '{by}'")
+
+
+def _balance_by_size(items: List[InputFile], count: int) -> List[int]:
+    # Unreadable files count as empty; they fail in whichever shard gets them
+    sizes = [io.file_size(item.path) for item in items]
+
+    # Largest first onto the least loaded shard; ties broken by name and shard
+    # number so every node computes the same assignment.
+    loads = [0] * count
+    assigned = [0] * len(items)
+    for i in sorted(range(len(items)), key=lambda i: (-sizes[i], items[i].name)):
+        target = min(range(count), key=lambda s: (loads[s], s))
+        loads[target] += sizes[i]
+        assigned[i] = target + 1
+    return assigned
+
+
+def _name_key(name: str) -> List[str]:
+    # Order of a (recursive) directory scan: sorted per directory, depth-first
+    return name.split("/")
+
+
+class MergeResult(NamedTuple):
+    files: int
+    copied: int
+    shards: List[Shard]
+
+
+def merge_shards(sources: Iterable[str], out_dir: str) -> MergeResult:
+    """
+    Combines the output directories of a sharded run into out_dir as a single run
+    would have left it: per-file outputs copied into place, one rmlst_summary.tsv
+    (species mode) and one journal, ordered by name.
+    Sources may be out_dir itself when the shards shared it. Raises ShardError if
+    a shard of the run is missing or a source has nothing to merge.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    summaries: List[str] = []
+    journals: List[Tuple[str, str]] = []
+    seen: Dict[int, Shard] = {}
+    for source in sources:
+        shard_files = sorted(
+            name for name in os.listdir(source) if _SHARD_FILE_RE.match(name)
+        )
+        if not shard_files and not _same_dir(source, out_dir):
+            shard_files = [
+                name
+                for name in (io.SUMMARY_NAME, io.JOURNAL_NAME)
+                if os.path.exists(os.path.join(source, name))
+            ]
+        if not shard_files:
+            raise ShardError(f"no rmlst summary or journal in {source}")
+
+        for name in shard_files:
+            path = os.path.join(source, name)
+            m = _SHARD_FILE_RE.match(name)
+            shard = Shard(int(m.group(1)), int(m.group(2))) if m else None
+            if shard:
+                seen[shard.number] = shard
+            if name.endswith(".tsv"):
+                summaries.append(path)
+            else:
+                journals.append((source, path))
+
+    if seen:
+        counts = {shard.total for shard in seen.values()}
+        if len(counts) > 1:
+            raise ShardError(f"shards of different runs: counts {sorted(counts)}")
+        count = counts.pop()
+        missing = [i for i in range(1, count + 1) if i not in seen]
+        if missing:
+            raise ShardError(
+                "missing shards: " + ", ".join(f"{i}/{count}" for i in missing)
+            )
+
+    # Per-file outputs and journal entries
+    entries: Dict[str, Dict] = {}
+    copied = 0
+    for source, path in journals:
+        for name, entry in io.Journal.load(path).items():
+            entries[name] = entry
+            output = entry.get("output")
+            if output and not _same_dir(source, out_dir):
+                src = os.path.join(source, output)
+                if os.path.exists(src):
+                    dst = os.path.join(out_dir, output)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    copied += 1
+
+    with io.Journal(os.path.join(out_dir, io.JOURNAL_NAME)) as journal:
+        for name in sorted(entries, key=_name_key):
+            entry = dict(entries[name])
+            del entry["file"]
+            journal.record(name, entry.pop("status"), **entry)
+
+    rows: Dict[str, str] = {}
+    header = None
+    for path in summaries:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            continue
+        header = header or lines[0]
+        for line in lines[1:]:
+            rows[line.split("\t", 1)[0]] = line
+    if header is not None:
+        content = "\n".join([header] + [rows[n] for n in sorted(rows, key=_name_key)])
+        io.atomic_write(os.path.join(out_dir, io.SUMMARY_NAME), content)
+
+    return MergeResult(
+        files=len(entries) or len(rows),
+        copied=copied,
+        shards=[seen[i] for i in sorted(seen)],
+    )
+
+
+def _same_dir(a: str, b: str) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
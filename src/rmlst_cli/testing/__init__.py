@@ -0,0 +1,3 @@
+"""
+Test helpers shipped with rmlst-cli (not used by the CLI itself).
+"""
@@ -0,0 +1,347 @@
+"""
+Local stand-in for the rMLST species identification endpoint.
+
+Accepts the same base64 JSON payload as PubMLST and answers with canned or
+synthetic taxon_prediction responses, optionally injecting latency, 429s, 5xx
+errors, connection resets and slow bodies, so concurrency, retries and fallback
+can be exercised and benchmarked offline:
+
+    with MockRmlstServer(latency=0.2, throttle_rate=0.1) as server:
+        api.identify("sample.fasta", uri=server.uri)
+
+Or from a shell: python -m rmlst_cli.testing.mock_server --port 8000 --latency 0.5
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional, cast
+from urllib.parse import urlsplit
+
+from ..http import DEFAULT_URI, FALLBACK_URI
+
+KIOSK_PATH = urlsplit(DEFAULT_URI).path
+FALLBACK_PATH = urlsplit(FALLBACK_URI).path
+
+# Fault names accepted in `faults` (applied to requests in arrival order)
+FAULTS = ("ok", "throttle", "error", "reset", "slow")
+
+# Synthetic predictions are drawn from these, keyed on the sequence content
+SPECIES = (
+    "Escherichia coli",
+    "Staphylococcus aureus",
+    "Klebsiella pneumoniae",
+    "Neisseria meningitidis",
+    "Salmonella enterica",
+    "Pseudomonas aeruginosa",
+    "Streptococcus pneumoniae",
+    "Enterococcus faecium",
+)
+
+# rMLST scheme size; details=True responses carry one entry per locus
+RMLST_LOCI = 53
+
+
+def synthetic_response(fasta: bytes, loci: int = RMLST_LOCI) -> Dict[str, Any]:
+    """
+    Deterministic rMLST-like response for a decoded FASTA payload: identical
+    input always gives the same species.
+    """
+    digest = hashlib.sha256(fasta).digest()
+    taxon = SPECIES[digest[0] % len(SPECIES)]
+    return {
+        "taxon_prediction": [
+            {
+                "rank": "SPECIES",
+                "taxon": taxon,
+                "support": 100,
+                "taxonomy": f"Bacteria > {taxon.split()[0]} > {taxon}",
+            }
+        ],
+        "exact_matches": {
+            f"BACT{i:06d}": [{"allele_id": str(digest[i % 32] + 1)}]
+            for i in range(1, loci + 1)
+        },
+        "fields": {"contigs": fasta.count(b">")},
+    }
+
+
+class MockRmlstServer:
+    """
+    Threaded HTTP/1.1 (keep-alive) server answering POSTs to any path.
+    Rates are probabilities per request; `faults` overrides them for the first
+    requests, one fault name per request (see FAULTS). Paths in down_paths
+    always answer error_status, and path_latency adds seconds per path; both
+    may be changed while the server runs.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        response: Optional[Dict[str, Any]] = None,
+        loci: int = RMLST_LOCI,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: Optional[int] = 1,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        reset_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_body: float = 1.0,
+        faults: Iterable[str] = (),
+        down_paths: Iterable[str] = (),
+        path_latency: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        response: canned JSON returned for every accepted request
+            (default: synthetic_response with `loci` loci).
+        latency, jitter: seconds added before answering (latency + uniform(0, jitter)).
+        retry_after: Retry-After sent with 429s, in whole seconds as HTTP requires
+            (None: no header).
+        slow_body: seconds over which a "slow" response body is trickled out.
+        """
+        self.response = response
+        self.loci = loci
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reset_rate = reset_rate
+        self.slow_rate = slow_rate
+        self.slow_body = slow_body
+        self.down_paths = set(down_paths)
+        self.path_latency = dict(path_latency or {})
+        for fault in faults:
+            if fault not in FAULTS:
+                raise ValueError(f"Unknown fault: {fault}")
+        self._faults = list(faults)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.counts: Dict[str, int] = {}
+        self.paths: Dict[str, int] = {}
+
+        self._httpd = _MockHTTPServer((host, port), _Handler)
+        self._httpd.mock = self
+        bound_host, bound_port = self._httpd.socket.getsockname()[:2]
+        self.base_url = f"http://{bound_host}:{bound_port}"
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def uri(self) -> str:
+        """URI of the (kiosk) species endpoint; pass as uri=."""
+        return self.base_url + KIOSK_PATH
+
+    @property
+    def fallback_uri(self) -> str:
+        return self.base_url + FALLBACK_PATH
+
+    def start(self) -> "MockRmlstServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="mock-rmlst-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockRmlstServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _begin(self, path: str) -> str:
+        """
+        Registers a request and decides its fault.
+        """
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.paths[path] = self.paths.get(path, 0) + 1
+
+            if path in self.down_paths:
+                fault = "error"
+            elif self._faults:
+                fault = self._faults.pop(0)
+            else:
+                fault = "ok"
+                r = self._random.random()
+                for name, rate in (
+                    ("throttle", self.throttle_rate),
+                    ("error", self.error_rate),
+                    ("reset", self.reset_rate),
+                    ("slow", self.slow_rate),
+                ):
+                    if r < rate:
+                        fault = name
+                        break
+                    r -= rate
+            self.counts[fault] = self.counts.get(fault, 0) + 1
+
+            delay = self.latency + self.path_latency.get(path, 0.0)
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def _end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: MockRmlstServer
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up (timeouts, losing hedges, Ctrl-C) are expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockRmlst/1.0"
+
+    def log_message(self, format: str, *args: Any):
+        # Keep test and benchmark output quiet
+        pass
+
+    def do_POST(self):
+        mock = cast(_MockHTTPServer, self.server).mock
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(411, {"message": "Content-Length required"})
+            return
+        body = self.rfile.read(int(length))
+
+        path = urlsplit(self.path).path
+        fault = mock._begin(path)
+        try:
+            if fault == "reset":
+                # RST instead of a response, like a dropped load balancer connection
+                self.connection.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                )
+                self.close_connection = True
+                self.connection.close()
+                return
+            if fault == "throttle":
+                headers = {}
+                if mock.retry_after is not None:
+                    headers["Retry-After"] = str(mock.retry_after)
+                self._send_json(429, {"message": "Too many requests"}, headers)
+                return
+            if fault == "error":
+                self._send_json(mock.error_status, {"message": "Service unavailable"})
+                return
+
+            fasta = self._decode(body)
+            if fasta is None:
+                return
+            result = mock.response or synthetic_response(fasta, mock.loci)
+            self._send_json(200, result, slow=mock.slow_body if fault == "slow" else 0)
+        finally:
+            mock._end()
+
+    def _decode(self, body: bytes) -> Optional[bytes]:
+        """
+        Returns the decoded FASTA of a PubMLST-style request, or answers 400.
+        """
+        try:
+            payload = json.loads(body)
+            sequence = payload["sequence"]
+            if payload.get("base64"):
+                return base64.b64decode(sequence, validate=True)
+            return sequence.encode("utf-8")
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            self._send_json(400, {"message": f"Invalid request body: {e}"})
+            return None
+
+    def _send_json(
+        self,
+        status: int,
+        data: Any,
+        headers: Optional[Dict[str, str]] = None,
+        slow: float = 0,
+    ):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if not slow:
+            self.wfile.write(body)
+            return
+        pieces = 10
+        step = max(1, -(-len(body) // pieces))
+        for i in range(0, len(body), step):
+            self.wfile.write(body[i : i + step])
+            self.wfile.flush()
+            time.sleep(slow / pieces)
+
+
+def main():
+    import click
+
+    @click.command()
+    @click.option("--host", default="127.0.0.1")
+    @click.option("--port", default=8000)
+    @click.option("--latency", default=0.0, help="Seconds before each answer.")
+    @click.option("--jitter", default=0.0, help="Extra random latency (seconds).")
+    @click.option("--throttle-rate", default=0.0, help="Fraction answered with 429.")
+    @click.option(
+        "--retry-after", default=1, help="Retry-After seconds sent with 429s."
+    )
+    @click.option("--error-rate", default=0.0, help="Fraction answered with 5xx.")
+    @click.option("--error-status", default=503)
+    @click.option("--reset-rate", default=0.0, help="Fraction of connections reset.")
+    @click.option("--slow-rate", default=0.0, help="Fraction with trickled bodies.")
+    @click.option("--slow-body", default=1.0, help="Seconds to trickle a slow body.")
+    @click.option("--seed", type=int)
+    def serve(**options):
+        """Run a mock rMLST endpoint until interrupted."""
+        host, port = options.pop("host"), options.pop("port")
+        server = MockRmlstServer(host, port, **options)
+        click.echo(f"Mock rMLST endpoint: {server.uri}", err=True)
+        click.echo(f"Fallback endpoint:   {server.fallback_uri}", err=True)
+        try:
+            server._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+
+    serve()
+
+
+if __name__ == "__main__":
+    main()
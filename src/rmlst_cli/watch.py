@@ -0,0 +1,253 @@
+"""
+`rmlst watch`: notices FASTA files arriving in a directory and reports the ones
+that have finished being written.
+
+DirectoryWatcher only wakes the caller up (inotify on Linux, else a polling
+interval); what changed is found by rescanning, and SettleTracker decides which
+files are new or changed and have kept their size and mtime for `settle` seconds.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .io import InputFile
+
+# inotify(7)
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+# Not IN_MODIFY: it fires on every write() of a file being copied in, while a
+# file is only worth a rescan once it is closed (or moved or created)
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+# Longest wait before a file that failed with a network or HTTP error is retried
+MAX_RETRY_DELAY = 3600.0
+
+
+class FileSignature(NamedTuple):
+    size: int
+    mtime_ns: int
+
+
+def _load_inotify():
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """
+    Blocks in wait() until something changes below directory, wake() is called
+    (from any thread) or the timeout passes. Uses inotify where available (no CPU
+    use while idle), else wakes every poll_interval seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        recursive: bool = False,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._watched: Set[str] = set()
+        self._woken = threading.Event()
+        # wake() may race close() from a worker thread
+        self._lock = threading.Lock()
+        self._wake_pipe: Optional[Tuple[int, int]] = None
+        self._libc = _load_inotify() if use_inotify else None
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd >= 0:
+                self._fd = fd
+                self._wake_pipe = os.pipe()
+                for end in self._wake_pipe:
+                    os.set_blocking(end, False)
+                self.add_directories()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def add_directories(self):
+        """
+        Watches directory and, if recursive, subdirectories created since the last
+        call (the caller calls this after each rescan).
+        """
+        if self._fd is None:
+            return
+        directories = [self.directory]
+        if self.recursive:
+            for root, dirs, _ in os.walk(self.directory):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                directories.extend(os.path.join(root, d) for d in dirs)
+        for path in directories:
+            if path in self._watched:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _IN_MASK)
+            if wd >= 0:
+                self._watched.add(path)
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Returns after a change or timeout seconds (None: no timeout with inotify,
+        poll_interval without).
+        """
+        if self._fd is None or self._wake_pipe is None:
+            delay = self.poll_interval
+            if timeout is not None:
+                delay = min(delay, timeout)
+            self._woken.wait(max(0.0, delay))
+            self._woken.clear()
+            return
+        fds = [self._fd, self._wake_pipe[0]]
+        readable, _, _ = select.select(fds, [], [], timeout)
+        for fd in readable:
+            # Events only say "rescan"; drain them all at once
+            try:
+                while os.read(fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def wake(self):
+        """
+        Makes a current or the next wait() return at once.
+        """
+        with self._lock:
+            if self._wake_pipe is None:
+                self._woken.set()
+                return
+            try:
+                os.write(self._wake_pipe[1], b"\0")
+            except BlockingIOError:
+                # Pipe full: a wakeup is pending anyway
+                pass
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        with self._lock:
+            if self._wake_pipe is not None:
+                for end in self._wake_pipe:
+                    os.close(end)
+                self._wake_pipe = None
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SettleTracker:
+    """
+    Decides which scanned files to identify: those whose signature differs from
+    the last identified one (known) and has not changed for settle seconds.
+    Files already older than settle when first seen are ready at once. A file
+    reported ready is not reported again until done() or retry() is called for it.
+    """
+
+    def __init__(
+        self,
+        settle: float = 10.0,
+        known: Optional[Dict[str, FileSignature]] = None,
+    ):
+        self.settle = settle
+        self.known: Dict[str, FileSignature] = dict(known or {})
+        self._seen: Dict[str, Tuple[FileSignature, float]] = {}
+        self._running: Set[str] = set()
+        # name -> time.monotonic() before which a failed file is not retried
+        self._retry_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self, items: Iterable[InputFile]
+    ) -> Tuple[List[Tuple[InputFile, FileSignature]], Optional[float]]:
+        """
+        Takes a complete scan and returns the files that are ready (with the
+        signature to pass to done()), and the seconds until the next file may
+        become ready (None if none is waiting).
+        """
+        now = time.monotonic()
+        wall = time.time()
+        ready = []
+        next_check = None
+        seen = {}
+        with self._lock:
+            known = dict(self.known)
+            running = set(self._running)
+            retry_at = dict(self._retry_at)
+        for item in items:
+            if item.name in running:
+                continue
+            if retry_at.get(item.name, now) > now:
+                remaining = retry_at[item.name] - now
+                if next_check is None or remaining < next_check:
+                    next_check = remaining
+                continue
+            try:
+                st = os.stat(item.path)
+            except OSError:
+                continue
+            sig = FileSignature(st.st_size, st.st_mtime_ns)
+            if known.get(item.name) == sig:
+                continue
+            previous = self._seen.get(item.name)
+            if previous is not None and previous[0] == sig:
+                since = previous[1]
+            else:
+                age = wall - st.st_mtime
+                since = now - age if age >= self.settle else now
+            seen[item.name] = (sig, since)
+            remaining = since + self.settle - now
+            if remaining <= 0:
+                ready.append((item, sig))
+            elif next_check is None or remaining < next_check:
+                next_check = remaining
+        self._seen = seen
+        with self._lock:
+            for item, _ in ready:
+                self._running.add(item.name)
+                self._retry_at.pop(item.name, None)
+        return ready, next_check
+
+    def done(self, name: str, sig: FileSignature):
+        """
+        Marks name as identified (or failed) at sig; it is only reported again once
+        it changes. Safe to call from worker threads.
+        """
+        with self._lock:
+            self.known[name] = sig
+            self._running.discard(name)
+
+    def retry(self, name: str, delay: float):
+        """
+        Marks name as failed in a way that may not last (e.g. a network error): it
+        is reported again, changed or not, once delay seconds have passed. Safe to
+        call from worker threads.
+        """
+        with self._lock:
+            self._retry_at[name] = time.monotonic() + delay
+            self._running.discard(name)
@@ -1,6 +1,8 @@
+import threading
+import time
 import pytest
 from unittest.mock import patch
-from rmlst_cli import api, http
+from rmlst_cli import api, http, parallel
 from rmlst_cli.fasta import InvalidFastaError
 
 
@@ -82,3 +84,114 @@ def test_identify_dir_graceful(tmp_path):
         assert len(results) == 2
         assert results[0] == ("a.fasta", {})
         assert results[1] == ("b.fa", {"ok": True})
+
+
+def test_identify_dir_concurrent_preserves_order(tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    names = [f"s{i:02d}.fasta" for i in range(8)]
+    for name in names:
+        (d / name).write_text(f">{name}\nATGC")
+
+    def fake_call(contigs, **kwargs):
+        # Earlier files finish last, so completion order is reversed
+        header = contigs[0][0]
+        time.sleep(0.01 * (8 - names.index(header)))
+        return {"taxon_prediction": [{"taxon": header}]}
+
+    with patch("rmlst_cli.http.call_rmlst_api", side_effect=fake_call):
+        results = list(api.identify_dir(str(d), max_workers=4))
+
+    assert [r[0] for r in results] == names
+    assert [r[1]["taxon_prediction"][0]["taxon"] for r in results] == names
+
+
+def test_identify_dir_concurrent_raises_in_order(tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    (d / "a.fasta").write_text(">seq1\nATGC")
+    (d / "b.fasta").write_text("NOT FASTA")
+    (d / "c.fasta").write_text(">seq3\nATGC")
+
+    with patch("rmlst_cli.http.call_rmlst_api", return_value={"ok": True}):
+        gen = api.identify_dir(str(d), max_workers=3)
+        assert next(gen) == ("a.fasta", {"ok": True})
+        with pytest.raises(InvalidFastaError):
+            next(gen)
+
+
+def test_identify_dir_unordered_yields_as_completed(tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    (d / "a.fasta").write_text(">seq1\nATGC")
+    (d / "b.fasta").write_text(">seq2\nCGTA")
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("a.fasta"):
+            time.sleep(0.2)
+        return {"file": path}
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        names = [
+            name for name, _ in api.identify_dir(str(d), max_workers=2, ordered=False)
+        ]
+    assert names == ["b.fasta", "a.fasta"]
+
+
+def test_identify_dir_largest_first_yields_in_name_order(tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name, length in [("a.fasta", 4), ("b.fasta", 400), ("c.fasta", 40)]:
+        (d / name).write_text(">s\n" + "A" * length)
+
+    with patch("rmlst_cli.http.call_rmlst_api", return_value={"ok": True}) as mock_call:
+        names = [name for name, _ in api.identify_dir(str(d), schedule="largest-first")]
+
+    assert names == ["a.fasta", "b.fasta", "c.fasta"]
+    # Started largest first
+    lengths = [len(call.args[0]) for call in mock_call.call_args_list]
+    assert lengths == sorted(lengths, reverse=True)
+
+
+def test_scheduled_run_holds_back_a_bounded_number_of_results():
+    head_released = threading.Event()
+    calls = []
+
+    def func(i):
+        calls.append(i)
+        if i == 0:
+            head_released.wait(5)
+        return i
+
+    # The first file in input order is started last and is slow
+    order = list(range(99, -1, -1))
+    timer = threading.Timer(0.3, head_released.set)
+    timer.start()
+    results = parallel.imap_scheduled(func, range(100), order, max_workers=2, window=4)
+    assert next(results) == 0
+    timer.join()
+    # Only window results (plus the head) were started while the head blocked
+    assert calls.index(0) <= 4
+    assert list(results) == list(range(1, 100))
+
+
+def test_identify_dir_parse_workers(tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    (d / "a.fasta").write_text(">seq1\nAT\nGC\n>seq2\nATGCAT")
+    (d / "b.fasta").write_text("NOT FASTA")
+    (d / "c.fasta").write_text(">seq3\nacgu")
+
+    with patch("rmlst_cli.http.call_rmlst_api", return_value={"ok": True}) as mock_call:
+        results = list(
+            api.identify_dir(str(d), graceful=True, max_workers=2, parse_workers=2)
+        )
+
+    assert results == [
+        ("a.fasta", {"ok": True}),
+        ("b.fasta", {}),
+        ("c.fasta", {"ok": True}),
+    ]
+    # Payloads are read and rendered in the worker processes
+    payloads = sorted(call.args[0] for call in mock_call.call_args_list)
+    assert payloads == [">seq2\nATGCAT\n>seq1\nATGC", ">seq3\nACGT"]
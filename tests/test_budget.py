@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests_mock
+from click.testing import CliRunner
+
+from rmlst_cli.budget import HostBudget
+from rmlst_cli.cli import main
+from rmlst_cli.http import DEFAULT_URI, RmlstClient
+
+
+def test_rate_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "budget")
+    budgets = [HostBudget(path, rate=50, max_in_flight=0) for _ in range(2)]
+    start = time.monotonic()
+    for i in range(6):
+        budgets[i % 2].acquire()
+        budgets[i % 2].release()
+    # One burst token, then 5 starts 1/50 s apart, whichever process asks
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_in_flight_limit_blocks_other_processes(tmp_path):
+    path = str(tmp_path / "budget")
+    first = HostBudget(path, rate=0, max_in_flight=2)
+    second = HostBudget(path, rate=0, max_in_flight=2, poll_interval=0.01)
+    first.acquire()
+    first.acquire()
+
+    started = threading.Event()
+    thread = threading.Thread(target=lambda: (second.acquire(), started.set()))
+    thread.start()
+    assert not started.wait(0.2)
+    first.release()
+    assert started.wait(2)
+    thread.join()
+
+
+def test_slots_of_dead_processes_are_reclaimed(tmp_path):
+    path = tmp_path / "budget"
+    budget = HostBudget(str(path), rate=0, max_in_flight=1)
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    # The exited process held the only slot
+    crashed = f"{budget.hostname}:{proc.pid}"
+    path.write_text(json.dumps({"in_flight": {crashed: [1, time.time()]}}))
+
+    budget.acquire()
+    assert list(json.loads(path.read_text())["in_flight"]) == [budget.owner]
+
+
+def test_client_consults_budget(tmp_path):
+    budget = HostBudget(str(tmp_path / "budget"), rate=0, max_in_flight=1)
+    with requests_mock.Mocker() as m:
+        m.post(DEFAULT_URI, [{"status_code": 503}, {"json": {"ok": True}}])
+        with RmlstClient(host_budget=budget) as client:
+            assert client.call(">a\nACGT", retry_delay=0) == {"ok": True}
+    # Every attempt released its slot
+    state = json.loads((tmp_path / "budget").read_text())
+    assert state["in_flight"] == {}
+
+
+def test_client_closes_budget(tmp_path):
+    budget = HostBudget(str(tmp_path / "budget"))
+    fd = budget._fd
+    RmlstClient(host_budget=budget).close()
+    with pytest.raises(OSError):
+        os.fstat(fd)
+    budget.close()
+
+
+def test_unusable_budget_file_is_a_filesystem_error(tmp_path):
+    fasta = tmp_path / "a.fasta"
+    fasta.write_text(">c\nACGT")
+    budget = str(tmp_path / "missing" / "budget")
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["-f", str(fasta), "--no-server", "--host-budget", budget]
+    )
+    assert result.exit_code == 7
+    assert "filesystem error" in result.output
+    for command in (["serve"], ["watch", str(tmp_path), "-O", str(tmp_path / "out")]):
+        result = runner.invoke(main, command + ["--host-budget", budget])
+        assert result.exit_code == 7, command
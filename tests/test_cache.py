@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+from rmlst_cli import api
+from rmlst_cli.cache import SWEEP_EVERY, PayloadDeduplicator, ResultCache, make_key
+from rmlst_cli.http import RmlstHttpError
+
+
+def test_key_depends_on_payload_and_uri():
+    assert make_key(">a\nACGT", "u1") == make_key(">a\nACGT", "u1")
+    assert make_key(">a\nACGT", "u1") != make_key(">a\nACGA", "u1")
+    assert make_key(">a\nACGT", "u1") != make_key(">a\nACGT", "u2")
+
+
+def test_get_put_roundtrip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = make_key(">a\nACGT", "u")
+    assert cache.get(key) is None
+    cache.put(key, {"taxon_prediction": [{"taxon": "X"}]})
+    assert cache.get(key) == {"taxon_prediction": [{"taxon": "X"}]}
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = make_key(">a\nACGT", "u")
+    cache.put(key, {"ok": True})
+    with open(cache._path(key), "w") as f:
+        f.write("{not json")
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+
+
+def test_age_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_age=60)
+    key = make_key(">a\nACGT", "u")
+    cache.put(key, {"ok": True})
+    old = time.time() - 120
+    os.utime(cache._path(key), (old, old))
+    assert cache.get(key) is None
+
+
+def test_size_eviction_drops_oldest(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=100)
+    keys = [make_key(f">{i}\nACGT", "u") for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.put(key, {"pad": "x" * 30})
+        t = time.time() - 100 + i
+        os.utime(cache._path(key), (t, t))
+    cache.evict()
+    present = [k for k in keys if cache.get(k) is not None]
+    assert present == keys[-2:]
+
+
+def test_concurrent_puts_sweep_once_per_sweep_every_writes(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10**9)
+    threads = 8
+
+    def put_many(t):
+        for i in range(SWEEP_EVERY):
+            cache.put(make_key(f">{t}-{i}\nACGT", "u"), {"ok": True})
+
+    with patch.object(cache, "evict") as evict:
+        workers = [threading.Thread(target=put_many, args=(t,)) for t in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    assert evict.call_count == threads
+
+
+def test_identify_cache_hit_skips_api(tmp_path):
+    fasta_file = tmp_path / "test.fasta"
+    fasta_file.write_text(">seq1\nATGC")
+    cache = ResultCache(str(tmp_path / "cache"))
+    mock_response = {"taxon_prediction": [{"taxon": "Species A"}]}
+
+    with patch(
+        "rmlst_cli.http.call_rmlst_api", return_value=mock_response
+    ) as mock_call:
+        assert api.identify(str(fasta_file), cache=cache) == mock_response
+        assert api.identify(str(fasta_file), cache=cache) == mock_response
+        mock_call.assert_called_once()
+
+
+def test_dedup_shares_in_flight_call():
+    dedup = PayloadDeduplicator()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        release.wait(5)
+        return {"n": len(calls)}
+
+    results = {}
+    threads = [
+        threading.Thread(
+            target=lambda n=n: results.update({n: dedup.run("k", n, call)})
+        )
+        for n in ("a", "b", "c")
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == {"a": {"n": 1}, "b": {"n": 1}, "c": {"n": 1}}
+    assert len(dedup.shared) == 2
+    # A later duplicate reuses the kept result, as does one found in the cache
+    assert dedup.run("k", "d", call) == {"n": 1}
+    dedup.record_reuse("k", "e")
+    assert calls == [1]
+    assert dedup.shared["d"] == dedup.shared["e"] in ("a", "b", "c")
+
+
+def test_dedup_keeps_the_most_recently_used_results():
+    dedup = PayloadDeduplicator(max_entries=2)
+    calls = []
+
+    def call(key):
+        calls.append(key)
+        return {"key": key}
+
+    for key in ("k1", "k2", "k1", "k3", "k1", "k2"):
+        assert dedup.run(key, f"{key}-{len(calls)}", lambda: call(key)) == {"key": key}
+    # k2 was the least recently used when k3 arrived
+    assert calls == ["k1", "k2", "k3", "k2"]
+
+
+def test_dedup_does_not_remember_failures():
+    dedup = PayloadDeduplicator()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    try:
+        dedup.run("k", "a", fail)
+    except RuntimeError:
+        pass
+    assert dedup.run("k", "b", lambda: {"ok": True}) == {"ok": True}
+    assert dedup.shared == {}
+
+
+def test_dedup_waiters_raise_their_own_chained_error():
+    dedup = PayloadDeduplicator()
+    release = threading.Event()
+    error = RmlstHttpError(503, "busy")
+
+    def fail():
+        release.wait(5)
+        raise error
+
+    raised = {}
+
+    def run(name):
+        try:
+            dedup.run("k", name, fail)
+        except RmlstHttpError as e:
+            raised[name] = e
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(raised) == 3
+    waiters = [e for e in raised.values() if e is not error]
+    assert len(waiters) == 2 and waiters[0] is not waiters[1]
+    for e in waiters:
+        assert e.__cause__ is error
+        assert (e.status_code, str(e)) == (503, str(error))
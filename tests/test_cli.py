@@ -1,8 +1,12 @@
+import json
+import os
+import time
 import pytest
 from click.testing import CliRunner
 from unittest.mock import patch
 from rmlst_cli.cli import main
 from rmlst_cli import __version__
+from rmlst_cli.fasta import InvalidFastaError
 
 
 @pytest.fixture
@@ -19,7 +23,7 @@ def test_cli_version(runner):
 def test_cli_no_args(runner):
     result = runner.invoke(main, [])
     assert result.exit_code == 2
-    assert "One of --fasta or --dir must be provided" in result.output
+    assert "One of --fasta, --dir or --manifest must be provided" in result.output
 
 
 def test_cli_single_file_success(runner, tmp_path):
@@ -114,3 +118,224 @@ def test_cli_force_overwrite(runner, tmp_path):
         lines = content.strip().split("\n")
         assert lines[0] == "species\tsupport"
         assert lines[1] == "Species X\t95"
+
+
+def test_cli_dir_jobs_matches_serial(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name in ["a.fasta", "b.fasta", "c.fasta", "d.fasta"]:
+        (d / name).write_text(f">{name}\nATGC")
+    (d / "c.fasta").write_text("NOT FASTA")
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("c.fasta"):
+            raise InvalidFastaError("bad")
+        return {"taxon_prediction": [{"taxon": os.path.basename(path), "support": 1}]}
+
+    (d / "b.fasta").write_text(">b\n" + "ATGC" * 100)
+
+    outputs = []
+    runs = [["-j", "1"], ["-j", "3"], ["-j", "3", "--schedule", "largest-first"]]
+    for i, args in enumerate(runs):
+        out = tmp_path / f"out{i}"
+        with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+            result = runner.invoke(
+                main, ["-d", str(d), "-O", str(out), "--species-only", *args]
+            )
+        assert result.exit_code == 2
+        outputs.append((result.output, (out / "rmlst_summary.tsv").read_text()))
+
+    # Same progress lines and summary, in name order, however files are started
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert "[ERR code=2] c.fasta" in outputs[0][0]
+
+
+def test_cli_dir_schedule_writes_outputs_as_files_finish(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    (d / "a.fasta").write_text(">a\nATGC")
+    (d / "b.fasta").write_text(">b\n" + "ATGC" * 100)
+    out = tmp_path / "out"
+    seen = []
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("a.fasta"):
+            # b.fasta, started first, is written while a.fasta is still running
+            deadline = time.monotonic() + 5
+            while not (out / "b.json").exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            seen.append((out / "b.json").exists())
+        return {"taxon_prediction": [{"taxon": os.path.basename(path), "support": 1}]}
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        result = runner.invoke(
+            main,
+            ["-d", str(d), "-O", str(out), "-j", "2", "--schedule", "largest-first"],
+        )
+    assert result.exit_code == 0, result.output
+    assert seen == [True]
+    # Progress lines are still printed in name order
+    assert result.output.index("[OK] a.fasta") < result.output.index("[OK] b.fasta")
+
+
+def test_cli_dir_resume(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name in ["a.fasta", "b.fasta", "c.fasta"]:
+        (d / name).write_text(f">{name}\nATGC")
+    out = tmp_path / "out"
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("b.fasta"):
+            raise InvalidFastaError("bad")
+        return {"taxon_prediction": [{"taxon": os.path.basename(path), "support": 1}]}
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        result = runner.invoke(main, ["-d", str(d), "-O", str(out), "--species-only"])
+    assert result.exit_code == 2
+    assert (out / "rmlst_journal.jsonl").exists()
+
+    mock_resp = {"taxon_prediction": [{"taxon": "Species B", "support": 9}]}
+    with patch("rmlst_cli.api.identify", return_value=mock_resp) as mock_identify:
+        result = runner.invoke(
+            main, ["-d", str(d), "-O", str(out), "--species-only", "--resume"]
+        )
+    assert result.exit_code == 0
+    # Only the failed file is identified again
+    assert [c.args[0] for c in mock_identify.call_args_list] == [str(d / "b.fasta")]
+    assert "[SKIP] a.fasta (done)" in result.output
+    assert "Done: 1 ok, 0 failed, 2 skipped." in result.output
+    assert (out / "rmlst_summary.tsv").read_text().split("\n") == [
+        "file\tspecies\tsupport",
+        "a.fasta\ta.fasta\t1",
+        "b.fasta\tSpecies B\t9",
+        "c.fasta\tc.fasta\t1",
+    ]
+
+
+def test_cli_dir_graceful_writes_empty_json_for_failures(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name in ["a.fasta", "b.fasta", "c.fasta"]:
+        (d / name).write_text(f">{name}\nATGC")
+    out = tmp_path / "out"
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("c.fasta"):
+            raise InvalidFastaError("bad")
+        return {"taxon_prediction": [{"taxon": os.path.basename(path), "support": 1}]}
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        result = runner.invoke(main, ["-d", str(d), "-O", str(out), "--graceful"])
+    assert result.exit_code == 0
+    assert sorted(p.name for p in out.glob("*.json")) == ["a.json", "b.json", "c.json"]
+    assert json.loads((out / "c.json").read_text()) == {}
+
+
+def test_cli_dir_identical_files_upload_once_serially(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name in ["a.fasta", "b.fasta", "c.fasta"]:
+        (d / name).write_text(">c\nATGC" if name != "b.fasta" else ">c\nGGCC")
+    out = tmp_path / "out"
+    mock_resp = {"taxon_prediction": [{"taxon": "Species X", "support": 95}]}
+
+    with patch("rmlst_cli.http.call_rmlst_api", return_value=mock_resp) as mock_call:
+        result = runner.invoke(main, ["-d", str(d), "-O", str(out), "-j", "1"])
+    assert result.exit_code == 0
+    assert mock_call.call_count == 2
+    assert "[OK] c.fasta (same payload as a.fasta)" in result.output
+    assert "Done: 3 ok, 0 failed, 0 skipped, 1 shared." in result.output
+
+
+def test_cli_resume_requires_outdir(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    result = runner.invoke(main, ["-d", str(d), "--resume"])
+    assert result.exit_code == 2
+    assert "--resume requires" in result.output
+
+
+def test_cli_dir_ndjson(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    for name in ["a.fasta", "b.fasta", "c.fasta"]:
+        (d / name).write_text(f">{name}\nATGC")
+
+    def fake_identify(path, **kwargs):
+        if path.endswith("b.fasta"):
+            raise InvalidFastaError("bad")
+        return {"taxon_prediction": [{"taxon": os.path.basename(path), "support": 1}]}
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        result = runner.invoke(main, ["-d", str(d), "--ndjson", "-j", "2"])
+    assert result.exit_code == 2
+    records = sorted(
+        (json.loads(line) for line in result.output.splitlines()),
+        key=lambda r: r["file"],
+    )
+    assert [r["file"] for r in records] == ["a.fasta", "b.fasta", "c.fasta"]
+    assert records[0]["result"]["taxon_prediction"][0]["taxon"] == "a.fasta"
+    assert records[1]["error"]["code"] == 2
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        result = runner.invoke(
+            main, ["-d", str(d), "--ndjson", "--species-only", "--graceful"]
+        )
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.output.splitlines()] == [
+        {"file": "a.fasta", "species": "a.fasta", "support": "1"},
+        {"file": "b.fasta", "species": "", "support": ""},
+        {"file": "c.fasta", "species": "c.fasta", "support": "1"},
+    ]
+
+
+def test_cli_ndjson_requires_stdout_dir_mode(runner, tmp_path):
+    d = tmp_path / "subdir"
+    d.mkdir()
+    result = runner.invoke(main, ["-d", str(d), "-O", str(tmp_path / "o"), "--ndjson"])
+    assert result.exit_code == 2
+    assert "--ndjson requires" in result.output
+
+
+def test_cli_manifest_from_stdin(runner, tmp_path):
+    for run in ["run1", "run2"]:
+        (tmp_path / run).mkdir()
+        (tmp_path / run / "contigs.fasta").write_text(">c\nATGC")
+    manifest = f"{tmp_path}/run1/contigs.fasta\tS1\n{tmp_path}/run2/contigs.fasta\tS2\n"
+    out = tmp_path / "out"
+
+    mock_resp = {"taxon_prediction": [{"taxon": "Species X", "support": 95}]}
+    with patch("rmlst_cli.api.identify", return_value=mock_resp) as mock_identify:
+        result = runner.invoke(
+            main, ["--manifest", "-", "-O", str(out)], input=manifest
+        )
+    assert result.exit_code == 0
+    assert mock_identify.call_args_list[1].args[0] == str(
+        tmp_path / "run2" / "contigs.fasta"
+    )
+    assert "[OK] S1" in result.output
+    assert (out / "S1.json").exists() and (out / "S2.json").exists()
+
+
+def test_cli_dir_recursive(runner, tmp_path):
+    d = tmp_path / "runs"
+    for name in ["run1/a.fasta", "run2/a.fasta", "top.fa"]:
+        (d / name).parent.mkdir(parents=True, exist_ok=True)
+        (d / name).write_text(">c\nATGC")
+    out = tmp_path / "out"
+
+    mock_resp = {"taxon_prediction": [{"taxon": "Species X", "support": 95}]}
+    with patch("rmlst_cli.api.identify", return_value=mock_resp):
+        result = runner.invoke(main, ["-d", str(d), "-r", "-O", str(out)])
+        assert result.exit_code == 0
+        assert (out / "run1" / "a.json").exists()
+        assert (out / "run2" / "a.json").exists()
+        assert (out / "top.json").exists()
+
+        result = runner.invoke(main, ["-d", str(d), "-r", "--species-only"])
+    assert result.output.splitlines()[1:] == [
+        "run1/a.fasta\tSpecies X\t95",
+        "run2/a.fasta\tSpecies X\t95",
+        "top.fa\tSpecies X\t95",
+    ]
@@ -0,0 +1,179 @@
+import pytest
+
+from rmlst_cli import fasta
+from rmlst_cli.fasta import InvalidFastaError
+
+EXAMPLES = [
+    b">seq1 some description\nACGT\nacgu\n>seq2\nNNNN\n",
+    b">seq1\r\nAC GT\r\nAC\tGT\r\n>seq2  \r\nTTTT",
+    b">seq1\rACGT\r>seq2\rGG\r",
+    b">a\n\n\nACGT\n\n>b\n>c\nA>C\n",
+    b">only header",
+]
+
+
+def write(tmp_path, data, name="test.fasta"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.mark.parametrize("data", EXAMPLES)
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 1 << 20])
+def test_streaming_records_independent_of_chunk_size(tmp_path, data, chunk_size):
+    path = write(tmp_path, data)
+    expected = [
+        (h, r.translate(None, fasta.WHITESPACE))
+        for h, r in fasta.iter_fasta_records(path)
+    ]
+    got = [
+        (h, r.translate(None, fasta.WHITESPACE))
+        for h, r in fasta.iter_fasta_records(path, chunk_size=chunk_size)
+    ]
+    assert got == expected
+
+
+def test_header_and_sequence_semantics(tmp_path):
+    path = write(tmp_path, EXAMPLES[1])
+    assert list(fasta.iter_contigs(path)) == [("seq1", "ACGTACGT"), ("seq2", "TTTT")]
+
+    path = write(tmp_path, EXAMPLES[0])
+    assert list(fasta.iter_contigs(path)) == [
+        ("seq1 some description", "ACGTACGT"),
+        ("seq2", "NNNN"),
+    ]
+
+
+def parse_outcome(path, parser):
+    try:
+        return list(fasta.iter_contigs(path, parser=parser))
+    except InvalidFastaError:
+        return "invalid"
+
+
+@pytest.mark.parametrize("data", EXAMPLES)
+def test_matches_biopython(tmp_path, data):
+    pytest.importorskip("Bio")
+    path = write(tmp_path, data)
+    assert parse_outcome(path, "builtin") == parse_outcome(path, "biopython")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"ACGT\n>seq1\nACGT\n",
+        b"\n>seq1\nACGT\n",
+        b">seq1\nACGX\n",
+        b">seq1\nAC\xc3\xa9GT\n",
+        b">seq1\nAC\xffGT\n",
+        b">seq\xff1\nACGT\n",
+    ],
+)
+def test_invalid_inputs(tmp_path, data):
+    path = write(tmp_path, data)
+    with pytest.raises(InvalidFastaError):
+        fasta.read_and_process_fasta(path)
+
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path, b"")
+    with pytest.raises(InvalidFastaError, match="No sequences"):
+        fasta.read_and_process_fasta(path)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(InvalidFastaError):
+        fasta.read_and_process_fasta(str(tmp_path / "missing.fasta"))
+
+
+def test_select_top_contigs_matches_full_sort():
+    import random
+
+    rng = random.Random(0)
+    contigs = [(f"h{rng.randint(0, 30)}", "A" * rng.randint(1, 20)) for _ in range(500)]
+    expected = sorted(contigs, key=lambda x: (-len(x[1]), x[0]))[:50]
+    assert fasta.select_top_contigs(iter(contigs), 50) == expected
+    assert fasta.select_top_contigs(contigs, 1000) == sorted(
+        contigs, key=lambda x: (-len(x[1]), x[0])
+    )
+
+
+def test_too_many_contigs_fails_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(fasta, "MAX_CONTIGS", 3)
+    # The 5th record is invalid, but the limit is hit first
+    path = write(tmp_path, b">a\nA\n>b\nA\n>c\nA\n>d\nA\n>e\nXXX\n")
+    with pytest.raises(fasta.TooManyContigsError):
+        fasta.read_and_process_fasta(path)
+
+    path = write(tmp_path, b">a\nA\n>b\nAAA\n>c\nAA\n>d\nAAAA\n")
+    assert fasta.read_and_process_fasta(path, trim_to_5000=True) == [
+        ("d", "AAAA"),
+        ("b", "AAA"),
+        ("c", "AA"),
+    ]
+
+
+def test_normalize_raw_sequence():
+    assert fasta.normalize_raw_sequence(b"acgu\nRYsw kmbd\thvn\r\n") == (
+        "ACGTRYSWKMBDHVN"
+    )
+    with pytest.raises(InvalidFastaError, match=r"'X' at position 6 in sequence: s1"):
+        fasta.normalize_raw_sequence(b"ACG\nTAX", "s1")
+    with pytest.raises(InvalidFastaError, match="'é' at position 3"):
+        fasta.normalize_raw_sequence("AC\u00e9GT".encode("utf-8"))
+    with pytest.raises(InvalidFastaError, match="not valid UTF-8"):
+        fasta.normalize_raw_sequence(b"AC\xffGT")
+
+
+def test_fast_path_matches_str_helpers():
+    import random
+
+    rng = random.Random(1)
+    alphabet = "ACGTUNacgtunRYryX- \t\n\x0b\x1c"
+    for _ in range(500):
+        seq = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = "".join(seq.split()).upper().replace("U", "T")
+        assert fasta.normalize_sequence(seq) == expected
+        valid = bool(fasta.VALID_CHARS_RE.match(expected))
+        assert fasta.validate_sequence(expected) == valid
+        try:
+            assert fasta.normalize_raw_sequence(seq.encode()) == expected
+            assert valid
+        except InvalidFastaError:
+            assert not valid
+
+
+def compress(data, kind):
+    if kind == "gzip":
+        import gzip
+
+        return gzip.compress(data)
+    if kind == "bzip2":
+        import bz2
+
+        return bz2.compress(data)
+    if kind == "xz":
+        import lzma
+
+        return lzma.compress(data)
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@pytest.mark.parametrize("kind", ["gzip", "bzip2", "xz", "zstd"])
+@pytest.mark.parametrize("data", EXAMPLES[:3])
+def test_compressed_input_matches_plain(tmp_path, data, kind):
+    plain = write(tmp_path, data)
+    # Detected by content, not by name
+    packed = write(tmp_path, compress(data, kind), name="test.fa")
+    assert list(fasta.iter_contigs(packed)) == list(fasta.iter_contigs(plain))
+    pytest.importorskip("Bio")
+    assert parse_outcome(packed, "biopython") == parse_outcome(plain, "biopython")
+
+
+@pytest.mark.parametrize("kind", ["gzip", "bzip2", "xz"])
+def test_corrupt_compressed_input(tmp_path, kind):
+    data = compress(EXAMPLES[0] * 1000, kind)
+    path = write(tmp_path, data[: len(data) // 2], name="test.fa.gz")
+    with pytest.raises(InvalidFastaError):
+        list(fasta.iter_contigs(path))
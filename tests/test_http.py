@@ -0,0 +1,191 @@
+import base64
+import json
+import time
+
+import pytest
+import requests
+import requests_mock
+from unittest.mock import Mock, patch
+
+from rmlst_cli import fasta, http
+from rmlst_cli.http import DEFAULT_URI, FALLBACK_URI, RmlstClient
+
+
+def test_client_reuses_session():
+    with requests_mock.Mocker() as m:
+        m.post(DEFAULT_URI, json={"ok": True})
+        with RmlstClient() as client:
+            session = client.session
+            assert client.call(">a\nACGT") == {"ok": True}
+            assert client.call(">b\nACGT") == {"ok": True}
+            assert client.session is session
+        assert m.call_count == 2
+
+
+def test_client_falls_back_from_kiosk():
+    with requests_mock.Mocker() as m:
+        m.post(DEFAULT_URI, status_code=503)
+        m.post(FALLBACK_URI, json={"ok": True})
+        with RmlstClient() as client:
+            result = client.call(">a\nACGT", retries=1, retry_delay=0)
+        assert result == {"ok": True}
+        assert [r.url for r in m.request_history] == [
+            DEFAULT_URI,
+            DEFAULT_URI,
+            FALLBACK_URI,
+        ]
+
+
+def test_client_no_fallback_for_custom_uri():
+    uri = "https://example.org/rmlst"
+    with requests_mock.Mocker() as m:
+        m.post(uri, status_code=404, text="nope")
+        with RmlstClient() as client:
+            with pytest.raises(http.RmlstHttpError) as exc:
+                client.call(">a\nACGT", uri=uri, retries=0)
+        assert exc.value.status_code == 404
+
+
+def test_call_rmlst_api_uses_default_client():
+    with requests_mock.Mocker() as m:
+        m.post(DEFAULT_URI, json={"ok": True})
+        assert http.call_rmlst_api(">a\nACGT") == {"ok": True}
+        assert http.get_default_client() is http.get_default_client()
+
+
+def test_injected_session_is_not_closed():
+    session = requests.Session()
+    session.close = Mock()
+    with requests_mock.Mocker(session=session) as m:
+        m.post(DEFAULT_URI, json={"ok": True})
+        with RmlstClient(session=session) as client:
+            assert client.call(">a\nACGT") == {"ok": True}
+    session.close.assert_not_called()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 7, 1 << 16])
+def test_sequence_payload_matches_json_body(chunk_size):
+    contigs = [("seq1 desc é", "ACGT" * 50), ("seq2", "N"), ("seq3", "")]
+    fasta_str = fasta.to_fasta_string(contigs)
+    expected = json.dumps(
+        {
+            "base64": True,
+            "details": True,
+            "sequence": base64.b64encode(fasta_str.encode("utf-8")).decode("ascii"),
+        }
+    ).encode("ascii")
+
+    for source in (contigs, fasta_str):
+        payload = http.SequencePayload(source, chunk_size=chunk_size)
+        assert b"".join(payload) == expected
+        assert len(payload) == len(expected)
+        # Re-iterable for retries
+        assert b"".join(payload) == expected
+
+
+def test_client_streams_body_with_content_length():
+    contigs = [("seq1", "ACGT" * 1000)]
+    with requests_mock.Mocker() as m:
+        m.post(DEFAULT_URI, json={"ok": True})
+        with RmlstClient() as client:
+            assert client.call(contigs) == {"ok": True}
+        request = m.last_request
+        assert int(request.headers["Content-Length"]) == len(
+            http.SequencePayload(contigs)
+        )
+
+
+def test_backoff_fixed_and_exponential():
+    fixed = http.Backoff()
+    assert [fixed.delay(a, 60) for a in (1, 2, 3)] == [60, 60, 60]
+
+    exp = http.Backoff(strategy="exponential", max_delay=300)
+    assert [exp.delay(a, 60) for a in (1, 2, 3, 4)] == [60, 120, 240, 300]
+
+    jittered = http.Backoff(strategy="exponential", jitter=True)
+    for _ in range(50):
+        assert 10 <= jittered.delay(2, 10) <= 20
+
+
+def test_backoff_retry_after():
+    backoff = http.Backoff(max_delay=100)
+    assert backoff.delay(1, 60, "5") == 5
+    assert backoff.delay(1, 60, "1000") == 100
+    assert backoff.delay(1, 60, "Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert backoff.delay(1, 60, "garbage") == 60
+    assert http.Backoff(respect_retry_after=False).delay(1, 60, "5") == 60
+
+
+def test_retry_honors_retry_after():
+    with requests_mock.Mocker() as m:
+        m.post(
+            DEFAULT_URI,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "7"}},
+                {"status_code": 503},
+                {"json": {"ok": True}},
+            ],
+        )
+        with patch("rmlst_cli.http.time.sleep") as sleep:
+            with RmlstClient() as client:
+                assert client.call(">a\nACGT", retry_delay=2) == {"ok": True}
+        assert [c.args[0] for c in sleep.call_args_list] == [7, 2]
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = http.RateLimiter(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    # The first request uses the burst token, the other 5 wait 1/50 s each
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_rate_limiter_aimd():
+    limiter = http.RateLimiter(rate=8, adaptive=True, min_rate=1)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 2
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 1
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.rate == 8
+
+    fixed = http.RateLimiter(rate=8)
+    fixed.on_throttle()
+    assert fixed.rate == 8
+
+
+def test_circuit_breaker_opens_and_probes(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(http.time, "monotonic", lambda: now[0])
+    breaker = http.CircuitBreaker(threshold=2, cooldown=10)
+
+    breaker.on_failure()
+    assert breaker.allow()
+    breaker.on_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    now[0] = 11.0
+    assert breaker.allow()  # the probe
+    assert not breaker.allow()  # only one probe at a time
+    breaker.on_failure()
+    assert not breaker.allow()
+
+    now[0] = 22.0
+    assert breaker.allow()
+    breaker.on_success()
+    assert not breaker.is_open and breaker.allow()
+
+
+def test_probe_ended_by_unexpected_error_can_be_retried():
+    breaker = http.CircuitBreaker(threshold=1, cooldown=0)
+    breaker.on_failure()
+    with RmlstClient(breaker=breaker) as client:
+        with patch.object(client.session, "post", side_effect=RuntimeError("bug")):
+            with pytest.raises(RuntimeError):
+                client.call(">a\nACGT", retry_delay=0)
+    assert breaker.is_open
+    assert breaker.allow()  # the next call may probe
@@ -0,0 +1,115 @@
+import json
+import os
+
+import pytest
+
+from rmlst_cli import io
+
+
+def test_journal_resume_keeps_last_entry(tmp_path):
+    path = str(tmp_path / io.JOURNAL_NAME)
+    with io.Journal(path) as journal:
+        journal.record("a.fasta", "failed", code=4, error="network")
+        journal.record("a.fasta", "ok", output=None, species="X", support="9")
+        journal.record("b.fasta", "ok", output=None, species="Y", support="1")
+
+    # Simulate a run killed while writing an entry
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"file": "c.fasta", "sta')
+
+    with io.Journal(path, resume=True) as journal:
+        assert journal.entries["a.fasta"]["status"] == "ok"
+        assert set(journal.entries) == {"a.fasta", "b.fasta"}
+        journal.record("c.fasta", "ok", output=None, species="Z", support="5")
+
+    entries = io.Journal.load(path)
+    assert entries["c.fasta"]["species"] == "Z"
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert json.loads(lines[-1])["file"] == "c.fasta"
+
+
+def test_journal_new_run_starts_empty(tmp_path):
+    path = str(tmp_path / io.JOURNAL_NAME)
+    with io.Journal(path) as journal:
+        journal.record("a.fasta", "ok", output=None, species="X", support="9")
+    with io.Journal(path) as journal:
+        assert journal.entries == {}
+    assert io.Journal.load(path) == {}
+
+
+def test_scan_directory_compressed_and_fna(tmp_path):
+    for name in ["a.fa.gz", "b.FNA", "c.fasta.zst", "d.txt.gz", "e.gz", ".f.fa"]:
+        (tmp_path / name).write_text("")
+    files = [os.path.basename(p) for p in io.scan_directory(str(tmp_path))]
+    assert files == ["a.fa.gz", "b.FNA", "c.fasta.zst"]
+
+
+def test_derive_output_path_strips_compression(tmp_path):
+    out = str(tmp_path)
+    assert io.derive_output_path("/x/s.fa.gz", out, ".json") == os.path.join(
+        out, "s.json"
+    )
+    assert io.derive_output_path("/x/s.v2.fasta", out, ".json") == os.path.join(
+        out, "s.v2.json"
+    )
+
+
+def test_iter_directory_recursive_and_glob(tmp_path):
+    for name in ["b.fa", "run1/a.fa.gz", "run1/x.txt", "run2/deep/c.fasta", ".h/d.fa"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+
+    assert [i.name for i in io.iter_directory(str(tmp_path))] == ["b.fa"]
+    assert [i.name for i in io.iter_directory(str(tmp_path), recursive=True)] == [
+        "b.fa",
+        "run1/a.fa.gz",
+        "run2/deep/c.fasta",
+    ]
+    items = list(io.iter_directory(str(tmp_path), recursive=True, pattern="*.gz"))
+    assert items == [io.InputFile("run1/a.fa.gz", str(tmp_path / "run1" / "a.fa.gz"))]
+    items = io.iter_directory(str(tmp_path), recursive=True, pattern="run2/*/*")
+    assert [i.name for i in items] == ["run2/deep/c.fasta"]
+
+
+def test_iter_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manifest = tmp_path / "list.tsv"
+    manifest.write_text(
+        "# path\tsample\n/data/run1/contigs.fa\tS1\n\nrun2/contigs.fa\tS/2\nother.fa\n"
+    )
+    assert list(io.iter_manifest(str(manifest))) == [
+        io.InputFile("S1", os.path.abspath("/data/run1/contigs.fa")),
+        io.InputFile("S_2", str(tmp_path / "run2" / "contigs.fa")),
+        io.InputFile("other.fa", str(tmp_path / "other.fa")),
+    ]
+
+    manifest.write_text("run1/contigs.fa\nrun2/contigs.fa\n")
+    items = io.iter_manifest(str(manifest))
+    assert next(items).name == "contigs.fa"
+    with pytest.raises(io.ManifestError, match="line 2: duplicate name"):
+        next(items)
+
+
+def test_output_path_for(tmp_path):
+    out = str(tmp_path)
+    assert io.output_path_for("run1/a.fa.gz", out, ".json") == os.path.join(
+        out, "run1", "a.json"
+    )
+    assert io.output_path_for("E.coli_1", out, ".json") == os.path.join(
+        out, "E.coli_1.json"
+    )
+
+
+def test_schedule_by_size(tmp_path):
+    items = []
+    for name, size in [("a.fa", 10), ("b.fa", 300), ("c.fa", 10), ("d.fa", 50)]:
+        (tmp_path / name).write_text("A" * size)
+        items.append(io.InputFile(name, str(tmp_path / name)))
+    items.append(io.InputFile("missing.fa", str(tmp_path / "missing.fa")))
+
+    assert io.schedule(items) == [0, 1, 2, 3, 4]
+    # Equal sizes keep their input order
+    assert io.schedule(items, "largest-first") == [1, 3, 0, 2, 4]
+    assert io.schedule(items, "smallest-first") == [4, 0, 2, 3, 1]
+    with pytest.raises(ValueError):
+        io.schedule(items, "random")
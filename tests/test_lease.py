@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from rmlst_cli.cli import main
+from rmlst_cli.lease import LeaseQueue
+
+
+def test_claim_is_exclusive_until_the_lease_expires(tmp_path):
+    w1 = LeaseQueue(str(tmp_path), "w1", ttl=60)
+    w2 = LeaseQueue(str(tmp_path), "w2", ttl=60)
+    with w1, w2:
+        assert w1.claim("a.fasta")
+        assert not w2.claim("a.fasta")
+        assert w2.holder("a.fasta") == "w1"
+
+        # w1 stops renewing (crashed host): its lease is taken over after ttl
+        lease = next(
+            os.path.join(w1.directory, n)
+            for n in os.listdir(w1.directory)
+            if n.endswith(".lease")
+        )
+        old = time.time() - 120
+        os.utime(lease, (old, old))
+        assert w2.claim("a.fasta")
+        assert w1.holder("a.fasta") == "w2"
+
+
+def test_record_marks_done_and_releases(tmp_path):
+    with LeaseQueue(str(tmp_path), "w1") as w1, LeaseQueue(str(tmp_path), "w2") as w2:
+        assert w1.claim("sub/a.fasta")
+        w1.record("sub/a.fasta", "ok", species="E. coli", support="100")
+        assert w1.holder("sub/a.fasta") is None
+        assert w2.finished("sub/a.fasta")["species"] == "E. coli"
+        assert w2.finished("b.fasta") is None
+
+
+def test_failed_files_are_not_finished(tmp_path):
+    with LeaseQueue(str(tmp_path), "w1") as w1, LeaseQueue(str(tmp_path), "w2") as w2:
+        assert w1.claim("a.fasta")
+        w1.record("a.fasta", "failed", code=4, error="network error")
+        assert w2.finished("a.fasta") is None
+        assert w2.claim("a.fasta")
+
+
+def test_every_name_is_claimed_once(tmp_path):
+    names = [f"s{i}.fasta" for i in range(200)]
+    queues = [LeaseQueue(str(tmp_path), f"w{i}") for i in range(4)]
+
+    def work(queue):
+        return [name for name in names if queue.claim(name)]
+
+    with ThreadPoolExecutor(len(queues)) as pool:
+        claimed = [n for names_ in pool.map(work, queues) for n in names_]
+    for queue in queues:
+        queue.close()
+    assert sorted(claimed) == sorted(names)
+
+
+def fake_identify(path, **kwargs):
+    name = os.path.basename(path)
+    return {"taxon_prediction": [{"taxon": f"T {name}", "support": len(name)}]}
+
+
+def test_cooperative_run_skips_done_and_reclaims_abandoned(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(4):
+        (d / f"s{i}.fasta").write_text(f">c\n{'ACGT' * (i + 1)}")
+    out = tmp_path / "out"
+
+    # Another worker finished s1 and crashed while holding s2 (it renews far
+    # less often than the run's --lease-ttl, so its lease goes stale)
+    other = LeaseQueue(str(out), "other", ttl=1000)
+    other.record("s1.fasta", "ok", output=None, species="T s1", support="8")
+    # ... failed s3 (e.g. the network was down), which is tried again
+    other.record("s3.fasta", "failed", code=4, error="network error")
+    assert other.claim("s2.fasta")
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify) as identify:
+        result = CliRunner().invoke(
+            main,
+            ["-d", str(d), "-O", str(out), "--species-only"]
+            + ["--cooperative", "--lease-ttl", "1"],
+        )
+    other.close()
+
+    assert result.exit_code == 0, result.output
+    assert "[SKIP] s1.fasta (done)" in result.output
+    assert "[WAIT] 1 files in progress on other workers" in result.output
+    assert sorted(os.path.basename(c.args[0]) for c in identify.call_args_list) == [
+        "s0.fasta",
+        "s2.fasta",
+        "s3.fasta",
+    ]
+    rows = (out / "rmlst_summary.tsv").read_text().splitlines()[1:]
+    assert [row.split("\t")[0] for row in rows] == [f"s{i}.fasta" for i in range(4)]
@@ -0,0 +1,27 @@
+from rmlst_cli import metrics
+
+
+def test_percentiles_nearest_rank():
+    summary = metrics.percentiles(range(1, 101))
+    assert summary["count"] == 100
+    assert summary["total"] == 5050
+    assert [summary[k] for k in ("p50", "p90", "p99", "max")] == [50, 90, 99, 100]
+    assert metrics.percentiles([]) == {"count": 0}
+
+
+def test_metrics_record():
+    m = metrics.Metrics()
+    m.add_time("network", 0.5)
+    m.add_time("network", 0.25)
+    m.add_attempt("http://x", 0.5, 503)
+    m.add_attempt("http://x", 0.25, 200)
+    m.set("payload_bytes", 10)
+    assert m.to_dict() == {
+        "timings": {"network": 0.75},
+        "payload_bytes": 10,
+        "attempts": [
+            {"uri": "http://x", "seconds": 0.5, "status": 503},
+            {"uri": "http://x", "seconds": 0.25, "status": 200},
+        ],
+        "retries": 1,
+    }
@@ -0,0 +1,284 @@
+import json
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+from click.testing import CliRunner
+
+from rmlst_cli import api, http
+from rmlst_cli.cli import main
+from rmlst_cli.http import RmlstClient
+from rmlst_cli.metrics import Metrics
+from rmlst_cli.testing.mock_server import (
+    FALLBACK_PATH,
+    KIOSK_PATH,
+    MockRmlstServer,
+    synthetic_response,
+)
+
+
+@pytest.fixture
+def fasta_file(tmp_path):
+    path = tmp_path / "a.fasta"
+    path.write_text(">seq1\nACGTACGT\n>seq2\nGGCC\n")
+    return str(path)
+
+
+def test_synthetic_response(fasta_file):
+    with MockRmlstServer() as server:
+        result = api.identify(fasta_file, uri=server.uri, client=RmlstClient())
+    expected = synthetic_response(b">seq1\nACGTACGT\n>seq2\nGGCC")
+    assert result == expected
+    assert result["fields"]["contigs"] == 2
+    assert len(result["exact_matches"]) == 53
+
+
+def test_retry_after_is_whole_seconds():
+    with MockRmlstServer(faults=["throttle"]) as server:
+        response = requests.post(server.uri, json={"sequence": ">a\nACGT"})
+    assert response.status_code == 429
+    assert http._parse_retry_after(response.headers["Retry-After"]) == 1.0
+
+
+def test_client_hang_up_is_not_reported(capsys):
+    with MockRmlstServer(faults=["slow"], slow_body=0.5) as server:
+        body = json.dumps({"sequence": ">a\nACGT"}).encode("utf-8")
+        with socket.create_connection(server._httpd.server_address) as conn:
+            conn.sendall(
+                b"POST " + KIOSK_PATH.encode("ascii") + b" HTTP/1.1\r\n"
+                b"Content-Length: "
+                + str(len(body)).encode("ascii")
+                + b"\r\n\r\n"
+                + body
+            )
+            conn.recv(64)
+            # Reset instead of a clean close, while the body is still trickling
+            conn.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+        time.sleep(0.6)
+    assert "Traceback" not in capsys.readouterr().err
+
+
+def test_retries_through_faults(fasta_file):
+    faults = ["throttle", "error", "reset", "slow"]
+    with MockRmlstServer(faults=faults, retry_after=0, slow_body=0.05) as server:
+        with RmlstClient() as client:
+            result = api.identify(
+                fasta_file, uri=server.uri, retries=4, retry_delay=0, client=client
+            )
+    assert result["taxon_prediction"]
+    assert server.requests == 4
+    assert server.counts == {"throttle": 1, "error": 1, "reset": 1, "slow": 1}
+
+
+def test_gives_up_after_retries(fasta_file):
+    with MockRmlstServer(error_rate=1.0, error_status=502) as server:
+        with pytest.raises(http.RmlstHttpError) as exc:
+            api.identify(
+                fasta_file,
+                uri=server.uri,
+                retries=1,
+                retry_delay=0,
+                client=RmlstClient(),
+            )
+    assert exc.value.status_code == 502
+    assert server.requests == 2
+
+
+def test_falls_back_when_kiosk_is_down(fasta_file, monkeypatch):
+    with MockRmlstServer() as server:
+        server.down_paths.add(KIOSK_PATH)
+        monkeypatch.setattr(http, "DEFAULT_URI", server.uri)
+        monkeypatch.setattr(http, "FALLBACK_URI", server.fallback_uri)
+        result = api.identify(
+            fasta_file, uri=server.uri, retries=0, retry_delay=0, client=RmlstClient()
+        )
+    assert result["taxon_prediction"]
+    assert sorted(server.paths.values()) == [1, 1]
+
+
+def test_cli_directory_runs_concurrently(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(8):
+        (d / f"s{i}.fasta").write_text(f">c\n{'ACGT' * (i + 1)}\n")
+
+    with MockRmlstServer(latency=0.1) as server:
+        result = CliRunner().invoke(
+            main,
+            ["-d", str(d), "-O", str(tmp_path / "out"), "-u", server.uri]
+            + ["--species-only", "-j", "4", "--rate", "0"],
+        )
+    assert result.exit_code == 0
+    assert "Done: 8 ok, 0 failed, 0 skipped." in result.output
+    assert server.max_in_flight > 1
+
+
+def test_cli_identical_files_share_one_request(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    (d / "a.fasta").write_text(">c1\nACGTACGT\n")
+    (d / "b.fasta").write_text(">c1\nACGT\nacgt\n")  # same after normalization
+    (d / "c.fasta").write_text(">c1\nGGGGCCCC\n")
+
+    with MockRmlstServer(latency=0.2) as server:
+        result = CliRunner().invoke(
+            main,
+            ["-d", str(d), "-O", str(tmp_path / "out"), "-u", server.uri]
+            + ["-j", "3", "--rate", "0"],
+        )
+    assert result.exit_code == 0
+    assert server.requests == 2
+    assert "Done: 3 ok, 0 failed, 0 skipped, 1 shared." in result.output
+    assert "(same payload as" in result.output
+    a = json.loads((tmp_path / "out" / "a.json").read_text())
+    assert json.loads((tmp_path / "out" / "b.json").read_text()) == a
+
+
+def test_cli_parse_workers_match_serial_run(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(6):
+        (d / f"s{i}.fasta").write_text(f">c{i}\n{'ACGT' * (i + 1)}\n>d\nacgu\n")
+    stats = tmp_path / "stats.json"
+
+    with MockRmlstServer() as server:
+        serial = CliRunner().invoke(
+            main, ["-d", str(d), "-u", server.uri, "--rate", "0", "--species-only"]
+        )
+        piped = CliRunner().invoke(
+            main,
+            ["-d", str(d), "-u", server.uri, "--rate", "0", "--species-only"]
+            + ["-j", "2", "--parse-workers", "2", "--stats-json", str(stats)],
+        )
+    assert piped.exit_code == 0
+    assert piped.output == serial.output
+    per_file = json.loads(stats.read_text())["per_file"]
+    assert all("parse" in f["timings"] and f["contigs"] == 2 for f in per_file)
+
+
+def test_cli_stats_json_report(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(3):
+        (d / f"s{i}.fasta").write_text(f">c\n{'ACGT' * (i + 1)}\n")
+    (d / "bad.fasta").write_text("NOT FASTA")
+    stats = tmp_path / "stats.json"
+
+    with MockRmlstServer(faults=["throttle"], retry_after=0) as server:
+        result = CliRunner().invoke(
+            main,
+            ["-d", str(d), "-O", str(tmp_path / "out"), "-u", server.uri]
+            + ["--rate", "0", "--retry-delay", "0", "--stats-json", str(stats)],
+        )
+    assert result.exit_code == 2
+
+    report = json.loads(stats.read_text())
+    assert report["files"] == 4
+    assert report["outcomes"] == {"failed": 1, "ok": 3}
+    assert report["retries"] == 1
+    assert report["attempt_statuses"] == {"200": 3, "429": 1}
+    assert report["stages"]["network"]["count"] == 3
+    assert report["stages"]["write"]["count"] == 4
+    assert report["endpoints"][server.uri]["count"] == 4
+    assert report["payload_bytes"]["max"] > report["payload_bytes"]["p50"] > 0
+
+    per_file = {f["file"]: f for f in report["per_file"]}
+    assert per_file["bad.fasta"]["code"] == 2
+    assert per_file["s0.fasta"]["contigs"] == 1
+    assert [a["status"] for a in per_file["s0.fasta"]["attempts"]] == [429, 200]
+
+
+@pytest.fixture
+def local_endpoints(monkeypatch):
+    with MockRmlstServer() as server:
+        monkeypatch.setattr(http, "DEFAULT_URI", server.uri)
+        monkeypatch.setattr(http, "FALLBACK_URI", server.fallback_uri)
+        yield server
+
+
+def test_breaker_sends_later_files_to_fallback(local_endpoints):
+    server = local_endpoints
+    server.down_paths.add(KIOSK_PATH)
+    breaker = http.CircuitBreaker(threshold=2, cooldown=60)
+    with RmlstClient(breaker=breaker) as client:
+        for _ in range(3):
+            result = http.call_rmlst_api(
+                [("c", "ACGT")], uri=server.uri, retries=5, retry_delay=0, client=client
+            )
+            assert result["taxon_prediction"]
+    # Two kiosk attempts trip the breaker; every call is then served by the fallback
+    assert server.paths == {KIOSK_PATH: 2, FALLBACK_PATH: 3}
+
+    # Recovery: after the cooldown one probe reaches the kiosk again
+    server.down_paths.clear()
+    breaker.cooldown = 0
+    with RmlstClient(breaker=breaker) as client:
+        http.call_rmlst_api([("c", "ACGT")], uri=server.uri, client=client)
+    assert server.paths[KIOSK_PATH] == 3
+    assert not breaker.is_open
+
+
+def test_hedged_request_uses_faster_fallback(local_endpoints):
+    server = local_endpoints
+    server.path_latency[KIOSK_PATH] = 1.0
+    metrics = Metrics()
+    with RmlstClient(hedge_after=0.1) as client:
+        start = time.monotonic()
+        result = http.call_rmlst_api(
+            [("c", "ACGT")], uri=server.uri, client=client, metrics=metrics
+        )
+        elapsed = time.monotonic() - start
+    assert result["taxon_prediction"]
+    assert elapsed < 0.8
+    assert server.paths[FALLBACK_PATH] == 1
+    # Only the winning request is recorded, even once the kiosk answers
+    time.sleep(1.0)
+    assert [a["uri"] for a in metrics.attempts] == [server.fallback_uri]
+
+
+def test_hedged_loser_stops_retrying(local_endpoints):
+    server = local_endpoints
+    server.down_paths.add(KIOSK_PATH)
+    server.path_latency[KIOSK_PATH] = 0.3
+    with RmlstClient(hedge_after=0.1) as client:
+        result = http.call_rmlst_api(
+            [("c", "ACGT")], uri=server.uri, retries=5, retry_delay=1, client=client
+        )
+        assert result["taxon_prediction"]
+        # The kiosk fails after the fallback won and would retry after 1 s
+        time.sleep(1.5)
+    assert server.paths[KIOSK_PATH] == 1
+    assert not [t for t in threading.enumerate() if t.name == "rmlst-hedge"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs SIGINT delivery")
+def test_ctrl_c_with_jobs_exits_at_once(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(4):
+        (d / f"s{i}.fasta").write_text(f">c\n{'ACGT' * (i + 1)}")
+
+    with MockRmlstServer(latency=5) as server:
+        proc = subprocess.Popen(
+            [sys.executable, "-c", "from rmlst_cli.cli import main; main()"]
+            + ["-d", str(d), "-O", str(tmp_path / "out"), "-j", "2"]
+            + ["-u", server.uri, "--rate", "0"],
+            stderr=subprocess.PIPE,
+        )
+        # Both workers are waiting for a response
+        deadline = time.monotonic() + 10
+        while server.requests < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        interrupted = time.monotonic()
+        proc.send_signal(signal.SIGINT)
+        assert proc.wait(timeout=10) == 130
+        # As a serial run: requests in flight are abandoned, not waited for
+        assert time.monotonic() - interrupted < 2
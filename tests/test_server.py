@@ -0,0 +1,98 @@
+import socket
+
+import pytest
+from click.testing import CliRunner
+
+from rmlst_cli import remote
+from rmlst_cli.cli import main
+from rmlst_cli.fasta import InvalidFastaError
+from rmlst_cli.http import RmlstClient
+from rmlst_cli.server import IdentifyService, RmlstServer, ServerError
+from rmlst_cli.testing.mock_server import MockRmlstServer
+
+unix_only = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available"
+)
+
+
+@pytest.fixture
+def upstream():
+    with MockRmlstServer() as server:
+        yield server
+
+
+@pytest.fixture
+def fasta_file(tmp_path):
+    path = tmp_path / "a.fasta"
+    path.write_text(">seq1\nACGTACGT\n")
+    return str(path)
+
+
+@unix_only
+def test_cli_forwards_to_running_server(tmp_path, upstream, fasta_file):
+    sock = str(tmp_path / "rmlst.sock")
+    service = IdentifyService(RmlstClient())
+    with RmlstServer(service, socket_path=sock):
+        runner = CliRunner()
+        args = ["-f", fasta_file, "-u", upstream.uri, "--species-only"]
+        result = runner.invoke(main, args + ["--server", sock])
+        assert result.exit_code == 0
+        assert service.jobs == 1
+        assert upstream.requests == 1
+
+        local = runner.invoke(main, args + ["--server", sock, "--no-server"])
+        assert local.output == result.output
+        assert service.jobs == 1
+
+        # Options of this process's own client are reported as unused
+        tuned = runner.invoke(main, args + ["--server", sock, "--rate", "5"])
+        assert tuned.exit_code == 0
+        assert "Warning: --rate not used: forwarding to rmlst serve" in tuned.output
+        assert "Warning" not in result.output
+
+        (tmp_path / "bad.fasta").write_text("NOT FASTA")
+        bad = runner.invoke(main, ["-f", str(tmp_path / "bad.fasta"), "--server", sock])
+        assert bad.exit_code == 2
+        assert "invalid FASTA or no sequences" in bad.output
+
+        with pytest.raises(ServerError):
+            RmlstServer(service, socket_path=sock)
+
+    # Socket removed on shutdown; the CLI then runs locally
+    assert remote.connect(sock) is None
+
+
+def test_remote_client_over_tcp(upstream, fasta_file):
+    service = IdentifyService(RmlstClient())
+    with pytest.raises(ServerError):
+        RmlstServer(service, port=0)
+    with RmlstServer(service, port=0, token="s3cret") as server:
+        with pytest.raises(remote.RemoteError):
+            remote.connect(server.address)
+        with pytest.raises(remote.RemoteError):
+            remote.connect(server.address, token="guess")
+        client = remote.connect(server.address, token="s3cret")
+        assert client is not None
+        result = client.identify(fasta_file, uri=upstream.uri)
+        assert result["taxon_prediction"]
+        with pytest.raises(InvalidFastaError):
+            client.identify(__file__, uri=upstream.uri)
+        assert client.identify(__file__, uri=upstream.uri, graceful=True) == {}
+
+
+@unix_only
+def test_stale_socket_is_replaced(tmp_path):
+    sock = str(tmp_path / "rmlst.sock")
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.bind(sock)
+    s.close()  # leaves the socket file without a listener
+
+    assert remote.connect(sock) is None
+    with RmlstServer(IdentifyService(RmlstClient()), socket_path=sock):
+        assert remote.connect(sock) is not None
+
+
+def test_serve_port_requires_token():
+    result = CliRunner().invoke(main, ["serve", "--port", "0"])
+    assert result.exit_code == 2
+    assert "--port needs --token" in result.output
@@ -0,0 +1,119 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from rmlst_cli.cli import main
+from rmlst_cli.io import InputFile
+from rmlst_cli.shard import Shard, ShardError, parse_shard, select_shard
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == Shard(2, 4)
+    assert (
+        Shard(2, 4).file_name("rmlst_summary.tsv") == "rmlst_summary.shard-2-of-4.tsv"
+    )
+    for bad in ["0/4", "5/4", "2", "a/b", "2/0"]:
+        with pytest.raises(ShardError):
+            parse_shard(bad)
+
+
+@pytest.mark.parametrize("by", ["hash", "position", "size"])
+def test_shards_partition_the_input(tmp_path, by):
+    items = []
+    for i in range(20):
+        path = tmp_path / f"s{i:02d}.fasta"
+        path.write_text(">c\n" + "A" * (i * 37 % 11 + 1) * 100)
+        items.append(InputFile(path.name, str(path)))
+
+    shards = [list(select_shard(items, Shard(i, 3), by=by)) for i in (1, 2, 3)]
+    assert sorted(item for shard in shards for item in shard) == items
+    # Original order is kept within a shard
+    assert all(shard == sorted(shard) for shard in shards)
+    if by == "size":
+        loads = [sum(os.path.getsize(item.path) for item in s) for s in shards]
+        assert max(loads) - min(loads) <= max(os.path.getsize(i.path) for i in items)
+
+
+def fake_identify(path, **kwargs):
+    name = os.path.basename(path)
+    return {"taxon_prediction": [{"taxon": f"T {name}", "support": len(name)}]}
+
+
+def test_sharded_run_merges_to_single_run_outputs(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    for i in range(7):
+        (d / f"s{i}.fasta").write_text(f">c\n{'ACGT' * (i + 1)}")
+    runner = CliRunner()
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        single = tmp_path / "single"
+        runner.invoke(main, ["-d", str(d), "-O", str(single), "--species-only"])
+        for i in (1, 2, 3):
+            result = runner.invoke(
+                main,
+                ["-d", str(d), "-O", str(tmp_path / f"shard{i}"), "--species-only"]
+                + ["--shard", f"{i}/3", "--shard-by", "position"],
+            )
+            assert result.exit_code == 0
+
+    shard_dirs = [str(tmp_path / f"shard{i}") for i in (1, 2, 3)]
+    merged = tmp_path / "merged"
+    result = runner.invoke(main, ["merge", *shard_dirs, "-O", str(merged)])
+    assert result.exit_code == 0
+    assert "Merged 7 files from 3 shards" in result.output
+    assert (merged / "rmlst_summary.tsv").read_text() == (
+        single / "rmlst_summary.tsv"
+    ).read_text()
+
+    result = runner.invoke(main, ["merge", *shard_dirs[:2], "-O", str(merged)])
+    assert result.exit_code == 2
+    assert "missing shards: 3/3" in result.output
+
+
+def test_sharded_json_outputs_are_copied(tmp_path):
+    d = tmp_path / "in"
+    (d / "sub").mkdir(parents=True)
+    (d / "a.fasta").write_text(">c\nACGT")
+    (d / "sub" / "b.fasta").write_text(">c\nGGCC")
+    runner = CliRunner()
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify):
+        for i in (1, 2):
+            runner.invoke(
+                main,
+                ["-d", str(d), "-r", "-O", str(tmp_path / f"shard{i}")]
+                + ["--shard", f"{i}/2", "--shard-by", "position"],
+            )
+
+    merged = tmp_path / "merged"
+    result = runner.invoke(
+        main,
+        [
+            "merge",
+            str(tmp_path / "shard1"),
+            str(tmp_path / "shard2"),
+            "-O",
+            str(merged),
+        ],
+    )
+    assert result.exit_code == 0
+    assert (merged / "a.json").exists()
+    assert (merged / "sub" / "b.json").exists()
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify) as mock_identify:
+        result = runner.invoke(
+            main, ["-d", str(d), "-r", "-O", str(merged), "--resume"]
+        )
+    assert mock_identify.call_count == 0
+    assert "Done: 0 ok, 0 failed, 2 skipped." in result.output
+
+
+def test_shard_requires_batch_mode(tmp_path):
+    f = tmp_path / "a.fasta"
+    f.write_text(">c\nACGT")
+    result = CliRunner().invoke(main, ["-f", str(f), "--shard", "1/2"])
+    assert result.exit_code == 2
+    result = CliRunner().invoke(main, ["-d", str(tmp_path), "--shard", "3/2"])
+    assert result.exit_code == 2
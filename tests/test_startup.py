@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that must not be imported just to start the CLI
+# (--help, --version and usage errors never touch the network or a FASTA file)
+HEAVY_MODULES = [
+    "requests",
+    "urllib3",
+    "Bio",
+    "concurrent.futures",
+    "email.utils",
+    "hashlib",
+    "socket",
+    "rmlst_cli.budget",
+    "rmlst_cli.cache",
+    "rmlst_cli.lease",
+    "rmlst_cli.shard",
+]
+
+
+def imported_modules(code):
+    """
+    Runs code in a fresh interpreter with -X importtime and returns
+    {module: cumulative_microseconds} for every module imported by it.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import rmlst_cli.cli",
+        "from rmlst_cli.cli import main\n"
+        "try:\n    main(['--version'])\nexcept SystemExit:\n    pass",
+        "from rmlst_cli.cli import main\n"
+        "try:\n    main([])\nexcept SystemExit:\n    pass",
+    ],
+)
+def test_cli_startup_does_not_import_heavy_modules(code):
+    modules = imported_modules(code)
+    assert "rmlst_cli.cli" in modules
+    # Only count imports made on behalf of rmlst_cli, not by site/.pth hooks
+    loaded = [m for m in HEAVY_MODULES if m in modules]
+    site_loaded = imported_modules("pass")
+    assert [m for m in loaded if m not in site_loaded] == []
+
+
+def test_network_path_still_imports_requests():
+    modules = imported_modules(
+        "from rmlst_cli.http import RmlstClient\nRmlstClient().close()"
+    )
+    assert "requests" in modules
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from rmlst_cli.cli import handle_watch
+from rmlst_cli.fasta import InvalidFastaError
+from rmlst_cli.http import RmlstNetworkError
+from rmlst_cli.io import InputFile
+from rmlst_cli.watch import DirectoryWatcher, SettleTracker
+
+
+def test_settle_tracker_waits_for_stable_files(tmp_path):
+    path = tmp_path / "a.fasta"
+    path.write_text(">c\nACGT")
+    item = InputFile("a.fasta", str(path))
+    tracker = SettleTracker(settle=0.3)
+
+    ready, next_check = tracker.update([item])
+    assert ready == [] and 0 < next_check <= 0.31
+    time.sleep(0.35)
+    ready, _ = tracker.update([item])
+    assert [i for i, _ in ready] == [item]
+    # Not reported again while running, nor once done unless it changes
+    assert tracker.update([item]) == ([], None)
+    tracker.done("a.fasta", ready[0][1])
+    assert tracker.update([item]) == ([], None)
+
+    old = time.time() - 60
+    path.write_text(">c\nACGTACGT")
+    os.utime(path, (old, old))
+    ready, _ = tracker.update([item])
+    assert [i for i, _ in ready] == [item]
+
+
+def test_inotify_wakes_on_new_file(tmp_path):
+    with DirectoryWatcher(str(tmp_path)) as watcher:
+        if not watcher.uses_inotify:
+            pytest.skip("inotify not available")
+        timer = threading.Timer(0.2, (tmp_path / "a.fasta").write_text, [">c\nA"])
+        timer.start()
+        start = time.monotonic()
+        watcher.wait(10)
+        assert time.monotonic() - start < 5
+        timer.join()
+
+
+def fake_identify(path, **kwargs):
+    with open(path) as f:
+        size = len(f.read())
+    return {"taxon_prediction": [{"taxon": f"T{size}", "support": 100}]}
+
+
+def run_watch(d, out, stop):
+    handle_watch(
+        str(d),
+        str(out),
+        False,
+        None,
+        "http://unused",
+        0,
+        0,
+        False,
+        False,
+        settle=0.2,
+        poll_interval=0.05,
+        use_inotify=False,
+        stop=stop,
+    )
+
+
+def wait_for_rows(summary, *rows):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if summary.exists() and summary.read_text().splitlines()[1:] == list(rows):
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"expected summary rows {rows}")
+
+
+def test_watch_identifies_new_and_changed_files_once(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    out = tmp_path / "out"
+    summary = out / "rmlst_summary.tsv"
+    (d / "a.fasta").write_text(">c\nACGT")
+
+    with patch("rmlst_cli.api.identify", side_effect=fake_identify) as identify:
+        stop = threading.Event()
+        thread = threading.Thread(target=run_watch, args=(d, out, stop))
+        thread.start()
+        try:
+            wait_for_rows(summary, "a.fasta\tT7\t100")
+            (d / "b.fasta").write_text(">c\nGGCCGGCC")
+            (d / "notes.txt").write_text("not a FASTA file")
+            wait_for_rows(summary, "a.fasta\tT7\t100", "b.fasta\tT11\t100")
+            # A changed file's row is replaced
+            (d / "a.fasta").write_text(">c\nACGTA")
+            wait_for_rows(summary, "a.fasta\tT8\t100", "b.fasta\tT11\t100")
+        finally:
+            stop.set()
+            thread.join()
+        assert identify.call_count == 3
+        assert summary.read_text().splitlines()[0] == "file\tspecies\tsupport"
+        assert (out / "b.json").exists()
+
+        # A restarted watch remembers what it identified
+        stop = threading.Event()
+        thread = threading.Thread(target=run_watch, args=(d, out, stop))
+        thread.start()
+        time.sleep(0.5)
+        stop.set()
+        thread.join()
+        assert identify.call_count == 3
+
+
+def test_watch_retries_network_errors_but_not_invalid_files(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    out = tmp_path / "out"
+    summary = out / "rmlst_summary.tsv"
+    (d / "a.fasta").write_text(">c\nACGT")
+    (d / "bad.fasta").write_text(">c\nACGT")
+    down = [True]
+
+    def flaky_identify(path, **kwargs):
+        if path.endswith("bad.fasta"):
+            raise InvalidFastaError("bad")
+        if down[0]:
+            raise RmlstNetworkError("down")
+        return fake_identify(path)
+
+    # Retried after max(--retry-delay, 1) s with exponential backoff
+    with patch("rmlst_cli.api.identify", side_effect=flaky_identify) as identify:
+        stop = threading.Event()
+        thread = threading.Thread(target=run_watch, args=(d, out, stop))
+        thread.start()
+        try:
+            time.sleep(0.5)
+            down[0] = False
+            wait_for_rows(summary, "a.fasta\tT7\t100")
+        finally:
+            stop.set()
+            thread.join()
+    names = [os.path.basename(c.args[0]) for c in identify.call_args_list]
+    assert sorted(names) == ["a.fasta", "a.fasta", "bad.fasta"]
+
+    # A restart retries a file whose last attempt failed with a network error
+    # (but not an invalid one)
+    st = os.stat(d / "a.fasta")
+    entry = {"file": "a.fasta", "status": "failed", "code": 4}
+    entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+    with open(out / "rmlst_journal.jsonl", "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    with patch("rmlst_cli.api.identify", side_effect=flaky_identify) as identify:
+        stop = threading.Event()
+        thread = threading.Thread(target=run_watch, args=(d, out, stop))
+        thread.start()
+        time.sleep(0.5)
+        stop.set()
+        thread.join()
+    assert [os.path.basename(c.args[0]) for c in identify.call_args_list] == ["a.fasta"]
+
+
+def test_watch_surfaces_worker_errors_without_new_events(tmp_path):
+    d = tmp_path / "in"
+    d.mkdir()
+    (d / "a.fasta").write_text(">c\nACGT")
+    errors = []
+
+    def run():
+        try:
+            handle_watch(
+                str(d),
+                str(tmp_path / "out"),
+                False,
+                None,
+                "http://unused",
+                0,
+                0,
+                False,
+                False,
+                settle=0,
+                poll_interval=60,
+                stop=threading.Event(),
+            )
+        except RuntimeError as e:
+            errors.append(e)
+
+    def fail(*args, **kwargs):
+        # Fails after the loop has gone back to waiting
+        time.sleep(0.2)
+        raise RuntimeError("bug")
+
+    with patch("rmlst_cli.cli.identify_file", side_effect=fail):
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert [str(e) for e in errors] == ["bug"]